@@ -0,0 +1,39 @@
+/**
+ * REST API utility for large node outputs sent over the websocket by reference
+ */
+
+export interface NodeOutputPage {
+  execution_id: string;
+  node_id: string;
+  path: string | null;
+  value: any;
+  // Set when the selected value is a string or a list
+  total?: number;
+  offset?: number;
+  limit?: number;
+}
+
+export async function fetchNodeOutput(
+  ref: { url: string },
+  options: { path?: string; offset?: number; limit?: number } = {}
+): Promise<NodeOutputPage> {
+  const url = new URL(
+    ref.url,
+    process.env.PYTHON_URL || 'http://localhost:8031'
+  );
+  if (options.path) {
+    url.searchParams.set('path', options.path);
+  }
+  if (options.offset !== undefined) {
+    url.searchParams.set('offset', String(options.offset));
+  }
+  if (options.limit !== undefined) {
+    url.searchParams.set('limit', String(options.limit));
+  }
+
+  const response = await fetch(url.toString());
+  if (!response.ok) {
+    throw new Error(`Failed to fetch node output: ${response.status}`);
+  }
+  return response.json();
+}
@@ -39,18 +39,11 @@ export class WorkflowWebSocket {
             const message = JSON.parse(event.data);
             console.log(`📨 [WebSocket] Message received:`, message);
 
-            // Route to specific event handlers
-            if (message.event && this.messageHandlers[message.event]) {
-              this.messageHandlers[message.event].forEach((handler) => {
-                handler(message.data);
-              });
-            }
-
-            // Also emit 'message' event for raw message handling
-            if (this.messageHandlers['message']) {
-              this.messageHandlers['message'].forEach((handler) => {
-                handler(message);
-              });
+            // Batch frames carry several events in the order they occurred
+            if (message.event === 'batch') {
+              message.data.forEach((batched: any) => this.dispatch(batched));
+            } else {
+              this.dispatch(message);
             }
           } catch (error) {
             console.error('Error parsing WebSocket message:', error);
@@ -85,6 +78,22 @@ export class WorkflowWebSocket {
     });
   }
 
+  private dispatch(message: any) {
+    // Route to specific event handlers
+    if (message.event && this.messageHandlers[message.event]) {
+      this.messageHandlers[message.event].forEach((handler) => {
+        handler(message.data);
+      });
+    }
+
+    // Also emit 'message' event for raw message handling
+    if (this.messageHandlers['message']) {
+      this.messageHandlers['message'].forEach((handler) => {
+        handler(message);
+      });
+    }
+  }
+
   disconnect() {
     if (this.socket) {
       this.socket.close();
@@ -133,14 +142,24 @@ export class WorkflowWebSocket {
     this.socket.send(message);
   }
 
-  executeWorkflow(nodes: any[], edges: any[]) {
+  executeWorkflow(
+    nodes: any[],
+    edges: any[],
+    options: { incremental?: boolean } = {}
+  ) {
     this.send('execute-workflow', {
       workflow_id: this.workflowId,
       nodes,
       edges,
+      incremental: options.incremental ?? false,
     });
   }
 
+  // Ask for a full node status snapshot after missing a status patch
+  resyncNodeStatuses() {
+    this.send('resync-node-statuses', { workflow_id: this.workflowId });
+  }
+
   isConnected(): boolean {
     return this.socket !== null && this.socket.readyState === WebSocket.OPEN;
   }
@@ -33,6 +33,13 @@ const NodeControl: FC<NodeControlProps> = ({ id, data }) => {
         </div>
       );
 
+    case NodeRunningStatus.Cached:
+      return (
+        <div className="absolute top-1 right-1">
+          <CheckCircleIcon className="h-5 w-5 text-sky-500" />
+        </div>
+      );
+
     case NodeRunningStatus.Failed:
       return (
         <div className="absolute top-1 right-1">
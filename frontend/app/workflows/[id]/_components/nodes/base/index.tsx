@@ -17,7 +17,8 @@ const BaseNode: FC<any> = ({ id, data, children, className }) => {
           data._runningStatus === NodeRunningStatus.Running &&
           !showSelectedBorder,
         showSuccessBorder:
-          data._runningStatus === NodeRunningStatus.Succeeded &&
+          (data._runningStatus === NodeRunningStatus.Succeeded ||
+            data._runningStatus === NodeRunningStatus.Cached) &&
           !showSelectedBorder,
         showFailedBorder:
           data._runningStatus === NodeRunningStatus.Failed &&
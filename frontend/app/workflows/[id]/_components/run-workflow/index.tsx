@@ -33,6 +33,8 @@ const RunWorkflowButton: React.FC<RunWorkflowButtonProps> = ({
 
   const { runWorkflow } = useWorkflowExecution(workflowId);
   const [isHovered, setIsHovered] = useState(false);
+  // Reuse results of nodes unchanged since the last run instead of rerunning
+  const [reuseResults, setReuseResults] = useState(false);
 
   // SWR mutation hooks for saving workflow
   const { trigger: triggerWorkflowSave } = useSWRMutation(
@@ -134,7 +136,7 @@ const RunWorkflowButton: React.FC<RunWorkflowButtonProps> = ({
       };
 
       // Run the workflow
-      await runWorkflow(workflowData as any);
+      await runWorkflow(workflowData as any, { incremental: reuseResults });
     } catch (error) {
       console.error('Error running workflow:', error);
     }
@@ -187,22 +189,36 @@ const RunWorkflowButton: React.FC<RunWorkflowButtonProps> = ({
     return <PlayIcon className="h-5 w-5" />;
   };
 
+  const isDisabled = executionStatus === 'executing' || saveStatus === 'saving';
+
   return (
-    <button
-      className={`ml-2 p-1.5 flex items-center justify-center rounded-md text-white transition-colors ${getButtonColor()} ${
-        executionStatus === 'executing' || saveStatus === 'saving'
-          ? 'cursor-not-allowed opacity-70'
-          : 'hover:bg-indigo-600'
-      }`}
-      title={getButtonTooltip()}
-      disabled={executionStatus === 'executing' || saveStatus === 'saving'}
-      onClick={handleRunWorkflow}
-      onMouseEnter={() => setIsHovered(true)}
-      onMouseLeave={() => setIsHovered(false)}
-      aria-label="Run workflow"
-    >
-      <ButtonIcon />
-    </button>
+    <div className="flex items-center">
+      <button
+        className={`ml-2 p-1.5 flex items-center justify-center rounded-md text-white transition-colors ${getButtonColor()} ${
+          isDisabled ? 'cursor-not-allowed opacity-70' : 'hover:bg-indigo-600'
+        }`}
+        title={getButtonTooltip()}
+        disabled={isDisabled}
+        onClick={handleRunWorkflow}
+        onMouseEnter={() => setIsHovered(true)}
+        onMouseLeave={() => setIsHovered(false)}
+        aria-label="Run workflow"
+      >
+        <ButtonIcon />
+      </button>
+      <label
+        className="ml-2 flex items-center gap-1 text-xs text-gray-600"
+        title="Reuse the results of nodes unchanged since the last run"
+      >
+        <input
+          type="checkbox"
+          checked={reuseResults}
+          disabled={isDisabled}
+          onChange={(e) => setReuseResults(e.target.checked)}
+        />
+        Reuse unchanged
+      </label>
+    </div>
   );
 };
 
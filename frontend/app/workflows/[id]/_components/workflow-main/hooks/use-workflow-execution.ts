@@ -10,7 +10,8 @@ export type NodeRunningStatus =
   | 'waiting'
   | 'running'
   | 'succeeded'
-  | 'failed';
+  | 'failed'
+  | 'cached';
 
 // Node execution result structure from backend
 export interface NodeExecutionResult {
@@ -21,6 +22,18 @@ export interface NodeExecutionResult {
   result: string;
   error?: string;
   output?: Record<string, any>;
+  // Set when the result was served from the node result cache
+  cached?: boolean;
+  // Set when output is only a preview of a large output kept on the server
+  output_ref?: NodeOutputRef;
+}
+
+// Location of a large node output, fetched with fetchNodeOutput
+export interface NodeOutputRef {
+  execution_id: string;
+  node_id: string;
+  size: number;
+  url: string;
 }
 
 // WebSocket event data types
@@ -29,16 +42,34 @@ export interface WorkflowExecutionStartedData {
   workflow_id: string;
 }
 
+// LLM token usage and cost of a whole execution
+export interface ExecutionUsage {
+  llm_calls: number;
+  prompt_tokens: number;
+  completion_tokens: number;
+  reasoning_tokens: number;
+  total_tokens: number;
+  cost: number;
+  by_model: Record<
+    string,
+    { llm_calls: number; total_tokens: number; cost: number }
+  >;
+  elapsed: number;
+  tokens_per_second: number;
+}
+
 export interface WorkflowExecutionCompletedData {
   status: 'completed';
   results: Record<string, NodeExecutionResult>;
   node_statuses: Record<string, NodeRunningStatus>;
+  usage?: ExecutionUsage;
 }
 
 export interface WorkflowExecutionErrorData {
   status: 'error' | 'cancelled';
   error: string;
   failed_layer?: number;
+  failed_nodes?: string[];
   results?: Record<string, NodeExecutionResult>;
   node_statuses?: Record<string, NodeRunningStatus>;
 }
@@ -49,10 +80,47 @@ export interface WorkflowExecutionProgressData {
   results: Record<string, NodeExecutionResult>;
 }
 
+// Full snapshot of node statuses, sent when an execution starts, on connect
+// and on resync; seq is the number of the last patch it includes
 export interface NodeStatusUpdateData {
+  execution_id?: string;
+  seq?: number;
   node_statuses: Record<string, NodeRunningStatus>;
 }
 
+// Nodes whose status changed since the previous patch; patches merged by the
+// server's event batching cover the sequence numbers from_seq to seq
+export interface NodeStatusPatchData {
+  execution_id: string;
+  from_seq?: number;
+  seq: number;
+  changes: Record<string, NodeRunningStatus>;
+}
+
+// Partial output of a node that is still running (e.g. one OCR page)
+export interface NodeOutputPartialData {
+  node_id: string;
+  output: Record<string, any>;
+  // OCR nodes report pages, map-reduce LLM nodes report chunks
+  pages_completed?: number;
+  total_pages?: number;
+  chunks_completed?: number;
+  total_chunks?: number;
+  progress: number;
+}
+
+// Coalesced tokens of a streaming LLM node, in index order
+export interface NodeOutputDeltaData {
+  node_id: string;
+  delta: string;
+  index: number;
+}
+
+export interface NodeProgress {
+  progress: number;
+  outputs: Record<string, any>[];
+}
+
 // WebSocket message wrapper
 export interface WorkflowWebSocketMessage {
   event: string;
@@ -61,7 +129,10 @@ export interface WorkflowWebSocketMessage {
     | WorkflowExecutionCompletedData
     | WorkflowExecutionErrorData
     | WorkflowExecutionProgressData
-    | NodeStatusUpdateData;
+    | NodeStatusUpdateData
+    | NodeStatusPatchData
+    | NodeOutputPartialData
+    | NodeOutputDeltaData;
 }
 
 export function useWorkflowExecution(workflowId: string) {
@@ -72,11 +143,21 @@ export function useWorkflowExecution(workflowId: string) {
   const [layerResults, setLayerResults] = useState<
     Record<number, Record<string, NodeExecutionResult>>
   >({});
+  const [nodeProgress, setNodeProgress] = useState<
+    Record<string, NodeProgress>
+  >({});
+  const [streamingOutputs, setStreamingOutputs] = useState<
+    Record<string, string>
+  >({});
 
   // Workflow store state
   const updateNodeExecutionStatus = useStore(
     (s) => s.updateNodeExecutionStatus
   );
+  const setNodeExecutionStatuses = useStore((s) => s.setNodeExecutionStatuses);
+  const applyNodeExecutionStatusPatch = useStore(
+    (s) => s.applyNodeExecutionStatusPatch
+  );
   const clearNodeExecutionStatuses = useStore(
     (s) => s.clearNodeExecutionStatuses
   );
@@ -86,6 +167,11 @@ export function useWorkflowExecution(workflowId: string) {
   const socketRef = useRef<WorkflowWebSocket | null>(null);
   // Reference to cleanup handlers function
   const cleanupHandlersRef = useRef<(() => void) | null>(null);
+  // Sequence number of the last node status patch applied
+  const statusSeqRef = useRef<number>(0);
+  // Execution the last node status snapshot belongs to; patches of any
+  // other execution (e.g. late ones from a previous run) are dropped
+  const statusExecutionIdRef = useRef<string | null>(null);
 
   useEffect(() => {
     // Switch to pipeline mode when executing
@@ -117,11 +203,18 @@ export function useWorkflowExecution(workflowId: string) {
 
   // Function to run the workflow
   const runWorkflow = useCallback(
-    async (workflowData: WorkflowClient) => {
+    async (
+      workflowData: WorkflowClient,
+      options: { incremental?: boolean } = {}
+    ) => {
       try {
         clearNodeExecutionStatuses();
         setCurrentLayer(-1);
         setLayerResults({});
+        setNodeProgress({});
+        setStreamingOutputs({});
+        statusSeqRef.current = 0;
+        statusExecutionIdRef.current = null;
 
         if (socketRef.current) {
           socketRef.current.disconnect();
@@ -172,6 +265,7 @@ export function useWorkflowExecution(workflowId: string) {
                 finalResults: data.results,
                 finalNodeStatuses: data.node_statuses,
                 totalResults: Object.keys(data.results).length,
+                usage: data.usage,
               }
             );
 
@@ -242,9 +336,14 @@ export function useWorkflowExecution(workflowId: string) {
             });
 
             setCurrentLayer(data.current_layer);
+            // Nodes are scheduled as soon as their own dependencies finish,
+            // so a layer's results can arrive across several progress events.
             setLayerResults((prev) => ({
               ...prev,
-              [data.current_layer]: data.results,
+              [data.current_layer]: {
+                ...prev[data.current_layer],
+                ...data.results,
+              },
             }));
           }
         );
@@ -252,24 +351,17 @@ export function useWorkflowExecution(workflowId: string) {
         const unsubscribeNodeUpdate = socketRef.current?.on(
           'node-status-update',
           (data: NodeStatusUpdateData) => {
-            console.log(`🔄 [NodeStatus] Node status update received:`, {
+            console.log(`🔄 [NodeStatus] Node status snapshot received:`, {
               workflowId,
               timestamp: new Date().toISOString(),
-              nodeStatuses: data.node_statuses,
+              seq: data.seq,
               statusCount: Object.keys(data.node_statuses).length,
             });
 
-            // Log individual node status changes
-            Object.entries(data.node_statuses).forEach(([nodeId, status]) => {
-              console.log(`📍 [NodeStatus] Node ${nodeId}: ${status}`, {
-                workflowId,
-                nodeId,
-                status,
-                timestamp: new Date().toISOString(),
-              });
-
-              updateNodeExecutionStatus(nodeId, status);
-            });
+            // A snapshot replaces all statuses; later patches build on it
+            statusExecutionIdRef.current = data.execution_id ?? null;
+            statusSeqRef.current = data.seq ?? 0;
+            setNodeExecutionStatuses(data.node_statuses);
 
             // Log status summary
             const statusSummary = Object.values(data.node_statuses).reduce(
@@ -289,6 +381,54 @@ export function useWorkflowExecution(workflowId: string) {
           }
         );
 
+        const unsubscribeNodePatch = socketRef.current?.on(
+          'node-status-patch',
+          (data: NodeStatusPatchData) => {
+            // Patches of another execution than the snapshot's
+            if (data.execution_id !== statusExecutionIdRef.current) {
+              return;
+            }
+            // Patches already included in the last snapshot
+            if (data.seq <= statusSeqRef.current) {
+              return;
+            }
+            if ((data.from_seq ?? data.seq) > statusSeqRef.current + 1) {
+              console.warn(`⚠️ [NodeStatus] Missed status patches:`, {
+                workflowId,
+                expectedSeq: statusSeqRef.current + 1,
+                seq: data.seq,
+              });
+              socketRef.current?.resyncNodeStatuses();
+              return;
+            }
+            statusSeqRef.current = data.seq;
+            applyNodeExecutionStatusPatch(data.changes);
+          }
+        );
+
+        const unsubscribeNodeOutputPartial = socketRef.current?.on(
+          'node-output-partial',
+          (data: NodeOutputPartialData) => {
+            setNodeProgress((prev) => ({
+              ...prev,
+              [data.node_id]: {
+                progress: data.progress,
+                outputs: [...(prev[data.node_id]?.outputs ?? []), data.output],
+              },
+            }));
+          }
+        );
+
+        const unsubscribeNodeOutputDelta = socketRef.current?.on(
+          'node-output-delta',
+          (data: NodeOutputDeltaData) => {
+            setStreamingOutputs((prev) => ({
+              ...prev,
+              [data.node_id]: (prev[data.node_id] ?? '') + data.delta,
+            }));
+          }
+        );
+
         // Set up error handler
         const unsubscribeSocketError = socketRef.current?.on(
           'error',
@@ -315,6 +455,9 @@ export function useWorkflowExecution(workflowId: string) {
           unsubscribeError?.();
           unsubscribeProgress?.();
           unsubscribeNodeUpdate?.();
+          unsubscribeNodePatch?.();
+          unsubscribeNodeOutputPartial?.();
+          unsubscribeNodeOutputDelta?.();
           unsubscribeSocketError?.();
         };
 
@@ -334,9 +477,12 @@ export function useWorkflowExecution(workflowId: string) {
           }
         );
 
+        // Incremental runs reuse results of nodes unchanged since the last
+        // run; only when the user asks for it, every other run is a full run
         socketRef.current.executeWorkflow(
           workflowData.nodes,
-          workflowData.edges
+          workflowData.edges,
+          { incremental: options.incremental ?? false }
         );
 
         console.log(
@@ -355,11 +501,19 @@ export function useWorkflowExecution(workflowId: string) {
         return false;
       }
     },
-    [workflowId, clearNodeExecutionStatuses, updateNodeExecutionStatus]
+    [
+      workflowId,
+      clearNodeExecutionStatuses,
+      updateNodeExecutionStatus,
+      setNodeExecutionStatuses,
+      applyNodeExecutionStatusPatch,
+    ]
   );
 
   return {
     currentLayer,
+    nodeProgress,
+    streamingOutputs,
     runWorkflow,
   };
 }
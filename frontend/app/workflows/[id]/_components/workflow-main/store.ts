@@ -54,6 +54,7 @@ interface WorkflowState {
   nodeExecutionStatuses: Record<string, string>;
   setNodeExecutionStatuses: (statuses: Record<string, string>) => void;
   updateNodeExecutionStatus: (nodeId: string, status: string) => void;
+  applyNodeExecutionStatusPatch: (changes: Record<string, string>) => void;
   clearNodeExecutionStatuses: () => void;
   publishedAt: number;
   setPublishedAt: (publishedAt: number) => void;
@@ -186,6 +187,13 @@ export const createWorkflowStore = () => {
           [nodeId]: status,
         },
       })),
+    applyNodeExecutionStatusPatch: (changes) =>
+      set((state) => ({
+        nodeExecutionStatuses: {
+          ...state.nodeExecutionStatuses,
+          ...changes,
+        },
+      })),
     clearNodeExecutionStatuses: () =>
       set(() => ({ nodeExecutionStatuses: {} })),
 
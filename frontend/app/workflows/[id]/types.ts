@@ -197,6 +197,7 @@ export enum NodeRunningStatus {
   Running = 'running',
   Succeeded = 'succeeded',
   Failed = 'failed',
+  Cached = 'cached',
 }
 
 export type OnNodeAdd = (
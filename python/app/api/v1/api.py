@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import health
+from app.api.v1.endpoints import executions, health
 
 api_router = APIRouter()
 
 # Include routers from endpoints
 api_router.include_router(health.router)
+api_router.include_router(executions.router)
@@ -0,0 +1,99 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.db import get_db
+from app.services.execution_history import ExecutionHistoryService
+from app.services.node_output_store import node_output_store, page
+from app.services.workflow_execution import workflow_execution_service
+
+router = APIRouter(prefix="/executions", tags=["executions"])
+
+
+@router.get("/metrics")
+async def get_execution_metrics():
+    """
+    Get workflow execution metrics.
+
+    Returns:
+        dict: Active execution count and node concurrency queue depths
+    """
+    return workflow_execution_service.get_metrics()
+
+
+@router.get("/")
+def list_executions(
+    workflow_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    List workflow executions, newest first.
+
+    Returns:
+        list: Execution summaries without snapshots and results
+    """
+    executions = ExecutionHistoryService.list_executions(
+        db, workflow_id=workflow_id, status=status, limit=limit, offset=offset
+    )
+    return [
+        ExecutionHistoryService.get_execution_summary(execution)
+        for execution in executions
+    ]
+
+
+@router.get("/{execution_id}")
+def get_execution(execution_id: str, db: Session = Depends(get_db)):
+    """
+    Get a workflow execution with its snapshot and per-node results.
+
+    Returns:
+        dict: The execution record
+    """
+    execution = ExecutionHistoryService.get_execution(db, execution_id)
+    if execution is None:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    return {
+        **ExecutionHistoryService.get_execution_summary(execution),
+        "snapshot": execution.snapshot,
+        "result": execution.result,
+    }
+
+
+@router.get("/{execution_id}/nodes/{node_id}/output")
+def get_node_output(
+    execution_id: str,
+    node_id: str,
+    path: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100000, ge=1, le=1000000),
+    db: Session = Depends(get_db),
+):
+    """
+    Get a page of a node's full output, e.g. one sent to clients as a preview.
+
+    ``path`` selects a value inside the output (e.g. ``text`` or ``pages.0``);
+    strings are paged by character and lists by item.
+
+    Returns:
+        dict: The selected value and, for strings and lists, its total length
+    """
+    output = node_output_store.get(execution_id, node_id)
+    if output is None:
+        # Evicted from the store; fall back to the persisted execution
+        execution = ExecutionHistoryService.get_execution(db, execution_id)
+        result = ((execution.result or {}) if execution else {}).get("results", {})
+        output = result.get(node_id, {}).get("output")
+        if output is None:
+            raise HTTPException(status_code=404, detail="Node output not found")
+    try:
+        return {
+            "execution_id": execution_id,
+            "node_id": node_id,
+            **page(output, path, offset, limit),
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Output has no {e}")
@@ -1,6 +1,7 @@
 import json
 import logging
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.services.websocket_encoding import WireEncoding, loads
 from app.services.websocket_manager import websocket_manager
 from app.services.workflow_execution import workflow_execution_service
 from typing import Dict, Any
@@ -17,7 +18,11 @@ async def workflow_websocket_endpoint(websocket: WebSocket, workflow_id: str):
     Each client connects to a specific workflow by ID.
     """
     logger.info(f"Router: Connecting to workflow {workflow_id}")
-    await websocket_manager.connect(websocket, workflow_id)
+    # Clients may ask for ?encoding=msgpack and/or ?compression=zstd
+    encoding = WireEncoding.negotiate(websocket.query_params)
+    await websocket_manager.connect(websocket, workflow_id, encoding)
+    # Clients joining a running execution start from a full status snapshot
+    send_node_status_snapshot(workflow_id, websocket)
     try:
         while True:
             data = await websocket.receive_text()
@@ -25,49 +30,63 @@ async def workflow_websocket_endpoint(websocket: WebSocket, workflow_id: str):
 
             try:
                 # Parse the message
-                message = json.loads(data)
+                message = loads(data)
                 event_type = message.get("event")
 
                 if event_type == "execute-workflow":
                     await handle_execute_workflow(
                         workflow_id, message.get("data", {}), websocket
                     )
+                elif event_type == "resync-node-statuses":
+                    # The client missed a node-status-patch
+                    send_node_status_snapshot(workflow_id, websocket)
                 else:
-                    await websocket.send_text(
-                        json.dumps(
-                            {
-                                "event": "error",
-                                "data": {
-                                    "message": f"Unknown event type: {event_type}"
-                                },
-                            }
-                        )
+                    websocket_manager.send_to_connection(
+                        websocket,
+                        {
+                            "event": "error",
+                            "data": {"message": f"Unknown event type: {event_type}"},
+                        },
                     )
 
             except json.JSONDecodeError:
                 logger.error(f"Invalid JSON received: {data}")
-                await websocket.send_text(
-                    json.dumps(
-                        {"event": "error", "data": {"message": "Invalid JSON format"}}
-                    )
+                websocket_manager.send_to_connection(
+                    websocket,
+                    {"event": "error", "data": {"message": "Invalid JSON format"}},
                 )
 
             except Exception as e:
                 logger.exception(f"Error processing message: {str(e)}")
-                await websocket.send_text(
-                    json.dumps(
-                        {
-                            "event": "error",
-                            "data": {"message": f"Error processing request: {str(e)}"},
-                        }
-                    )
+                websocket_manager.send_to_connection(
+                    websocket,
+                    {
+                        "event": "error",
+                        "data": {"message": f"Error processing request: {str(e)}"},
+                    },
                 )
 
-    except WebSocketDisconnect:
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the manager already closed the socket of a slow client
         logger.warning(f"Router: Disconnecting from workflow {workflow_id}")
         websocket_manager.disconnect(websocket, workflow_id)
 
 
+def send_node_status_snapshot(workflow_id: str, websocket: WebSocket) -> None:
+    """
+    Send the node statuses of the workflow's running execution, if any.
+
+    Args:
+        workflow_id: ID of the workflow
+        websocket: The client WebSocket connection
+    """
+    snapshot = workflow_execution_service.node_status_snapshot(workflow_id)
+    if snapshot is not None:
+        websocket_manager.send_to_connection(
+            websocket, {"event": "node-status-update", "data": snapshot}
+        )
+
+
 async def handle_execute_workflow(
     workflow_id: str, data: Dict[str, Any], websocket: WebSocket
 ):
@@ -88,29 +107,27 @@ async def handle_execute_workflow(
             raise ValueError("No nodes provided")
 
         # Send initial response to the client
-        await websocket.send_text(
-            json.dumps(
-                {
-                    "event": "workflow-execution-started",
-                    "data": {"workflow_id": workflow_id, "status": "started"},
-                }
-            )
+        websocket_manager.send_to_connection(
+            websocket,
+            {
+                "event": "workflow-execution-started",
+                "data": {"workflow_id": workflow_id, "status": "started"},
+            },
         )
 
-        # Execute the workflow with the injected reporter
+        # Execute the workflow, optionally reusing unchanged node results
         result = await workflow_execution_service.execute_workflow(
-            workflow_id, nodes, edges
+            workflow_id, nodes, edges, incremental=bool(data.get("incremental"))
         )
 
         logger.info(f"Workflow execution initiated for {workflow_id}: {result}")
 
     except Exception as e:
         logger.exception(f"Error executing workflow {workflow_id}: {str(e)}")
-        await websocket.send_text(
-            json.dumps(
-                {
-                    "event": "workflow-execution-error",
-                    "data": {"workflow_id": workflow_id, "error": str(e)},
-                }
-            )
+        websocket_manager.send_to_connection(
+            websocket,
+            {
+                "event": "workflow-execution-error",
+                "data": {"workflow_id": workflow_id, "error": str(e)},
+            },
         )
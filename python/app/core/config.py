@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -19,6 +19,149 @@ class Settings(BaseSettings):
 
     DATABASE_URL: Optional[str] = None
 
+    # Outbound websocket messages queued per connection; clients that fall
+    # this far behind, or take longer than the timeout to accept a message,
+    # are dropped
+    WEBSOCKET_SEND_QUEUE_SIZE: int = 256
+    WEBSOCKET_SEND_TIMEOUT_SECONDS: float = 10.0
+    # Seconds status patches, progress and partial outputs of a workflow are
+    # collected before being sent in one frame (0 sends every event at once)
+    WEBSOCKET_FLUSH_INTERVAL: float = 0.05
+    # Clients opting in to zstd get payloads of at least this size compressed
+    WEBSOCKET_COMPRESSION_MIN_BYTES: int = 16 * 1024
+    # Let uvicorn negotiate permessage-deflate with clients
+    WEBSOCKET_PER_MESSAGE_DEFLATE: bool = True
+
+    # Workflow execution concurrency limits (0 disables a limit)
+    NODE_CONCURRENCY_GLOBAL: int = 64
+    NODE_CONCURRENCY_BY_TYPE: Dict[str, int] = {"llm": 16, "ocr": 2, "api_call": 32}
+    # Keyed by "<provider>:<model>", e.g. {"openai:gpt-4o": 8}
+    NODE_CONCURRENCY_BY_MODEL: Dict[str, int] = {}
+
+    # Node result cache (nodes opt in with data.config.cache)
+    NODE_RESULT_CACHE_MEMORY_ENTRIES: int = 1024
+    # Directory for the disk tier; unset to keep the cache in memory only
+    NODE_RESULT_CACHE_DIR: Optional[str] = ".cache/node_results"
+    NODE_RESULT_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    NODE_RESULT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    # Node types whose identical in-flight executions (same content hash)
+    # are coalesced across concurrent workflow runs; only nodes that opt in to
+    # result caching (data.config.cache) are coalesced, never within one run
+    SINGLE_FLIGHT_NODE_TYPES: list[str] = ["llm", "ocr"]
+
+    # Node outputs at least this large (serialized) are sent to clients as a
+    # preview plus a reference to /executions/{id}/nodes/{node_id}/output
+    # (0 always inlines outputs)
+    NODE_OUTPUT_OFFLOAD_MIN_BYTES: int = 32 * 1024
+    NODE_OUTPUT_PREVIEW_CHARS: int = 500
+    NODE_OUTPUT_STORE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Write-behind persistence of workflow executions
+    EXECUTION_PERSISTENCE_FLUSH_INTERVAL: float = 0.5
+    EXECUTION_PERSISTENCE_MAX_BATCH_SIZE: int = 200
+    # Minimum seconds between flushes triggered by node checkpoints (no more
+    # than the flush interval, which applies otherwise). Each flush rewrites
+    # the whole result JSON of an execution, so the bytes written grow with
+    # the square of its node count; raise this for executions of many nodes
+    EXECUTION_PERSISTENCE_CHECKPOINT_INTERVAL: float = 0.2
+    # Failed writes are retried with exponential backoff, then dropped
+    EXECUTION_PERSISTENCE_MAX_RETRIES: int = 5
+    EXECUTION_PERSISTENCE_MAX_BACKOFF: float = 30.0
+
+    # Resuming executions interrupted by a crash or redeploy
+    EXECUTION_RESUME_ON_STARTUP: bool = True
+    EXECUTION_HEARTBEAT_INTERVAL: float = 10.0
+    # Running executions without a heartbeat for this long are resumed
+    EXECUTION_STALE_AFTER_SECONDS: float = 60.0
+
+    # Process pool for CPU-bound executors (e.g. OCR)
+    PROCESS_POOL_ENABLED: bool = True
+    PROCESS_POOL_WORKERS: int = 2
+    # Jobs submitted beyond this wait on the event loop instead of queueing
+    PROCESS_POOL_MAX_PENDING: int = 16
+
+    # Surya OCR models, loaded once per process
+    OCR_PREWARM_MODELS: bool = False
+    # Estimated memory cap for loaded models (0 disables the cap)
+    OCR_MODEL_MEMORY_CAP_MB: int = 4096
+    # Idle models are evicted after this long (0 keeps them loaded)
+    OCR_MODEL_IDLE_TTL_SECONDS: float = 1800.0
+    # Pages per predictor call and PDF rasterization resolution
+    OCR_BATCH_SIZE: int = 8
+    OCR_PDF_DPI: int = 192
+    # Page batches submitted ahead of the one being consumed
+    OCR_PREFETCH_BATCHES: int = 2
+
+    # LLM token streaming (nodes opt in with data.config.stream)
+    LLM_STREAM_DEFAULT: bool = False
+    # Seconds between node-output-delta frames
+    LLM_STREAM_FLUSH_INTERVAL: float = 0.05
+
+    # Shared LLM clients and their HTTP connection pools
+    LLM_CLIENT_IDLE_TTL_SECONDS: float = 900.0
+    LLM_CLIENT_POOL_MAX_ENTRIES: int = 256
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_TIMEOUT_SECONDS: float = 600.0
+
+    # Batching of concurrent non-streaming LLM requests per client
+    # configuration; only useful for clients whose abatch sends one request
+    # (a window of 0, the default, disables batching)
+    LLM_BATCH_WINDOW_SECONDS: float = 0.0
+    LLM_BATCH_MAX_SIZE: int = 32
+    LLM_BATCH_MAX_CONCURRENCY: Optional[int] = None
+
+    # Optional per-provider starting limits in requests/tokens per minute,
+    # e.g. {"anthropic": {"rpm": 50, "tpm": 40000}} (0 = no limit). Without
+    # them calls are only limited by the quota reported in rate-limit
+    # response headers and by the pauses 429 responses ask for
+    LLM_RATE_LIMITS: Dict[str, Dict[str, int]] = {}
+    # Retries of 429/5xx/transport errors with jittered exponential backoff;
+    # retries are capped at LLM_RETRY_BUDGET_RATIO of calls process-wide
+    LLM_RETRY_MAX_ATTEMPTS: int = 5
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 30.0
+    LLM_RETRY_BUDGET_RATIO: float = 0.2
+    LLM_RETRY_BUDGET_MIN: float = 10.0
+
+    # LLM response cache (nodes opt in with data.config.prompt_cache)
+    LLM_RESPONSE_CACHE_DEFAULT: bool = False
+    LLM_RESPONSE_CACHE_PATH: str = ".cache/llm_responses.sqlite3"
+    LLM_RESPONSE_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+    # Near-duplicate lookup through OpenAI embeddings, using OPENAI_API_KEY.
+    # Only prompts of openai nodes without a custom base_url are embedded;
+    # other nodes' prompts only get exact matches and never leave for OpenAI
+    LLM_RESPONSE_CACHE_SEMANTIC: bool = False
+    LLM_RESPONSE_CACHE_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    LLM_RESPONSE_CACHE_SIMILARITY_THRESHOLD: float = 0.97
+    # Most recently used prompts per configuration compared on a miss
+    LLM_RESPONSE_CACHE_SEMANTIC_MAX_ENTRIES: int = 2000
+
+    # Dollar prices per million tokens, keyed by model name; calls to models
+    # without a price report their token usage with a cost of None
+    LLM_MODEL_PRICES: Dict[str, Dict[str, float]] = {
+        "o1": {"input": 15.0, "output": 60.0},
+        "gpt-4o": {"input": 10.0, "output": 30.0},
+        "deepseek-chat": {"input": 0.2, "output": 0.2},
+        "claude-3-5-sonnet-20241022": {"input": 3.0, "output": 15.0},
+        "claude-3-sonnet-20240229": {"input": 3.0, "output": 15.0},
+    }
+
+    # Context windows in tokens, keyed by model name
+    LLM_CONTEXT_WINDOWS: Dict[str, int] = {
+        "gpt-3.5-turbo": 16385,
+        "gpt-4o": 128000,
+        "gpt-4o-mini": 128000,
+        "o1": 200000,
+        "claude-3-5-sonnet-20241022": 200000,
+        "claude-3-sonnet-20240229": 200000,
+    }
+    LLM_DEFAULT_CONTEXT_WINDOW: int = 8192
+    # Map-reduce mode of LLM nodes over large inputs
+    LLM_MAP_REDUCE_CHUNK_TOKENS: int = 4000
+    LLM_MAP_REDUCE_CHUNK_OVERLAP: int = 200
+    LLM_MAP_REDUCE_MAX_CONCURRENCY: int = 8
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -1,8 +1,26 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Any, Callable, Dict
+
+from app.executors.execution_backend import get_execution_backend
 
 
 class BaseExecutor(ABC):
+    # CPU-bound executors run their blocking work in the process pool backend
+    cpu_bound: bool = False
+
     @abstractmethod
     def execute(self, node: Dict, previous_results: Dict, workflow_id: str) -> Dict:
         pass
+
+    async def run_blocking(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run blocking work on the backend matching this executor.
+
+        Args:
+            fn: Function to run; must be picklable for CPU-bound executors
+            *args: Arguments for the function
+
+        Returns:
+            The function's return value
+        """
+        return await get_execution_backend(self.cpu_bound).run(fn, *args)
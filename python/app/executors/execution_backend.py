@@ -0,0 +1,170 @@
+"""
+Execution backends for blocking executor work.
+
+Executors hand blocking work to a backend instead of calling it on the event
+loop. I/O-bound or light work runs in the default thread pool. Executors that
+declare themselves CPU-bound run their work in a managed process pool, so
+several concurrent jobs do not serialize on the GIL and starve the event loop.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionBackend(ABC):
+    """Runs blocking callables without blocking the event loop."""
+
+    @abstractmethod
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def metrics(self) -> Dict[str, Any]:
+        return {}
+
+
+class ThreadBackend(ExecutionBackend):
+    """Runs work in the event loop's default thread pool."""
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.to_thread(fn, *args)
+
+
+def _warm_up() -> int:
+    """No-op submitted to each worker so the pool is started ahead of use."""
+    return os.getpid()
+
+
+class ProcessPoolBackend(ExecutionBackend):
+    """
+    Runs work in a managed ``ProcessPoolExecutor``.
+
+    Worker processes are started eagerly by ``start`` and kept warm for the
+    lifetime of the pool. The number of jobs submitted but not yet finished is
+    bounded by ``max_pending``; further callers wait on the event loop instead
+    of growing the pool's internal queue. Arguments and results are transferred
+    by pickling, so callables must be module-level functions and should take
+    file paths rather than large in-memory payloads.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_pending: int = 16,
+        initializer: Optional[Callable[..., Any]] = None,
+        initargs: Tuple[Any, ...] = (),
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            max_workers: Number of worker processes
+            max_pending: Maximum number of submitted, unfinished jobs
+            initializer: Optional callable run once in every worker process
+            initargs: Arguments for the initializer
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.initializer = initializer
+        self.initargs = initargs
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+        self._waiting = 0
+
+    def start(self) -> None:
+        """Create the pool and start every worker process."""
+        if self._pool is not None:
+            return
+        # Spawned workers do not inherit the event loop or model threads of
+        # the server process
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self.initializer,
+            initargs=self.initargs,
+        )
+        for _ in range(self.max_workers):
+            self._pool.submit(_warm_up)
+        logger.info(f"Started process pool with {self.max_workers} workers")
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a picklable callable in a worker process.
+
+        Args:
+            fn: Module-level function to call
+            *args: Picklable arguments
+
+        Returns:
+            The unpickled return value
+        """
+        self.start()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, fn, *args)
+        finally:
+            self._pending -= 1
+            self._slots.release()
+
+    async def shutdown(self) -> None:
+        """Stop the worker processes, cancelling jobs that have not started."""
+        if self._pool is None:
+            return
+        pool, self._pool = self._pool, None
+        self._slots = None
+        await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+        logger.info("Process pool shut down")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers if self._pool is not None else 0,
+            "pending": self._pending,
+            "waiting": self._waiting,
+            "max_pending": self.max_pending,
+        }
+
+
+# Create singleton instances
+thread_backend = ThreadBackend()
+process_pool_backend = ProcessPoolBackend(
+    max_workers=settings.PROCESS_POOL_WORKERS,
+    max_pending=settings.PROCESS_POOL_MAX_PENDING,
+)
+
+
+def get_execution_backend(cpu_bound: bool) -> ExecutionBackend:
+    """
+    Get the backend for an executor's blocking work.
+
+    Args:
+        cpu_bound: Whether the work is CPU-bound
+
+    Returns:
+        The process pool backend for CPU-bound work when it is enabled,
+        otherwise the thread backend
+    """
+    if cpu_bound and settings.PROCESS_POOL_ENABLED:
+        return process_pool_backend
+    return thread_backend
@@ -0,0 +1,154 @@
+"""
+Request batching for LLM calls that share a client configuration.
+
+Map-style workflows fan out many small LLM nodes against the same provider and
+model. The dispatcher collects concurrent requests for the same client key
+within a short window and sends them together through LangChain's ``abatch``,
+then routes each response (or exception) back to the node that made the
+request. A request that arrives alone is sent with ``ainvoke``.
+
+LangChain's default ``abatch`` merely gathers ``ainvoke`` calls, so batching
+only pays off for clients that override it with a real batch request; for
+everything else the window is pure latency. Batching is therefore disabled
+unless ``LLM_BATCH_WINDOW_SECONDS`` is set.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False)
+class _PendingRequest:
+    messages: List[Any]
+    future: asyncio.Future
+
+
+@dataclass(eq=False)
+class _PendingBatch:
+    llm: Any
+    requests: List[_PendingRequest] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class LLMBatchDispatcher:
+    """Coalesces concurrent requests per client key into ``abatch`` calls."""
+
+    def __init__(
+        self,
+        window_seconds: float = 0.0,
+        max_batch_size: int = 32,
+        max_concurrency: Optional[int] = None,
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            window_seconds: How long to collect requests before dispatching
+                (0 disables batching)
+            max_batch_size: Dispatch as soon as this many requests are pending
+            max_concurrency: Concurrency limit passed to ``abatch``
+        """
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self._batches: Dict[str, _PendingBatch] = {}
+        # Strong references to in-flight sends, which the loop only holds weakly
+        self._sending: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_requests = 0
+
+    async def invoke(self, key: str, llm: Any, messages: List[Any]) -> Any:
+        """
+        Send a request, batched with concurrent requests for the same key.
+
+        Args:
+            key: Client key; requests are only batched with the same key
+            llm: The pooled client for the key
+            messages: Formatted messages of the request
+
+        Returns:
+            The model response for this request
+        """
+        if self.window_seconds <= 0:
+            return await llm.ainvoke(messages)
+
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _PendingBatch(llm=llm)
+            batch.timer = loop.call_later(self.window_seconds, self._dispatch, key)
+
+        request = _PendingRequest(messages, loop.create_future())
+        batch.requests.append(request)
+        if len(batch.requests) >= self.max_batch_size:
+            self._dispatch(key)
+
+        try:
+            return await request.future
+        except asyncio.CancelledError:
+            # Drop the request if its batch has not been sent yet
+            if key in self._batches and request in self._batches[key].requests:
+                self._batches[key].requests.remove(request)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of dispatched batches and the requests they carried."""
+        return {
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "pending": sum(len(b.requests) for b in self._batches.values()),
+        }
+
+    def _dispatch(self, key: str) -> None:
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        if batch.requests:
+            task = asyncio.create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: _PendingBatch) -> None:
+        requests = batch.requests
+        try:
+            if len(requests) == 1:
+                results = [await batch.llm.ainvoke(requests[0].messages)]
+            else:
+                self.batches += 1
+                self.batched_requests += len(requests)
+                config = (
+                    {"max_concurrency": self.max_concurrency}
+                    if self.max_concurrency
+                    else None
+                )
+                results = await batch.llm.abatch(
+                    [request.messages for request in requests],
+                    config=config,
+                    return_exceptions=True,
+                )
+        except Exception as e:
+            results = [e] * len(requests)
+
+        for request, result in zip(requests, results):
+            if request.future.done():
+                continue
+            if isinstance(result, BaseException):
+                request.future.set_exception(result)
+            else:
+                request.future.set_result(result)
+
+
+# Create a singleton instance
+llm_batch_dispatcher = LLMBatchDispatcher(
+    window_seconds=settings.LLM_BATCH_WINDOW_SECONDS,
+    max_batch_size=settings.LLM_BATCH_MAX_SIZE,
+    max_concurrency=settings.LLM_BATCH_MAX_CONCURRENCY,
+)
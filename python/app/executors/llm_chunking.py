@@ -0,0 +1,77 @@
+"""
+Token counting and chunking of large LLM inputs.
+
+Tokens are counted with tiktoken when it is installed, using the model's
+encoding (``cl100k_base`` for models tiktoken does not know). Without
+tiktoken, or when its encoding files cannot be loaded, counts fall back to an
+estimate of four characters per token.
+"""
+
+import functools
+import logging
+from typing import Any, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=64)
+def _encoding(model: str) -> Optional[Any]:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Falling back to estimated token counts: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Count the tokens of ``text`` for ``model``."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_text(text: str, chunk_tokens: int, overlap: int, model: str) -> List[str]:
+    """
+    Split text into chunks of at most ``chunk_tokens`` tokens.
+
+    Consecutive chunks share ``overlap`` tokens, so content cut at a chunk
+    boundary appears whole in at least one chunk.
+
+    Raises:
+        ValueError: If the overlap is not smaller than the chunk size
+    """
+    if overlap >= chunk_tokens:
+        raise ValueError(
+            f"chunk_overlap ({overlap}) must be smaller than chunk_tokens "
+            f"({chunk_tokens})"
+        )
+    encoding = _encoding(model)
+    if encoding is None:
+        units: Any = text
+        size, step = chunk_tokens * CHARS_PER_TOKEN, overlap * CHARS_PER_TOKEN
+    else:
+        units = encoding.encode(text, disallowed_special=())
+        size, step = chunk_tokens, overlap
+
+    chunks = []
+    for start in range(0, max(len(units) - step, 1), size - step):
+        window = units[start : start + size]
+        chunks.append(window if encoding is None else encoding.decode(window))
+    return chunks
+
+
+def context_window(model: str) -> int:
+    """Context window of a model in tokens."""
+    return settings.LLM_CONTEXT_WINDOWS.get(model, settings.LLM_DEFAULT_CONTEXT_WINDOW)
@@ -0,0 +1,178 @@
+"""
+Process-wide pool of LangChain chat model clients.
+
+Executors are instantiated per node, so clients cached on an executor are
+never reused. The pool shares clients across nodes and workflows instead,
+keyed on everything that affects how a client behaves: provider, model,
+endpoint, a hash of the API key and the sampling parameters. OpenAI-compatible
+clients additionally share one keep-alive HTTP connection pool per provider
+and endpoint. The pool is an LRU bounded to ``max_entries`` clients; clients
+unused for longer than ``idle_ttl_seconds`` are evicted as well.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def client_key(
+    provider: str,
+    model: str,
+    api_key: Optional[str] = None,
+    endpoint: Optional[str] = None,
+    **params: Any,
+) -> str:
+    """
+    Build the pool key for a client configuration.
+
+    Args:
+        provider: LLM provider name
+        model: Model name
+        api_key: API key; only its hash is part of the key
+        endpoint: Custom endpoint, if any
+        **params: Sampling and other constructor parameters
+
+    Returns:
+        Stable key identifying the effective client configuration
+    """
+    api_key_hash = (
+        hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16] if api_key else None
+    )
+    return json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "endpoint": endpoint,
+            "api_key": api_key_hash,
+            "params": params,
+        },
+        sort_keys=True,
+        default=str,
+    )
+
+
+class LLMClientPool:
+    """Thread-safe LRU of shared chat model clients with idle eviction."""
+
+    def __init__(self, idle_ttl_seconds: float = 900, max_entries: int = 256):
+        """
+        Initialize the pool.
+
+        Args:
+            idle_ttl_seconds: Evict clients unused for this long (0 keeps them)
+            max_entries: Maximum number of pooled clients
+        """
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_entries = max_entries
+        self._clients: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._http_clients: Dict[Tuple[str, Optional[str]], httpx.AsyncClient] = {}
+        # Creation happens under the lock without awaiting, so the pool is
+        # safe both across threads and across tasks on the event loop.
+        # Reentrant because client factories request the shared HTTP client.
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, factory: Callable[[], Any]) -> Any:
+        """
+        Get the client for a key, creating it with ``factory`` if needed.
+
+        Args:
+            key: Client key from ``client_key``
+            factory: Creates the client on a miss
+
+        Returns:
+            The shared client
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.get(key)
+            if entry is not None:
+                self.hits += 1
+                client = entry[0]
+                self._clients.move_to_end(key)
+            else:
+                self.misses += 1
+                client = factory()
+            self._clients[key] = (client, now)
+            while len(self._clients) > self.max_entries:
+                self._clients.popitem(last=False)
+                self.evictions += 1
+            return client
+
+    def http_client(self, provider: str, endpoint: Optional[str]) -> httpx.AsyncClient:
+        """Get the shared keep-alive HTTP client for a provider endpoint."""
+        with self._lock:
+            client = self._http_clients.get((provider, endpoint))
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                    ),
+                    timeout=httpx.Timeout(settings.LLM_HTTP_TIMEOUT_SECONDS),
+                )
+                self._http_clients[(provider, endpoint)] = client
+            return client
+
+    def evict_idle(self) -> None:
+        """Evict clients that have been idle for longer than the TTL."""
+        with self._lock:
+            self._evict_idle(time.monotonic())
+
+    def clear(self) -> None:
+        """Drop all clients."""
+        with self._lock:
+            self._clients.clear()
+
+    async def aclose(self) -> None:
+        """Drop all clients and close the shared HTTP connection pools."""
+        with self._lock:
+            self._clients.clear()
+            http_clients = list(self._http_clients.values())
+            self._http_clients.clear()
+        for client in http_clients:
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool sizes and hit/miss/eviction counters."""
+        return {
+            "clients": len(self._clients),
+            "http_clients": len(self._http_clients),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._clients
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def _evict_idle(self, now: float) -> None:
+        if self.idle_ttl_seconds <= 0:
+            return
+        for key, (_, last_used) in list(self._clients.items()):
+            if now - last_used > self.idle_ttl_seconds:
+                del self._clients[key]
+                self.evictions += 1
+
+
+# Create a singleton instance
+llm_client_pool = LLMClientPool(
+    idle_ttl_seconds=settings.LLM_CLIENT_IDLE_TTL_SECONDS,
+    max_entries=settings.LLM_CLIENT_POOL_MAX_ENTRIES,
+)
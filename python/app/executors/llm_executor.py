@@ -1,7 +1,7 @@
 import asyncio
 import logging
 import os
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List, Set, Tuple
 from enum import Enum
 
 from langchain_openai import ChatOpenAI
@@ -11,11 +11,51 @@ from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from langchain_core.output_parsers import StrOutputParser
 
 from app.executors.base_executor import BaseExecutor
+from app.executors.llm_batching import llm_batch_dispatcher
+from app.executors.llm_client_pool import LLMClientPool, client_key, llm_client_pool
+from app.executors.llm_rate_limiter import llm_rate_limiter
+from app.executors.llm_response_cache import (
+    IDENTITY_KEYS,
+    cache_keys,
+    client_identity,
+    llm_response_cache,
+    semantic_prompt,
+)
+from app.executors.llm_usage import TokenUsage, calculate_cost, usage_from_response
+from app.executors.prompt_templates import compile_template
+from app.executors.llm_chunking import context_window, count_tokens, split_text
 from app.core.config import settings
+from app.services.node_streams import NodeOutputStream, node_streams
+from app.services.websocket_manager import websocket_manager
 
 logger = logging.getLogger(__name__)
 
 
+# Node config keys that are not passed to the client constructor
+NON_CLIENT_CONFIG_KEYS = {
+    "provider",
+    "model",
+    "temperature",
+    "max_tokens",
+    "api_key",
+    "messages",
+    "stream",
+    "prompt_cache",
+    "mode",
+    "map_reduce",
+    "cache",
+    "stream_input",
+}
+
+DEFAULT_COMBINE_PROMPT = (
+    "The following are partial results for consecutive parts of a document. "
+    "Combine them into a single answer.\n\n{{ summaries }}"
+)
+SEPARATOR = "\n\n---\n\n"
+# Joins consecutive items of a streamed map-reduce input
+STREAM_ITEM_SEPARATOR = "\n\n"
+
+
 class LLMProvider(Enum):
     """Supported LLM providers"""
 
@@ -26,22 +66,136 @@ class LLMProvider(Enum):
     AZURE_OPENAI = "azure_openai"
 
 
+class DeltaCoalescer:
+    """
+    Coalesces streamed tokens into ``node-output-delta`` frames.
+
+    Tokens are buffered and flushed every ``interval`` seconds, so clients get
+    a steady stream of small frames instead of one message per token.
+    """
+
+    def __init__(self, workflow_id: str, node_id: str, interval: float):
+        self.workflow_id = workflow_id
+        self.node_id = node_id
+        self.interval = interval
+        self._buffer: List[str] = []
+        self._index = 0
+        self._flusher: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._flusher = asyncio.create_task(self._run_flusher())
+
+    def add(self, text: str) -> None:
+        self._buffer.append(text)
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and send whatever is still buffered."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        delta = "".join(self._buffer)
+        self._buffer = []
+        await websocket_manager.send_message_to_workflow(
+            self.workflow_id,
+            {
+                "event": "node-output-delta",
+                "data": {"node_id": self.node_id, "delta": delta, "index": self._index},
+            },
+        )
+        self._index += 1
+
+    async def _run_flusher(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+
 class LLMExecutor(BaseExecutor):
     """
     LLM Executor that supports multiple LLM providers using langchain.
     """
 
-    def __init__(self):
-        self.llm_instances: Dict[str, Any] = {}
+    @staticmethod
+    def consumes_stream(config: Dict) -> bool:
+        """
+        Whether a node consumes streamed upstream output as it is produced.
+
+        Map-reduce nodes that set ``stream_input`` map the items of a
+        streaming input node (e.g. OCR pages) while the node still runs.
+        """
+        return bool(config.get("stream_input")) and config.get("mode") == "map_reduce"
+
+    @staticmethod
+    def referenced_nodes(config: Dict) -> Set[str]:
+        """
+        Ids referenced by the node's message templates.
+
+        Ids that name nodes of the workflow must be predecessors of the node;
+        the others are rendered as literal text.
+        """
+
+        def references(templates: List[Any], local: str = "") -> Set[str]:
+            return {
+                node_id
+                for template in templates
+                if isinstance(template, str)
+                for node_id in compile_template(template).references
+                if node_id != local
+            }
+
+        messages = [m.get("content") for m in config.get("messages") or []]
+        if config.get("mode") != "map_reduce":
+            return references(messages)
+        options = config.get("map_reduce") or {}
+        combine_messages = [
+            m.get("content") for m in options.get("combine_messages") or []
+        ]
+        return (
+            references(messages, "chunk")
+            | references(combine_messages, "summaries")
+            | references([options.get("input")])
+        )
+
+    def __init__(self, client_pool: Optional[LLMClientPool] = None):
+        # Clients are shared through the process-wide pool, since executors
+        # are instantiated per node
+        self.client_pool = client_pool if client_pool is not None else llm_client_pool
         self.output_parser = StrOutputParser()
 
+    def _client_key(self, provider: str, model: str, **kwargs) -> str:
+        """Key of the effective client configuration."""
+        return client_key(
+            provider,
+            model,
+            api_key=kwargs.get("api_key"),
+            endpoint=kwargs.get("azure_endpoint"),
+            temperature=kwargs.get("temperature", 0.7),
+            max_tokens=kwargs.get("max_tokens"),
+            api_version=kwargs.get("api_version"),
+        )
+
     def _get_llm_instance(self, provider: str, model: str, **kwargs) -> Any:
-        """Get or create an LLM instance based on provider and model."""
-        cache_key = f"{provider}:{model}"
+        """Get a pooled LLM instance for the effective client configuration."""
+        cache_key = self._client_key(provider, model, **kwargs)
+        return self.client_pool.get(
+            cache_key, lambda: self._create_llm_instance(provider, model, **kwargs)
+        )
 
-        if cache_key in self.llm_instances:
-            return self.llm_instances[cache_key]
+    def _create_llm_instance(self, provider: str, model: str, **kwargs) -> Any:
+        """Create an LLM instance based on provider and model.
 
+        Client-side retries are disabled; ``llm_rate_limiter`` retries with
+        backoff across all workflows instead.
+        """
         try:
             if provider == LLMProvider.OPENAI.value:
                 llm = ChatOpenAI(
@@ -49,6 +203,10 @@ class LLMExecutor(BaseExecutor):
                     temperature=kwargs.get("temperature", 0.7),
                     max_tokens=kwargs.get("max_tokens", 10000),
                     api_key=kwargs.get("api_key"),
+                    http_async_client=self.client_pool.http_client(provider, None),
+                    max_retries=0,
+                    include_response_headers=True,
+                    stream_usage=True,
                 )
             elif provider == LLMProvider.ANTHROPIC.value:
                 llm = ChatAnthropic(
@@ -56,6 +214,7 @@ class LLMExecutor(BaseExecutor):
                     temperature=kwargs.get("temperature", 0.7),
                     max_tokens=kwargs.get("max_tokens", 1000),
                     api_key=kwargs.get("api_key"),
+                    max_retries=0,
                 )
             elif provider == LLMProvider.GOOGLE.value:
                 llm = ChatGoogleGenerativeAI(
@@ -63,6 +222,7 @@ class LLMExecutor(BaseExecutor):
                     temperature=kwargs.get("temperature", 0.7),
                     max_output_tokens=kwargs.get("max_tokens", 1000),
                     google_api_key=kwargs.get("api_key"),
+                    max_retries=0,
                 )
             elif provider == LLMProvider.AZURE_OPENAI.value:
                 llm = ChatOpenAI(
@@ -72,12 +232,16 @@ class LLMExecutor(BaseExecutor):
                     azure_endpoint=kwargs.get("azure_endpoint"),
                     api_key=kwargs.get("api_key"),
                     api_version=kwargs.get("api_version", "2024-02-15-preview"),
+                    http_async_client=self.client_pool.http_client(
+                        provider, kwargs.get("azure_endpoint")
+                    ),
+                    max_retries=0,
+                    include_response_headers=True,
+                    stream_usage=True,
                 )
             else:
                 raise ValueError(f"Unsupported LLM provider: {provider}")
 
-            # Cache the instance
-            self.llm_instances[cache_key] = llm
             return llm
 
         except Exception as e:
@@ -106,7 +270,12 @@ class LLMExecutor(BaseExecutor):
 
         return formatted_messages
 
-    async def execute(self, node: Dict) -> Dict:
+    async def execute(
+        self,
+        node: Dict,
+        previous_results: Optional[Dict] = None,
+        workflow_id: Optional[str] = None,
+    ) -> Dict:
         """
         Execute LLM node with the specified configuration.
 
@@ -122,8 +291,12 @@ class LLMExecutor(BaseExecutor):
                     "max_tokens": 1000,
                     "messages": [
                         {"role": "system", "content": "You are a helpful assistant"},
-                        {"role": "user", "content": "Hello!"}
+                        {"role": "user", "content": "Summarize: {{ ocr_1.text }}"}
                     ],
+                    "stream": false,  # stream tokens as node-output-delta events
+                    "prompt_cache": false,  # reuse cached responses
+                    "mode": "single",  # or "map_reduce", see _map_reduce
+                    "map_reduce": {...},
                 }
             }
         }
@@ -138,6 +311,9 @@ class LLMExecutor(BaseExecutor):
         max_tokens = config.get("max_tokens", 1000)
         api_key = config.get("api_key") or settings.OPENAI_API_KEY
         messages = config.get("messages", [])
+        stream = config.get("stream", settings.LLM_STREAM_DEFAULT)
+        use_cache = config.get("prompt_cache", settings.LLM_RESPONSE_CACHE_DEFAULT)
+        mode = config.get("mode", "single")
 
         logger.info(
             f"Executing LLM node {node_id} with provider {provider} and model {model}"
@@ -146,24 +322,17 @@ class LLMExecutor(BaseExecutor):
         # Validate configuration first
         if not messages:
             raise ValueError("'messages' must be provided")
+        if mode not in ("single", "map_reduce"):
+            raise ValueError(f"Unsupported LLM node mode: {mode}")
 
         # Get LLM instance
-        # Filter out keys that are already passed explicitly to avoid conflicts
+        # Filter out keys that are already passed explicitly or that are
+        # node options rather than client parameters
         additional_config = {
-            k: v
-            for k, v in config.items()
-            if k
-            not in [
-                "provider",
-                "model",
-                "temperature",
-                "max_tokens",
-                "api_key",
-                "messages",
-            ]
+            k: v for k, v in config.items() if k not in NON_CLIENT_CONFIG_KEYS
         }
 
-        llm = self._get_llm_instance(
+        client_config = dict(
             provider=provider,
             model=model,
             temperature=temperature,
@@ -171,22 +340,41 @@ class LLMExecutor(BaseExecutor):
             api_key=api_key,
             **additional_config,  # Pass any additional config
         )
+        llm = self._get_llm_instance(**client_config)
 
         # Create and execute chain
         start_time = asyncio.get_event_loop().time()
 
-        # Use messages format
-        formatted_messages = self._format_messages(messages)
-        response = await llm.ainvoke(formatted_messages)
+        extra_metadata = {}
+        if mode == "map_reduce":
+            response_text, usage, cache_match, extra_metadata["map_reduce"] = (
+                await self._map_reduce(
+                    llm,
+                    client_config,
+                    messages,
+                    config.get("map_reduce") or {},
+                    use_cache,
+                    previous_results or {},
+                    workflow_id,
+                    node_id,
+                    stream_input=self.consumes_stream(config),
+                )
+            )
+        else:
+            # Fill in references to upstream outputs
+            messages = await self._render_messages(
+                messages, previous_results or {}, workflow_id
+            )
+            response_text, usage, cache_match = await self._generate(
+                llm,
+                client_config,
+                messages,
+                use_cache,
+                stream_to=(workflow_id, node_id) if stream and workflow_id else None,
+            )
 
         execution_time = asyncio.get_event_loop().time() - start_time
 
-        # Format response
-        if hasattr(response, "content"):
-            response_text = response.content
-        else:
-            response_text = str(response)
-
         result = {
             "node_id": node_id,
             "type": "llm",
@@ -201,18 +389,476 @@ class LLMExecutor(BaseExecutor):
                     "temperature": temperature,
                     "max_tokens": max_tokens,
                     "execution_time": execution_time,
+                    "cache_hit": cache_match is not None,
+                    "usage": usage.to_dict() if usage else None,
+                    "cost": calculate_cost(usage, model) if usage else None,
+                    **extra_metadata,
                 },
             },
         }
+        if cache_match is not None:
+            result["output"]["metadata"]["cache_match"] = cache_match
 
         logger.info(
             f"LLM node {node_id} completed successfully in {execution_time:.2f}s"
         )
         return result
 
+    async def _generate(
+        self,
+        llm: Any,
+        client_config: Dict[str, Any],
+        messages: List[Dict[str, str]],
+        use_cache: bool,
+        stream_to: Optional[Tuple[str, str]] = None,
+    ) -> Tuple[str, Optional[TokenUsage], Optional[str]]:
+        """
+        Get the completion of rendered messages, from the response cache or
+        from the provider under its rate limits.
+
+        Args:
+            llm: Pooled client
+            client_config: Effective client configuration
+            messages: Rendered messages
+            use_cache: Whether to use the response cache
+            stream_to: (workflow_id, node_id) to stream tokens to, if streaming
+
+        Returns:
+            The response text, its token usage and the kind of cache match
+            ("exact" or "semantic", None on a miss)
+        """
+        provider = client_config["provider"]
+        model = client_config["model"]
+        if use_cache:
+            params = {
+                k: v
+                for k, v in client_config.items()
+                if k not in ("provider", "model", *IDENTITY_KEYS)
+            }
+            cache_key, cache_scope = cache_keys(
+                provider, model, params, messages, client_identity(client_config)
+            )
+            response_text, embedding, semantic = await llm_response_cache.get(
+                cache_key, cache_scope, semantic_prompt(client_config, messages)
+            )
+            if response_text is not None:
+                # Cache hits make no call and cost nothing
+                return response_text, TokenUsage(), "semantic" if semantic else "exact"
+
+        formatted_messages = self._format_messages(messages)
+        estimated_tokens = self._estimate_tokens(messages)
+        if stream_to is not None:
+            response_text, usage = await self._stream_response(
+                llm, formatted_messages, *stream_to, provider, estimated_tokens
+            )
+        else:
+            # Concurrent requests for the same client are sent as one batch
+            key = self._client_key(**client_config)
+            response = await llm_rate_limiter.run(
+                provider,
+                estimated_tokens,
+                lambda: llm_batch_dispatcher.invoke(key, llm, formatted_messages),
+            )
+
+            # Format response
+            if hasattr(response, "content"):
+                response_text = response.content
+            else:
+                response_text = str(response)
+            usage = usage_from_response(response)
+        if usage is not None:
+            usage.calls = 1
+            llm_rate_limiter.settle(provider, estimated_tokens, usage.total_tokens)
+
+        if use_cache:
+            await llm_response_cache.set(
+                cache_key, cache_scope, response_text, embedding
+            )
+        return response_text, usage, None
+
+    async def _map_reduce(
+        self,
+        llm: Any,
+        client_config: Dict[str, Any],
+        messages: List[Dict[str, str]],
+        options: Dict[str, Any],
+        use_cache: bool,
+        previous_results: Dict[str, Dict],
+        workflow_id: Optional[str],
+        node_id: str,
+        stream_input: bool = False,
+    ) -> Tuple[str, Optional[TokenUsage], Optional[str], Dict[str, Any]]:
+        """
+        Run the node's messages over chunks of a large input and combine the
+        partial responses.
+
+        Options (``data.config.map_reduce``):
+            input: Template of the large input, e.g. "{{ ocr_1.text }}"
+            combine_messages: Messages of the reduce step; ``{{ summaries }}``
+                is replaced with the joined partial responses
+            chunk_tokens: Maximum tokens per chunk
+            chunk_overlap: Tokens shared by consecutive chunks
+
+        ``messages`` are rendered once per chunk, with ``{{ chunk }}`` replaced
+        by the chunk. Chunks are capped by the room the model's context window
+        leaves next to the prompt and ``max_tokens``; an input that fits into
+        one chunk is sent without a reduce step. Chunks run concurrently
+        under the provider rate limits, and each finished chunk is reported as
+        a ``node-output-partial`` event. Partial responses that do not fit into
+        one combine call are reduced in several rounds.
+
+        With ``stream_input``, an input referencing a single node that is still
+        running and streams its output is rendered once per streamed item (the
+        template is applied to the item as if it were the node's output) and
+        chunks are mapped as soon as enough items arrived to fill them. Until
+        the input is complete, ``total_chunks`` counts the chunks seen so far.
+
+        Returns:
+            The response text, the summed token usage, "exact" if every call
+            was served from the response cache, and map-reduce statistics
+        """
+        model = client_config["model"]
+        max_tokens = client_config.get("max_tokens") or 0
+        input_template = options.get("input")
+        if not input_template:
+            raise ValueError("'map_reduce.input' must be provided")
+        combine_messages = options.get("combine_messages") or [
+            *(m for m in messages if m.get("role") == "system"),
+            {"role": "user", "content": DEFAULT_COMBINE_PROMPT},
+        ]
+
+        input_stream, streamed_node = None, None
+        if stream_input and workflow_id:
+            input_stream, streamed_node = self._input_stream(
+                input_template,
+                [*messages, *combine_messages],
+                previous_results,
+                workflow_id,
+            )
+        # A streamed input is rendered item by item as the items arrive
+        results = await self._referenced_results(
+            [
+                *([] if streamed_node else [input_template]),
+                *(m.get("content") for m in messages),
+            ],
+            previous_results,
+            workflow_id,
+        )
+
+        def render(templates: List[Dict[str, str]], name: str, value: str):
+            local = {**results, name: {"output": value}}
+            return [
+                {
+                    **m,
+                    "content": compile_template(m.get("content", "")).render(
+                        local, keep_unknown=True
+                    ),
+                }
+                for m in templates
+            ]
+
+        # Tokens left for the input once the prompt and completion are counted
+        def budget(templates: List[Dict[str, str]], name: str) -> int:
+            prompt = "".join(m["content"] for m in render(templates, name, ""))
+            return context_window(model) - max_tokens - count_tokens(prompt, model)
+
+        map_budget = budget(messages, "chunk")
+        if map_budget <= 0:
+            raise ValueError(
+                f"Messages and max_tokens exceed the context window of {model}"
+            )
+        chunk_tokens = (
+            options.get("chunk_tokens") or settings.LLM_MAP_REDUCE_CHUNK_TOKENS
+        )
+        chunk_overlap = options.get("chunk_overlap")
+        if chunk_overlap is None:
+            chunk_overlap = settings.LLM_MAP_REDUCE_CHUNK_OVERLAP
+        if not isinstance(chunk_tokens, int) or chunk_tokens <= 0:
+            raise ValueError("'map_reduce.chunk_tokens' must be a positive integer")
+        if not isinstance(chunk_overlap, int) or chunk_overlap < 0:
+            raise ValueError(
+                "'map_reduce.chunk_overlap' must be a non-negative integer"
+            )
+        if options.get("chunk_overlap") is not None and chunk_overlap >= chunk_tokens:
+            raise ValueError(
+                "'map_reduce.chunk_overlap' must be smaller than "
+                "'map_reduce.chunk_tokens'"
+            )
+        # Chunks shrink to what the context window leaves for the input
+        chunk_tokens = min(chunk_tokens, map_budget)
+        if chunk_overlap >= chunk_tokens:
+            chunk_overlap = chunk_tokens // 2
+        combine_budget = budget(combine_messages, "summaries")
+        if combine_budget <= 0:
+            raise ValueError(
+                f"Combine messages and max_tokens exceed the context window of "
+                f"{model}"
+            )
+
+        async def input_texts() -> AsyncIterator[str]:
+            template = compile_template(input_template)
+            if input_stream is not None:
+                streamed = False
+                async for item in input_stream:
+                    streamed = True
+                    yield template.render(
+                        {**results, streamed_node: {"output": item}}, keep_unknown=True
+                    )
+                if streamed:
+                    return
+                # Served from a cache or shared: only the final result exists
+                results[streamed_node] = await input_stream.result()
+            yield template.render(results, keep_unknown=True)
+
+        async def input_chunks() -> AsyncIterator[str]:
+            text = None
+            async for piece in input_texts():
+                text = piece if text is None else text + STREAM_ITEM_SEPARATOR + piece
+                if count_tokens(text, model) > chunk_tokens:
+                    # Keep the last, possibly partial chunk for the next items
+                    *full, text = split_text(text, chunk_tokens, chunk_overlap, model)
+                    for chunk in full:
+                        yield chunk
+            yield text or ""
+
+        semaphore = asyncio.Semaphore(settings.LLM_MAP_REDUCE_MAX_CONCURRENCY)
+        outcomes = []
+
+        async def call(call_messages: List[Dict[str, str]]) -> str:
+            async with semaphore:
+                outcome = await self._generate(
+                    llm, client_config, call_messages, use_cache
+                )
+            outcomes.append(outcome)
+            return outcome[0]
+
+        completed = 0
+        mapped: List[asyncio.Task] = []
+
+        async def map_chunk(index: int, chunk: str) -> str:
+            nonlocal completed
+            response = await call(render(messages, "chunk", chunk))
+            completed += 1
+            if workflow_id:
+                await websocket_manager.send_message_to_workflow(
+                    workflow_id,
+                    {
+                        "event": "node-output-partial",
+                        "data": {
+                            "node_id": node_id,
+                            "output": {"chunk": index, "response": response},
+                            "chunks_completed": completed,
+                            "total_chunks": len(mapped),
+                            "progress": completed / len(mapped),
+                        },
+                    },
+                )
+            return response
+
+        try:
+            async for chunk in input_chunks():
+                mapped.append(asyncio.create_task(map_chunk(len(mapped), chunk)))
+            partials = await asyncio.gather(*mapped)
+        except BaseException:
+            for task in mapped:
+                task.cancel()
+            raise
+
+        reduce_calls = 0
+        while len(partials) > 1:
+            groups = self._group_partials(partials, combine_budget, model)
+            reduce_calls += len(groups)
+            partials = await asyncio.gather(
+                *(
+                    call(render(combine_messages, "summaries", SEPARATOR.join(g)))
+                    for g in groups
+                )
+            )
+
+        usages = [usage for _, usage, _ in outcomes if usage is not None]
+        usage = sum(usages[1:], usages[0]) if usages else None
+        all_cached = all(match is not None for _, _, match in outcomes)
+        return (
+            partials[0],
+            usage,
+            "exact" if all_cached else None,
+            {"chunks": len(mapped), "reduce_calls": reduce_calls},
+        )
+
+    @staticmethod
+    def _input_stream(
+        input_template: str,
+        messages: List[Dict[str, str]],
+        previous_results: Dict[str, Dict],
+        workflow_id: str,
+    ) -> Tuple[Optional[NodeOutputStream], Optional[str]]:
+        """
+        Find the output stream a map-reduce input can be consumed from.
+
+        Returns:
+            The stream and the id of its node if the input references exactly
+            one node, which has not finished yet, streams its output and is
+            not referenced by the messages; otherwise (None, None)
+        """
+        references = compile_template(input_template).references
+        if len(references) != 1:
+            return None, None
+        (node_id,) = references
+        stream = node_streams.get(workflow_id, node_id)
+        if stream is None or node_id in previous_results:
+            return None, None
+        if any(
+            node_id in compile_template(m.get("content", "")).references
+            for m in messages
+            if isinstance(m.get("content"), str)
+        ):
+            return None, None
+        return stream, node_id
+
+    @staticmethod
+    def _group_partials(
+        partials: List[str], budget: int, model: str
+    ) -> List[List[str]]:
+        """
+        Pack partial responses into groups that fit one combine call.
+
+        Partials longer than half the budget are truncated, so any two fit
+        together and every reduce round at least halves their number.
+
+        Raises:
+            ValueError: If the budget cannot fit two partials
+        """
+        limit = budget // 2 - count_tokens(SEPARATOR, model)
+        if limit <= 0:
+            raise ValueError(
+                f"Combine messages and max_tokens leave no room to combine "
+                f"responses within the context window of {model}"
+            )
+        groups: List[List[str]] = []
+        size = 0
+        for partial in partials:
+            if count_tokens(partial, model) > limit:
+                partial = split_text(partial, limit, 0, model)[0]
+            tokens = count_tokens(partial + SEPARATOR, model)
+            if not groups or size + tokens > budget:
+                groups.append([])
+                size = 0
+            groups[-1].append(partial)
+            size += tokens
+        return groups
+
+    async def _render_messages(
+        self,
+        messages: List[Dict[str, str]],
+        previous_results: Dict[str, Dict],
+        workflow_id: Optional[str],
+    ) -> List[Dict[str, str]]:
+        """Render message templates against the results of upstream nodes."""
+        contents = [message.get("content", "") for message in messages]
+        if not any(isinstance(c, str) and "{{" in c for c in contents):
+            return messages
+        results = await self._referenced_results(
+            contents, previous_results, workflow_id
+        )
+        return [
+            (
+                {
+                    **message,
+                    "content": compile_template(content).render(
+                        results, keep_unknown=True
+                    ),
+                }
+                if isinstance(content, str)
+                else message
+            )
+            for message, content in zip(messages, contents)
+        ]
+
+    async def _referenced_results(
+        self,
+        templates: List[Any],
+        previous_results: Dict[str, Dict],
+        workflow_id: Optional[str],
+    ) -> Dict[str, Dict]:
+        """
+        Collect the results of the nodes referenced by templates.
+
+        A referenced node that has not finished yet but streams its output
+        (when this node consumes streams) is waited for.
+        """
+        references = set().union(
+            *(compile_template(t).references for t in templates if isinstance(t, str))
+        )
+        results = {}
+        for node_id in references:
+            result = previous_results.get(node_id)
+            stream = node_streams.get(workflow_id, node_id) if workflow_id else None
+            if result is None and stream is not None:
+                result = await stream.result()
+            if result is not None:
+                results[node_id] = result
+        return results
+
+    @staticmethod
+    def _estimate_tokens(messages: List[Dict[str, str]]) -> int:
+        """
+        Rough prompt token estimate of a request for the tokens-per-minute
+        limit; the completion is charged once its usage is known.
+        """
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in messages)
+        return prompt_chars // 4
+
+    async def _stream_response(
+        self,
+        llm: Any,
+        messages: List[Any],
+        workflow_id: str,
+        node_id: str,
+        provider: str,
+        estimated_tokens: int,
+    ) -> Tuple[str, Optional[TokenUsage]]:
+        """
+        Stream the completion, pushing coalesced deltas to the workflow's clients.
+
+        A failed stream is only retried if it has not produced any output yet.
+
+        Returns:
+            The full response text and the token usage reported in the stream
+        """
+        coalescer = DeltaCoalescer(
+            workflow_id, node_id, settings.LLM_STREAM_FLUSH_INTERVAL
+        )
+        parts = []
+        usage = None
+
+        async def consume() -> str:
+            nonlocal usage
+            usage = None
+            async for chunk in llm.astream(messages):
+                # Usage is reported in the final chunk(s) of the stream
+                llm_rate_limiter.observe(provider, chunk)
+                chunk_usage = usage_from_response(chunk)
+                if chunk_usage is not None:
+                    usage = usage + chunk_usage if usage else chunk_usage
+                text = chunk.content if hasattr(chunk, "content") else str(chunk)
+                if not isinstance(text, str) or not text:
+                    continue
+                parts.append(text)
+                coalescer.add(text)
+            return "".join(parts)
+
+        coalescer.start()
+        try:
+            response_text = await llm_rate_limiter.run(
+                provider, estimated_tokens, consume, can_retry=lambda: not parts
+            )
+        finally:
+            await coalescer.stop()
+        return response_text, usage
+
     def clear_cache(self):
         """Clear the LLM instance cache."""
-        self.llm_instances.clear()
+        self.client_pool.clear()
         logger.info("LLM instance cache cleared")
 
     def get_supported_providers(self) -> List[str]:
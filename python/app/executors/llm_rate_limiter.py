@@ -0,0 +1,383 @@
+"""
+Adaptive rate limiting and retries for LLM provider calls.
+
+Each provider has a pair of token buckets, for requests per minute and tokens
+per minute, shared by every workflow in the process. The buckets only exist
+once a limit is known: configured in ``LLM_RATE_LIMITS`` or reported by the
+provider's rate-limit response headers, which also adapt them to the quota
+actually left. A call reserves one request and its estimated prompt tokens
+before it is sent and is charged its actual usage once it completes.
+Throttling responses pause the provider until the advertised reset time.
+Retryable failures (429, 5xx, timeouts and connection errors) are retried
+with jittered exponential backoff, as long as the process-wide retry budget
+allows it, so a provider outage does not turn into a retry storm.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "InternalServerError",
+    "ServiceUnavailable",
+    "ResourceExhausted",
+}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a rate-limit reset header into seconds from now.
+
+    Supports plain seconds (``retry-after``), durations such as ``6m0s`` or
+    ``20ms`` (OpenAI) and RFC 3339 timestamps (Anthropic).
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if reset_at.tzinfo is None:
+        reset_at = reset_at.replace(tzinfo=timezone.utc)
+    return max((reset_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _int_header(headers: Mapping[str, str], *names: str) -> Optional[int]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return int(float(value))
+            except ValueError:
+                continue
+    return None
+
+
+def classify_error(error: BaseException) -> Tuple[bool, Optional[float]]:
+    """
+    Decide whether a failed call should be retried.
+
+    Returns:
+        Whether the error is retryable, and the delay the provider asked for
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(
+        response, "status_code", None
+    )
+    if status is None and isinstance(getattr(error, "code", None), int):
+        status = error.code
+
+    headers = getattr(response, "headers", None) or {}
+    retry_after = parse_reset(headers.get("retry-after")) if headers else None
+
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUS_CODES or status >= 500, retry_after
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return True, None
+    if isinstance(error, asyncio.TimeoutError):
+        return True, None
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES, retry_after
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``capacity`` per minute."""
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take ``amount`` tokens, going into debt if necessary.
+
+        Returns:
+            Seconds to wait before the reservation is covered
+        """
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / (self.capacity / 60)
+
+    def set_capacity(self, capacity: float) -> None:
+        self._refill()
+        self.capacity = capacity
+        self.tokens = min(self.tokens, capacity)
+
+    def set_remaining(self, remaining: float) -> None:
+        self._refill()
+        self.tokens = min(self.tokens, remaining)
+
+    def adjust(self, amount: float) -> None:
+        """Take ``amount`` more tokens, or return them if it is negative."""
+        self._refill()
+        self.tokens = min(self.tokens - amount, self.capacity)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self._updated) * self.capacity / 60,
+        )
+        self._updated = now
+
+
+class ProviderRateLimiter:
+    """Requests-per-minute and tokens-per-minute limits of one provider."""
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        """
+        Initialize the limiter.
+
+        Args:
+            rpm: Requests per minute (0 disables the limit)
+            tpm: Tokens per minute (0 disables the limit)
+        """
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._paused_until = 0.0
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        """Wait until a request with ``estimated_tokens`` fits the limits."""
+        wait = max(self._paused_until - time.monotonic(), 0.0)
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all calls to the provider for ``seconds``."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct a call's token reservation by the tokens it actually used."""
+        if self.tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Adapt to the limits and remaining quota reported by the provider.
+
+        Understands the OpenAI ``x-ratelimit-*`` and Anthropic
+        ``anthropic-ratelimit-*`` headers.
+        """
+        headers = {key.lower(): value for key, value in headers.items()}
+        for kind, bucket_name in (("requests", "requests"), ("tokens", "tokens")):
+            limit = _int_header(
+                headers,
+                f"x-ratelimit-limit-{kind}",
+                f"anthropic-ratelimit-{kind}-limit",
+            )
+            remaining = _int_header(
+                headers,
+                f"x-ratelimit-remaining-{kind}",
+                f"anthropic-ratelimit-{kind}-remaining",
+            )
+            reset = parse_reset(
+                headers.get(f"x-ratelimit-reset-{kind}")
+                or headers.get(f"anthropic-ratelimit-{kind}-reset")
+            )
+
+            bucket = getattr(self, bucket_name)
+            if limit:
+                if bucket is None:
+                    bucket = TokenBucket(limit)
+                    setattr(self, bucket_name, bucket)
+                else:
+                    bucket.set_capacity(limit)
+            if bucket is not None and remaining is not None:
+                bucket.set_remaining(remaining)
+            if remaining == 0 and reset:
+                self.pause(reset)
+
+
+class RetryBudget:
+    """
+    Bounds retries to a fraction of recent traffic.
+
+    Every call deposits ``ratio`` of a retry and every retry withdraws one.
+    The balance starts at ``min_balance`` and is capped at ``max_balance``.
+    """
+
+    def __init__(
+        self, ratio: float = 0.2, min_balance: float = 10, max_balance: float = 100
+    ):
+        self.ratio = ratio
+        self.max_balance = max_balance
+        self.balance = float(min_balance)
+
+    def deposit(self) -> None:
+        self.balance = min(self.balance + self.ratio, self.max_balance)
+
+    def withdraw(self) -> bool:
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+class LLMRateLimiter:
+    """Process-wide provider rate limits, retries and retry budget."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, int]]] = None,
+        max_attempts: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        retry_budget: Optional[RetryBudget] = None,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            limits: Per-provider ``{"rpm": ..., "tpm": ...}`` limits
+            max_attempts: Maximum attempts per call, including the first
+            base_delay: Base of the exponential backoff in seconds
+            max_delay: Upper bound of a single backoff in seconds
+            retry_budget: Shared retry budget
+        """
+        self.limits = limits or {}
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_budget = retry_budget or RetryBudget()
+        self._providers: Dict[str, ProviderRateLimiter] = {}
+        self.retries = 0
+        self.throttled = 0
+
+    def provider(self, name: str) -> ProviderRateLimiter:
+        """Get the limiter of a provider."""
+        limiter = self._providers.get(name)
+        if limiter is None:
+            limits = self.limits.get(name, {})
+            limiter = self._providers[name] = ProviderRateLimiter(
+                rpm=limits.get("rpm", 0), tpm=limits.get("tpm", 0)
+            )
+        return limiter
+
+    async def run(
+        self,
+        provider: str,
+        estimated_tokens: int,
+        call: Callable[[], Awaitable[Any]],
+        can_retry: Optional[Callable[[], bool]] = None,
+    ) -> Any:
+        """
+        Run a provider call under the provider's limits, retrying on failure.
+
+        Args:
+            provider: LLM provider name
+            estimated_tokens: Estimated prompt tokens, reserved by each
+                attempt and returned if it fails; ``settle`` corrects the
+                reservation of the successful attempt once the usage is known
+            call: Makes the call; invoked once per attempt
+            can_retry: Optional check whether a failed attempt may be retried
+                (e.g. not after a stream already emitted output)
+
+        Returns:
+            The call's result
+        """
+        limiter = self.provider(provider)
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            await limiter.acquire(estimated_tokens)
+            try:
+                result = await call()
+            except Exception as e:
+                # Failed attempts are not charged; the next one reserves again
+                limiter.settle(estimated_tokens, 0)
+                retryable, retry_after = classify_error(e)
+                if retry_after is not None:
+                    self.throttled += 1
+                    limiter.pause(retry_after)
+                attempt += 1
+                if (
+                    not retryable
+                    or attempt >= self.max_attempts
+                    or (can_retry is not None and not can_retry())
+                    or not self.retry_budget.withdraw()
+                ):
+                    raise
+                delay = max(retry_after or 0.0, self._backoff(attempt))
+                self.retries += 1
+                logger.warning(
+                    f"{provider} call failed ({type(e).__name__}), retrying in "
+                    f"{delay:.2f}s (attempt {attempt + 1}/{self.max_attempts})"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self.observe(provider, result)
+            return result
+
+    def observe(self, provider: str, response: Any) -> None:
+        """
+        Adapt a provider's limits to the rate-limit headers of a response.
+
+        Accepts complete responses as well as stream chunks; responses without
+        headers are ignored.
+        """
+        metadata = getattr(response, "response_metadata", None)
+        headers = metadata.get("headers") if isinstance(metadata, Mapping) else None
+        if isinstance(headers, Mapping) and headers:
+            self.provider(provider).update_from_headers(headers)
+
+    def settle(self, provider: str, estimated_tokens: int, actual_tokens: int) -> None:
+        """Charge a completed call its actual token usage instead of the estimate."""
+        self.provider(provider).settle(estimated_tokens, actual_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get retry counters and the remaining retry budget."""
+        return {
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "retry_budget": round(self.retry_budget.balance, 2),
+        }
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spread retries of concurrent callers evenly
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+# Create a singleton instance
+llm_rate_limiter = LLMRateLimiter(
+    limits=settings.LLM_RATE_LIMITS,
+    max_attempts=settings.LLM_RETRY_MAX_ATTEMPTS,
+    base_delay=settings.LLM_RETRY_BASE_DELAY,
+    max_delay=settings.LLM_RETRY_MAX_DELAY,
+    retry_budget=RetryBudget(
+        ratio=settings.LLM_RETRY_BUDGET_RATIO,
+        min_balance=settings.LLM_RETRY_BUDGET_MIN,
+    ),
+)
@@ -0,0 +1,372 @@
+"""
+Response cache for LLM calls.
+
+Workflows often send the same system and user messages across runs. The cache
+stores model responses in a local SQLite database keyed by provider, model,
+sampling parameters, a hash of the credentials and endpoint and the normalized
+messages, with a TTL and a bound on the number of entries (least recently used
+entries are evicted first). Responses are never shared across API keys or
+endpoints.
+
+Optionally, misses fall back to a near-duplicate lookup: prompts are embedded
+through the OpenAI embeddings API and compared by cosine similarity against
+the cached prompts of the same scope. Only prompts of OpenAI nodes are
+embedded, so other providers' prompts never leave for OpenAI. Embeddings are stored alongside the responses and loaded into an
+in-memory index per scope on first use, holding at most the
+``max_index_entries`` most recently used prompts so a lookup stays cheap.
+"""
+
+import array
+import asyncio
+import operator
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Embedder = Callable[[str], Awaitable[List[float]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    scope TEXT NOT NULL,
+    response TEXT NOT NULL,
+    embedding BLOB,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_responses_scope ON llm_responses (scope);
+CREATE INDEX IF NOT EXISTS llm_responses_last_used ON llm_responses (last_used);
+"""
+
+
+def normalize_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Normalize messages so that insignificant whitespace does not miss."""
+    return [
+        {
+            "role": message.get("role", "user"),
+            "content": "\n".join(
+                line.rstrip()
+                for line in str(message.get("content", "")).strip().splitlines()
+            ),
+        }
+        for message in messages
+    ]
+
+
+def prompt_text(messages: List[Dict[str, str]]) -> str:
+    """Text of the messages that is embedded for the near-duplicate lookup."""
+    return "\n".join(
+        f"{message['role']}: {message['content']}"
+        for message in normalize_messages(messages)
+    )
+
+
+# Client settings selecting the account or endpoint that answers a request
+IDENTITY_KEYS = ("api_key", "azure_endpoint", "base_url", "api_version")
+
+
+# Providers whose prompts may be sent to the OpenAI embeddings API for the
+# near-duplicate lookup; prompts of other providers only match exactly
+SEMANTIC_PROVIDERS = ("openai",)
+
+
+def semantic_prompt(
+    client_config: Dict[str, Any], messages: List[Dict[str, str]]
+) -> Optional[str]:
+    """
+    Text embedded for the near-duplicate lookup of a call.
+
+    Returns:
+        The prompt text, or None if the call goes to a provider or custom
+        endpoint whose prompts must not leave for OpenAI
+    """
+    if client_config.get("provider") not in SEMANTIC_PROVIDERS or client_config.get(
+        "base_url"
+    ):
+        return None
+    return prompt_text(messages)
+
+
+def _digest(payload: Any) -> str:
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def client_identity(client_config: Dict[str, Any]) -> str:
+    """Hash of the credentials and endpoint a client sends requests with."""
+    return _digest({key: client_config.get(key) for key in IDENTITY_KEYS})
+
+
+def cache_keys(
+    provider: str,
+    model: str,
+    params: Dict[str, Any],
+    messages: List[Dict[str, str]],
+    identity: str = "",
+) -> Tuple[str, str]:
+    """
+    Build the cache keys of a request.
+
+    Args:
+        provider: LLM provider name
+        model: Model name
+        params: Parameters affecting the response (temperature, max_tokens, ...)
+        messages: Request messages
+        identity: ``client_identity`` of the client sending the request
+
+    Returns:
+        The exact-match key and the scope key shared by all requests with the
+        same provider, model, parameters and client identity
+    """
+    scope = _digest(
+        {"provider": provider, "model": model, "params": params, "identity": identity}
+    )
+    key = _digest({"scope": scope, "messages": normalize_messages(messages)})
+    return key, scope
+
+
+def _normalize_vector(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class LLMResponseCache:
+    """SQLite-backed exact-match cache with an optional semantic lookup."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_entries: int = 10000,
+        embedder: Optional[Embedder] = None,
+        similarity_threshold: float = 0.97,
+        max_index_entries: int = 2000,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite database file (":memory:" for a transient cache)
+            ttl_seconds: Time-to-live of an entry
+            max_entries: Maximum number of cached responses
+            embedder: Embeds prompt text; enables the near-duplicate lookup
+            similarity_threshold: Minimum cosine similarity of a semantic hit
+            max_index_entries: Most recently used prompts per scope compared
+                in a near-duplicate lookup
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.max_index_entries = max_index_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # scope -> key -> normalized embedding, least recently used first
+        self._index: Dict[str, "OrderedDict[str, array.array]"] = {}
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    async def get(
+        self, key: str, scope: str, prompt: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[List[float]], bool]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Exact-match key from ``cache_keys``
+            scope: Scope key from ``cache_keys``
+            prompt: Prompt text for the semantic lookup
+
+        Returns:
+            The cached response (or None), the prompt's embedding if one was
+            computed (to be passed on to ``set``), and whether the hit was a
+            near-duplicate
+        """
+        response = await self._run(self._get, key)
+        if response is not None:
+            self.hits += 1
+            return response, None, False
+
+        embedding = None
+        if self.embedder is not None and prompt:
+            try:
+                embedding = _normalize_vector(await self.embedder(prompt))
+            except Exception as e:
+                logger.warning(f"LLM response cache embedding failed: {str(e)}")
+            if embedding is not None:
+                match = await self._run(self._nearest, scope, embedding)
+                if match is not None:
+                    response = await self._run(self._get, match)
+                    if response is not None:
+                        self.semantic_hits += 1
+                        return response, embedding, True
+
+        self.misses += 1
+        return None, embedding, False
+
+    async def set(
+        self,
+        key: str,
+        scope: str,
+        response: str,
+        embedding: Optional[List[float]] = None,
+    ) -> None:
+        """Store a response."""
+        await self._run(self._set, key, scope, response, embedding)
+
+    async def clear(self) -> None:
+        """Remove all entries."""
+        await self._run(self._clear)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters."""
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._index.clear()
+
+    async def _run(self, fn: Callable, *args: Any) -> Any:
+        # A broken cache must never fail the node
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except Exception as e:
+            logger.warning(f"LLM response cache operation failed: {str(e)}")
+            return None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute(
+                "UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key)
+            )
+            conn.commit()
+            return row[0]
+
+    def _set(
+        self,
+        key: str,
+        scope: str,
+        response: str,
+        embedding: Optional[List[float]],
+    ) -> None:
+        now = time.time()
+        blob = array.array("f", embedding).tobytes() if embedding else None
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses "
+                "(key, scope, response, embedding, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, scope, response, blob, now, now),
+            )
+            conn.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            )
+            conn.execute(
+                "DELETE FROM llm_responses WHERE key IN (SELECT key FROM "
+                "llm_responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+            vectors = self._index.get(scope)
+            if vectors is not None and embedding:
+                vectors.pop(key, None)
+                vectors[key] = array.array("f", embedding)
+                while len(vectors) > self.max_index_entries:
+                    vectors.popitem(last=False)
+
+    def _nearest(self, scope: str, embedding: List[float]) -> Optional[str]:
+        with self._lock:
+            vectors = self._index.get(scope)
+            if vectors is None:
+                rows = self._connection().execute(
+                    "SELECT key, embedding FROM llm_responses "
+                    "WHERE scope = ? AND embedding IS NOT NULL "
+                    "ORDER BY last_used DESC LIMIT ?",
+                    (scope, self.max_index_entries),
+                )
+                # Least recently used first, so inserts evict from the front
+                vectors = self._index[scope] = OrderedDict(
+                    (key, array.array("f", blob))
+                    for key, blob in reversed(rows.fetchall())
+                )
+            vectors = list(vectors.items())
+
+        best_key, best_score = None, self.similarity_threshold
+        for key, vector in vectors:
+            if len(vector) != len(embedding):
+                continue
+            score = sum(map(operator.mul, vector, embedding))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM llm_responses")
+            conn.commit()
+            self._index.clear()
+
+
+def _openai_embedder() -> Embedder:
+    from langchain_openai import OpenAIEmbeddings
+
+    embeddings = OpenAIEmbeddings(
+        model=settings.LLM_RESPONSE_CACHE_EMBEDDING_MODEL,
+        api_key=settings.OPENAI_API_KEY or None,
+    )
+    return embeddings.aembed_query
+
+
+# Create a singleton instance
+llm_response_cache = LLMResponseCache(
+    path=settings.LLM_RESPONSE_CACHE_PATH,
+    ttl_seconds=settings.LLM_RESPONSE_CACHE_TTL_SECONDS,
+    max_entries=settings.LLM_RESPONSE_CACHE_MAX_ENTRIES,
+    embedder=_openai_embedder() if settings.LLM_RESPONSE_CACHE_SEMANTIC else None,
+    similarity_threshold=settings.LLM_RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+    max_index_entries=settings.LLM_RESPONSE_CACHE_SEMANTIC_MAX_ENTRIES,
+)
@@ -0,0 +1,156 @@
+"""
+Token usage and cost accounting for LLM calls.
+
+Usage is read from LangChain response metadata (``usage_metadata``, with the
+provider-specific ``response_metadata`` as a fallback) and priced with the
+per-model rates in ``settings.LLM_MODEL_PRICES``. Node results carry their
+usage and cost, and ``aggregate_usage`` sums them up per workflow execution.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Optional
+
+from app.core.config import settings
+
+
+@dataclass
+class TokenUsage:
+    """Token usage of an LLM call.
+
+    Attributes:
+        prompt_tokens: Number of tokens in the input prompt
+        completion_tokens: Number of tokens in the model's response
+        total_tokens: Total number of tokens used (prompt + completion)
+        reasoning_tokens: Completion tokens spent on reasoning, if reported
+        calls: Number of calls sent to the provider (0 for cache hits)
+    """
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    reasoning_tokens: Optional[int] = None
+    calls: int = 0
+
+    def __add__(self, other: "TokenUsage") -> "TokenUsage":
+        reasoning = None
+        if self.reasoning_tokens is not None or other.reasoning_tokens is not None:
+            reasoning = (self.reasoning_tokens or 0) + (other.reasoning_tokens or 0)
+        return TokenUsage(
+            prompt_tokens=self.prompt_tokens + other.prompt_tokens,
+            completion_tokens=self.completion_tokens + other.completion_tokens,
+            total_tokens=self.total_tokens + other.total_tokens,
+            reasoning_tokens=reasoning,
+            calls=self.calls + other.calls,
+        )
+
+    def to_dict(self) -> Dict[str, Optional[int]]:
+        return asdict(self)
+
+
+def usage_from_response(response: Any) -> Optional[TokenUsage]:
+    """
+    Extract the token usage of a LangChain response.
+
+    Args:
+        response: ``AIMessage`` (or merged ``AIMessageChunk``) of the call
+
+    Returns:
+        The usage, or None if the provider did not report any
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict):
+        details = usage.get("output_token_details") or {}
+        return TokenUsage(
+            prompt_tokens=usage.get("input_tokens", 0),
+            completion_tokens=usage.get("output_tokens", 0),
+            total_tokens=usage.get("total_tokens", 0),
+            reasoning_tokens=details.get("reasoning"),
+        )
+
+    metadata = getattr(response, "response_metadata", None)
+    if not isinstance(metadata, dict):
+        return None
+    # OpenAI reports token_usage, Anthropic reports usage
+    usage = metadata.get("token_usage") or metadata.get("usage")
+    if not isinstance(usage, dict):
+        return None
+    prompt_tokens = usage.get("prompt_tokens", usage.get("input_tokens", 0))
+    completion_tokens = usage.get("completion_tokens", usage.get("output_tokens", 0))
+    details = usage.get("completion_tokens_details") or {}
+    return TokenUsage(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=usage.get("total_tokens", prompt_tokens + completion_tokens),
+        reasoning_tokens=details.get("reasoning_tokens"),
+    )
+
+
+def calculate_cost(usage: TokenUsage, model: str) -> Optional[float]:
+    """
+    Calculate the cost of a call in dollars.
+
+    Reasoning tokens are billed as completion tokens and are already part of
+    ``completion_tokens``.
+
+    Returns:
+        The cost, or None if the model has no configured price
+    """
+    prices = settings.LLM_MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    input_cost = (usage.prompt_tokens / 1_000_000) * prices["input"]
+    output_cost = (usage.completion_tokens / 1_000_000) * prices["output"]
+    return input_cost + output_cost
+
+
+def aggregate_usage(results: Iterable[Dict], elapsed: float) -> Dict[str, Any]:
+    """
+    Sum up the LLM usage and cost of a workflow execution's node results.
+
+    Results reused from a cache or shared with an identical in-flight node and
+    LLM response cache hits are skipped, since they made no calls. Calls are
+    counted from the usage, so a map-reduce node counts every call it made.
+
+    Args:
+        results: Node results of the execution
+        elapsed: Wall time of the execution in seconds
+
+    Returns:
+        Totals, per-model breakdown and token throughput
+    """
+    totals = {
+        "llm_calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "reasoning_tokens": 0,
+        "total_tokens": 0,
+        "cost": 0.0,
+    }
+    by_model: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        if result.get("cached") or result.get("reused") or result.get("shared"):
+            continue
+        output = result.get("output")
+        metadata = output.get("metadata") if isinstance(output, dict) else None
+        usage = metadata.get("usage") if isinstance(metadata, dict) else None
+        if not usage or metadata.get("cache_hit"):
+            continue
+
+        model_key = f"{output.get('provider')}:{output.get('model')}"
+        model_totals = by_model.setdefault(
+            model_key, {"llm_calls": 0, "total_tokens": 0, "cost": 0.0}
+        )
+        cost = metadata.get("cost") or 0.0
+        for target in (totals, model_totals):
+            # Results recorded before calls were counted made one call
+            target["llm_calls"] += usage.get("calls", 1)
+            target["total_tokens"] += usage.get("total_tokens") or 0
+            target["cost"] += cost
+        totals["prompt_tokens"] += usage.get("prompt_tokens") or 0
+        totals["completion_tokens"] += usage.get("completion_tokens") or 0
+        totals["reasoning_tokens"] += usage.get("reasoning_tokens") or 0
+
+    totals["by_model"] = by_model
+    totals["elapsed"] = elapsed
+    totals["tokens_per_second"] = totals["total_tokens"] / elapsed if elapsed else 0.0
+    return totals
@@ -6,21 +6,37 @@ Currently supports Surya OCR engine.
 import os
 import asyncio
 import logging
+from collections import deque
 from enum import Enum
-from typing import Dict, List, Optional, Any, Union
+from typing import (
+    AsyncIterator,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Any,
+    Tuple,
+    Union,
+)
 from datetime import datetime
 import uuid
 from pathlib import Path
 from PIL import Image
 
-# Import Surya OCR components
-from surya.recognition import RecognitionPredictor
-from surya.detection import DetectionPredictor
-
+from app.core.config import settings
+from app.core.db import SessionLocal
 from app.executors.base_executor import BaseExecutor
+from app.executors.surya_predictors import surya_predictors
+from app.services.file_service import FileService
+from app.services.node_streams import node_streams
+from app.services.websocket_manager import websocket_manager
 
 logger = logging.getLogger(__name__)
 
+# A page to OCR: (file path, zero-based page index)
+PageRef = Tuple[str, int]
+
 
 class OCREngine(Enum):
     """Supported OCR engines."""
@@ -37,48 +53,258 @@ class OCRStatus(Enum):
     FAILED = "failed"
 
 
+def is_pdf(file_path: str) -> bool:
+    """Whether a file is a PDF, judged by its extension."""
+    return Path(file_path).suffix.lower() == ".pdf"
+
+
+def count_pages(file_path: str) -> int:
+    """
+    Count the pages of a file without rendering them.
+
+    Args:
+        file_path: Path to a PDF or image file
+
+    Returns:
+        Number of PDF pages or image frames
+    """
+    if is_pdf(file_path):
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(file_path)
+        try:
+            return len(document)
+        finally:
+            document.close()
+
+    with Image.open(file_path) as image:
+        return getattr(image, "n_frames", 1)
+
+
+def run_surya_ocr_batch(
+    pages: List[PageRef], languages: Optional[List[str]], dpi: int
+) -> List[Dict[str, Any]]:
+    """
+    Run Surya OCR on a micro-batch of pages.
+
+    Module-level so it can be pickled and run in a process pool worker. Pages
+    are rasterized here, one PDF at a time and only for the requested pages,
+    so only page references and formatted results cross the process boundary.
+
+    Args:
+        pages: Pages to process, possibly spanning several files
+        languages: List of language codes, or None for automatic detection
+        dpi: Resolution PDF pages are rendered at
+
+    Returns:
+        Formatted OCR results, one per page, in the order of ``pages``
+    """
+    try:
+        images = []
+        documents: Dict[str, Any] = {}
+        try:
+            for file_path, page_index in pages:
+                if is_pdf(file_path):
+                    if file_path not in documents:
+                        import pypdfium2
+
+                        documents[file_path] = pypdfium2.PdfDocument(file_path)
+                    page = documents[file_path][page_index]
+                    images.append(page.render(scale=dpi / 72).to_pil().convert("RGB"))
+                else:
+                    with Image.open(file_path) as image:
+                        image.seek(page_index)
+                        images.append(image.convert("RGB"))
+        finally:
+            for document in documents.values():
+                document.close()
+
+        # Borrow the process-wide predictors, loaded once per process
+        with surya_predictors.use("recognition") as recognition_predictor:
+            with surya_predictors.use("detection") as detection_predictor:
+                # Process the whole batch with Surya OCR
+                predictions = recognition_predictor(
+                    images, [languages] * len(images), detection_predictor
+                )
+
+        return [
+            {"file": file_path, "page": page_index, **format_surya_prediction(pred)}
+            for (file_path, page_index), pred in zip(pages, predictions)
+        ]
+
+    except Exception as e:
+        logger.error(f"Error in Surya OCR processing: {str(e)}")
+        raise
+
+
+def format_surya_prediction(prediction: Any) -> Dict[str, Any]:
+    """
+    Format one Surya OCR prediction into a standardized structure.
+
+    Args:
+        prediction: Raw prediction for a single page
+
+    Returns:
+        Formatted OCR result with the page text and its blocks
+    """
+    # Extract text and bounding boxes from the prediction
+    # Note: Adjust this based on actual Surya OCR output structure
+    result = {"text": prediction.text, "blocks": []}
+
+    # Process text blocks if available
+    for block in getattr(prediction, "blocks", None) or []:
+        result["blocks"].append(
+            {
+                "text": block.text,
+                "confidence": block.confidence,
+                "bbox": (
+                    block.bbox.tolist() if hasattr(block.bbox, "tolist") else block.bbox
+                ),
+            }
+        )
+
+    return result
+
+
+def combine_page_results(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine per-page results into a single OCR result.
+
+    Args:
+        pages: Formatted page results in document order
+
+    Returns:
+        Dictionary with the joined text, all blocks and the per-page results
+    """
+    return {
+        "text": "\n\n".join(page["text"] for page in pages),
+        "blocks": [block for page in pages for block in page["blocks"]],
+        "pages": pages,
+    }
+
+
 class OCRExecutor(BaseExecutor):
     """
     Handles asynchronous OCR processing jobs.
 
     This class manages OCR execution using different OCR engines.
-    Currently supports Surya OCR.
+    Currently supports Surya OCR. Input is a file path and/or a list of
+    DatasetFile IDs; PDFs are rasterized lazily and pages are sent to the
+    predictors in micro-batches of ``batch_size``.
     """
 
+    cpu_bound = True
+    # Pages are published to the node's output stream as they complete
+    streams_output = True
+
     def __init__(
         self,
-        file_path: str,
+        file_path: Optional[str] = None,
         ocr_engine: OCREngine = OCREngine.SURYA_OCR,
         languages: Optional[List[str]] = None,
+        file_ids: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        dpi: Optional[int] = None,
     ):
         """
         Initialize OCR execution job.
 
         Args:
-            file_path: Path to the image file for OCR
+            file_path: Path to the image or PDF file for OCR
             ocr_engine: OCR engine to use (default: SURYA_OCR)
             languages: List of language codes to use for OCR. If None, automatic language detection is used.
+            file_ids: IDs of DatasetFiles to process after ``file_path``
+            batch_size: Number of pages per predictor call (default: OCR_BATCH_SIZE)
+            dpi: Resolution PDF pages are rendered at (default: OCR_PDF_DPI)
         """
         self.job_id = str(uuid.uuid4())
         self.file_path = file_path
+        self.file_ids = file_ids or []
         self.ocr_engine = ocr_engine
         self.languages = languages
+        self.batch_size = batch_size or settings.OCR_BATCH_SIZE
+        self.dpi = dpi or settings.OCR_PDF_DPI
         self.status = OCRStatus.PENDING
         self.created_at = datetime.now()
         self.completed_at = None
         self.result = None
         self.error = None
+        self.total_pages = 0
+        self.pages_completed = 0
 
-    async def execute(self) -> str:
+    async def execute(
+        self,
+        node: Optional[Dict] = None,
+        previous_results: Optional[Dict] = None,
+        workflow_id: Optional[str] = None,
+    ) -> Union[str, Dict]:
         """
-        Execute OCR job asynchronously.
+        Execute OCR.
+
+        Without a node, the OCR job configured in the constructor is started in
+        the background and its job ID is returned; poll ``status`` and
+        ``result``. With a node, the OCR runs as a workflow node configured by
+        ``data.config`` (``file_path``, ``file_ids``, ``languages``,
+        ``batch_size``, ``dpi``) and its result dictionary is returned.
 
         Returns:
-            Job ID
+            Job ID, or the node result when executing a workflow node
         """
-        # Start OCR execution in a background task
-        asyncio.create_task(self._process_ocr())
-        return self.job_id
+        if node is None:
+            # Start OCR execution in a background task
+            asyncio.create_task(self._process_ocr())
+            return self.job_id
+
+        return await self._execute_node(node, workflow_id)
+
+    async def _execute_node(self, node: Dict, workflow_id: Optional[str]) -> Dict:
+        node_id = node["id"]
+        config = node.get("data", {}).get("config", {}) or {}
+        self.file_path = config.get("file_path")
+        self.file_ids = config.get("file_ids") or []
+        self.languages = config.get("languages")
+        self.batch_size = config.get("batch_size") or settings.OCR_BATCH_SIZE
+        self.dpi = config.get("dpi") or settings.OCR_PDF_DPI
+
+        logger.info(f"Executing OCR node {node_id}")
+        start_time = asyncio.get_event_loop().time()
+        stream = node_streams.get(workflow_id, node_id) if workflow_id else None
+        pages = []
+        async for page in self.iter_pages():
+            pages.append(page)
+            if stream is not None:
+                stream.append(page)
+            if workflow_id:
+                await self._report_page(workflow_id, node_id, page)
+        output = combine_page_results(pages)
+        execution_time = asyncio.get_event_loop().time() - start_time
+
+        return {
+            "node_id": node_id,
+            "type": "ocr",
+            "status": "success",
+            "execution_time": execution_time,
+            "result": f"OCR completed for node {node_id}",
+            "output": output,
+        }
+
+    async def _report_page(self, workflow_id: str, node_id: str, page: Dict) -> None:
+        """Send a completed page and the node's progress to the workflow's clients."""
+        await websocket_manager.send_message_to_workflow(
+            workflow_id,
+            {
+                "event": "node-output-partial",
+                "data": {
+                    "node_id": node_id,
+                    "output": page,
+                    "pages_completed": self.pages_completed,
+                    "total_pages": self.total_pages,
+                    "progress": round(
+                        100 * self.pages_completed / max(self.total_pages, 1), 1
+                    ),
+                },
+            },
+        )
 
     async def _process_ocr(self) -> None:
         """
@@ -89,10 +315,6 @@ class OCRExecutor(BaseExecutor):
             # Update status to processing
             self.status = OCRStatus.PROCESSING
 
-            # Check if file exists
-            if not os.path.exists(self.file_path):
-                raise FileNotFoundError(f"File not found: {self.file_path}")
-
             # Process based on selected engine
             if self.ocr_engine == OCREngine.SURYA_OCR:
                 result = await self._process_with_surya_ocr()
@@ -113,73 +335,104 @@ class OCRExecutor(BaseExecutor):
             self.error = str(e)
             self.completed_at = datetime.now()
 
-    async def _process_with_surya_ocr(self) -> Dict[str, Any]:
+    async def resolve_sources(self) -> List[str]:
         """
-        Process image with Surya OCR.
+        Resolve the input file path and DatasetFile IDs to file paths.
 
         Returns:
-            OCR results
-        """
-        # Run CPU-intensive OCR processing in a thread pool
-        return await asyncio.to_thread(self._run_surya_ocr)
+            Paths of all input files, in input order
 
-    def _run_surya_ocr(self) -> Dict[str, Any]:
+        Raises:
+            FileNotFoundError: If a file or DatasetFile does not exist
         """
-        Run Surya OCR on the image file.
-        This method is executed in a thread pool to avoid blocking the event loop.
+        paths = [self.file_path] if self.file_path else []
+        if self.file_ids:
+            paths.extend(await asyncio.to_thread(self._get_dataset_file_paths))
+        if not paths:
+            raise ValueError("Either 'file_path' or 'file_ids' must be provided")
 
-        Returns:
-            Dictionary with OCR results
-        """
-        try:
-            # Open the image
-            image = Image.open(self.file_path)
-
-            # Initialize predictors
-            recognition_predictor = RecognitionPredictor()
-            detection_predictor = DetectionPredictor()
-
-            # Process image with Surya OCR
-            predictions = recognition_predictor(
-                [image], [self.languages], detection_predictor
-            )
-
-            # Format results
-            formatted_results = self._format_surya_results(predictions)
+        for path in paths:
+            # Check if file exists
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"File not found: {path}")
+        return paths
 
-            return formatted_results
+    def _get_dataset_file_paths(self) -> List[str]:
+        db = SessionLocal()
+        try:
+            files = {
+                file.id: file.path
+                for file in FileService.get_files_by_ids(db, self.file_ids)
+            }
+        finally:
+            db.close()
+
+        missing = [file_id for file_id in self.file_ids if file_id not in files]
+        if missing:
+            raise FileNotFoundError(f"Dataset files not found: {', '.join(missing)}")
+        return [files[file_id] for file_id in self.file_ids]
+
+    async def iter_pages(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        OCR all input pages and yield results page by page, in order.
 
-        except Exception as e:
-            logger.error(f"Error in Surya OCR processing: {str(e)}")
-            raise
+        Pages are grouped into micro-batches of ``batch_size`` (across files),
+        and up to ``OCR_PREFETCH_BATCHES`` batches are in flight at once so the
+        process pool stays busy while earlier pages are consumed.
 
-    def _format_surya_results(self, predictions: Any) -> Dict[str, Any]:
+        Yields:
+            Formatted page results with ``file`` and ``page`` keys
         """
-        Format Surya OCR results into a standardized structure.
+        paths = await self.resolve_sources()
+        page_counts = await asyncio.to_thread(lambda: [count_pages(p) for p in paths])
+        self.total_pages = sum(page_counts)
+        self.pages_completed = 0
+        batches = self._iter_batches(paths, page_counts)
+        in_flight: Deque[asyncio.Task] = deque()
+        try:
+            for batch in batches:
+                in_flight.append(
+                    asyncio.create_task(
+                        self.run_blocking(
+                            run_surya_ocr_batch, batch, self.languages, self.dpi
+                        )
+                    )
+                )
+                if len(in_flight) < max(settings.OCR_PREFETCH_BATCHES, 1):
+                    continue
+                for page in await in_flight.popleft():
+                    self.pages_completed += 1
+                    yield page
+
+            while in_flight:
+                for page in await in_flight.popleft():
+                    self.pages_completed += 1
+                    yield page
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    def _iter_batches(
+        self, paths: List[str], page_counts: List[int]
+    ) -> Iterator[List[PageRef]]:
+        batch: List[PageRef] = []
+        for path, page_count in zip(paths, page_counts):
+            for page_index in range(page_count):
+                batch.append((path, page_index))
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
 
-        Args:
-            predictions: Raw predictions from Surya OCR
+    async def _process_with_surya_ocr(self) -> Dict[str, Any]:
+        """
+        Process the input files with Surya OCR.
 
         Returns:
-            Formatted OCR results
+            OCR results combined over all pages
         """
-        # Extract text and bounding boxes from predictions
-        # Note: Adjust this based on actual Surya OCR output structure
-        result = {"text": predictions[0].text if predictions else "", "blocks": []}
-
-        # Process text blocks if available
-        if predictions and hasattr(predictions[0], "blocks"):
-            for block in predictions[0].blocks:
-                result["blocks"].append(
-                    {
-                        "text": block.text,
-                        "confidence": block.confidence,
-                        "bbox": (
-                            block.bbox.tolist()
-                            if hasattr(block.bbox, "tolist")
-                            else block.bbox
-                        ),
-                    }
-                )
-
-        return result
+        # OCR is CPU-bound, so batches run in the process pool backend where
+        # concurrent jobs are not serialized on the GIL
+        pages = [page async for page in self.iter_pages()]
+        return combine_page_results(pages)
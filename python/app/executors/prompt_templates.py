@@ -0,0 +1,128 @@
+"""
+Prompt templates referencing the outputs of upstream nodes.
+
+Message contents may contain placeholders such as ``{{ ocr_1.text }}``: the
+first segment is a node id and the remaining segments walk into that node's
+``output`` (dict keys or list indices). ``{{ ocr_1 }}`` renders the whole
+output. Strings are inserted as-is and other values as JSON. A placeholder
+preceded by a backslash, ``\\{{ like_this }}``, is kept as literal text
+without the backslash. Nodes may only reference their predecessors; the
+workflow is validated against the ids returned by ``references`` before it
+runs, and placeholders naming no node of the workflow are kept as written, so
+prompts that contained literal braces before templates existed still work.
+
+Templates are parsed once into a list of literal and reference parts and
+cached by their source text, so every execution of a workflow snapshot, and
+every node of a fan-out sharing a template, renders without re-parsing.
+"""
+
+import functools
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Mapping, Tuple, Union
+
+_PLACEHOLDER = re.compile(r"(\\?)\{\{\s*([^{}\s]+)\s*\}\}")
+
+
+class TemplateError(ValueError):
+    """Raised when a template references an unavailable node or output."""
+
+
+@dataclass(frozen=True)
+class _Reference:
+    node_id: str
+    path: Tuple[str, ...]
+    source: str
+
+
+class CompiledTemplate:
+    """Parsed template, rendered against node results."""
+
+    def __init__(self, parts: List[Union[str, _Reference]]):
+        self.parts = parts
+        self.references: FrozenSet[str] = frozenset(
+            part.node_id for part in parts if isinstance(part, _Reference)
+        )
+
+    @property
+    def is_static(self) -> bool:
+        return not self.references
+
+    def render(self, results: Mapping[str, Dict], keep_unknown: bool = False) -> str:
+        """
+        Render the template.
+
+        Args:
+            results: Node results keyed by node id
+            keep_unknown: Keep placeholders referencing nodes without a result
+                as written instead of raising
+
+        Returns:
+            The rendered text
+        """
+        if self.is_static:
+            return "".join(self.parts)
+        return "".join(
+            (
+                part
+                if isinstance(part, str)
+                else (
+                    part.source
+                    if keep_unknown and part.node_id not in results
+                    else _format(_resolve(part, results))
+                )
+            )
+            for part in self.parts
+        )
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_template(source: str) -> CompiledTemplate:
+    """Parse a template; compiled templates are cached by source text."""
+    parts: List[Union[str, _Reference]] = []
+    position = 0
+    for match in _PLACEHOLDER.finditer(source):
+        if match.start() > position:
+            parts.append(source[position : match.start()])
+        if match.group(1):
+            # Escaped placeholder: literal text without the backslash
+            parts.append(match.group(0)[1:])
+        else:
+            node_id, *path = match.group(2).split(".")
+            parts.append(_Reference(node_id, tuple(path), match.group(0)))
+        position = match.end()
+    if position < len(source):
+        parts.append(source[position:])
+    return CompiledTemplate(parts)
+
+
+def _resolve(reference: _Reference, results: Mapping[str, Dict]) -> Any:
+    result = results.get(reference.node_id)
+    if result is None:
+        raise TemplateError(
+            f"{reference.source} references node '{reference.node_id}', "
+            "which has no result"
+        )
+    value = result.get("output")
+    for segment in reference.path:
+        if isinstance(value, dict) and segment in value:
+            value = value[segment]
+        elif (
+            isinstance(value, list) and segment.isdigit() and int(segment) < len(value)
+        ):
+            value = value[int(segment)]
+        else:
+            raise TemplateError(
+                f"{reference.source}: output of node '{reference.node_id}' "
+                f"has no '{segment}'"
+            )
+    return value
+
+
+def _format(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
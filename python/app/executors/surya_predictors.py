@@ -0,0 +1,227 @@
+"""
+Process-wide registry of Surya OCR predictors.
+
+Loading a predictor reads its model weights from disk, which dominates OCR
+latency when done per image. The registry loads each predictor lazily on
+first use and shares it across jobs in the process. Each process pool worker
+has its own registry and can pre-warm it in the worker initializer. Models that
+have been idle for longer than ``idle_ttl_seconds``, or that push the
+estimated memory use over ``max_memory_bytes``, are evicted when nobody is
+using them.
+"""
+
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _load_recognition_predictor() -> Any:
+    from surya.recognition import RecognitionPredictor
+
+    return RecognitionPredictor()
+
+
+def _load_detection_predictor() -> Any:
+    from surya.detection import DetectionPredictor
+
+    return DetectionPredictor()
+
+
+PREDICTOR_LOADERS: Dict[str, Callable[[], Any]] = {
+    "recognition": _load_recognition_predictor,
+    "detection": _load_detection_predictor,
+}
+
+
+def estimate_predictor_bytes(predictor: Any) -> int:
+    """
+    Estimate the memory held by a predictor's model weights.
+
+    Args:
+        predictor: A loaded predictor
+
+    Returns:
+        Size of the model parameters in bytes, or 0 if it cannot be determined
+    """
+    model = getattr(predictor, "model", None)
+    parameters = getattr(model, "parameters", None)
+    if parameters is None:
+        return 0
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters())
+    except Exception:
+        return 0
+
+
+@dataclass(eq=False)
+class _LoadedPredictor:
+    predictor: Any
+    size_bytes: int
+    last_used: float
+    in_use: int = 0
+
+
+class PredictorRegistry:
+    """Lazily loaded, shared predictors with idle and memory-based eviction."""
+
+    def __init__(
+        self,
+        loaders: Dict[str, Callable[[], Any]],
+        max_memory_bytes: int = 0,
+        idle_ttl_seconds: float = 0,
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            loaders: Mapping of predictor name to a function that loads it
+            max_memory_bytes: Estimated memory cap for loaded predictors
+                (0 disables the cap)
+            idle_ttl_seconds: Evict predictors unused for this long
+                (0 keeps them loaded)
+        """
+        self.loaders = loaders
+        self.max_memory_bytes = max_memory_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._loaded: Dict[str, _LoadedPredictor] = {}
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in loaders}
+        self.loads = 0
+        self.evictions = 0
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[Any]:
+        """
+        Borrow a predictor, loading it if necessary.
+
+        The predictor is not evicted while it is borrowed.
+
+        Args:
+            name: Predictor name (e.g. ``recognition``, ``detection``)
+
+        Yields:
+            The shared predictor
+        """
+        entry = self._acquire(name)
+        try:
+            yield entry.predictor
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def prewarm(self, names: Optional[Sequence[str]] = None) -> None:
+        """Load predictors ahead of the first job."""
+        for name in names or list(self.loaders):
+            with self.use(name):
+                pass
+
+    def evict_idle(self) -> None:
+        """Evict predictors that have been idle for longer than the TTL."""
+        if self.idle_ttl_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for name, entry in list(self._loaded.items()):
+                if entry.in_use == 0 and now - entry.last_used > self.idle_ttl_seconds:
+                    self._evict(name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the loaded predictors, their estimated size and counters."""
+        with self._lock:
+            return {
+                "loaded": {
+                    name: entry.size_bytes for name, entry in self._loaded.items()
+                },
+                "memory_bytes": self._memory_bytes(),
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+    def _acquire(self, name: str) -> _LoadedPredictor:
+        if name not in self.loaders:
+            raise ValueError(f"Unknown predictor: {name}")
+        self.evict_idle()
+
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is not None:
+                entry.in_use += 1
+                return entry
+
+        # Load outside the registry lock so other predictors stay available,
+        # but only once per name
+        with self._load_locks[name]:
+            with self._lock:
+                entry = self._loaded.get(name)
+                if entry is not None:
+                    entry.in_use += 1
+                    return entry
+
+            logger.info(f"Loading Surya {name} predictor")
+            predictor = self.loaders[name]()
+            entry = _LoadedPredictor(
+                predictor=predictor,
+                size_bytes=estimate_predictor_bytes(predictor),
+                last_used=time.monotonic(),
+                in_use=1,
+            )
+            with self._lock:
+                self._loaded[name] = entry
+                self.loads += 1
+                self._enforce_memory_cap(keep=name)
+            return entry
+
+    def _memory_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._loaded.values())
+
+    def _enforce_memory_cap(self, keep: str) -> None:
+        """Evict idle predictors, least recently used first, until under the cap."""
+        if self.max_memory_bytes <= 0:
+            return
+        idle = sorted(
+            (entry.last_used, name)
+            for name, entry in self._loaded.items()
+            if name != keep and entry.in_use == 0
+        )
+        for _, name in idle:
+            if self._memory_bytes() <= self.max_memory_bytes:
+                break
+            self._evict(name)
+
+    def _evict(self, name: str) -> None:
+        del self._loaded[name]
+        self.evictions += 1
+        logger.info(f"Evicted Surya {name} predictor")
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+# Create a singleton instance
+surya_predictors = PredictorRegistry(
+    PREDICTOR_LOADERS,
+    max_memory_bytes=settings.OCR_MODEL_MEMORY_CAP_MB * 1024 * 1024,
+    idle_ttl_seconds=settings.OCR_MODEL_IDLE_TTL_SECONDS,
+)
+
+
+def prewarm_surya_predictors() -> None:
+    """
+    Load all Surya predictors into this process's registry.
+
+    Used as the process pool initializer so workers are warm before the first
+    OCR job reaches them.
+    """
+    try:
+        surya_predictors.prewarm()
+    except Exception as e:
+        logger.error(f"Failed to pre-warm Surya predictors: {str(e)}")
@@ -1,10 +1,20 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.api.v1 import websocket
+from app.executors.execution_backend import process_pool_backend
+from app.executors.llm_client_pool import llm_client_pool
+from app.executors.llm_response_cache import llm_response_cache
+from app.executors.surya_predictors import prewarm_surya_predictors
+from app.services.execution_persistence import execution_persistence
+from app.services.websocket_manager import websocket_manager
+from app.services.workflow_execution import workflow_execution_service
 
 # Setup logging
 logging.basicConfig(
@@ -14,6 +24,38 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    """
+    Start background services on startup and drain them on shutdown.
+
+    Executions interrupted by a previous crash or redeploy are resumed on
+    startup. On shutdown, active executions are marked interrupted and the
+    execution persistence queue is flushed so no checkpoint is lost. The
+    process pool for CPU-bound executors is started with warm workers and
+    stopped last, followed by the shared LLM HTTP connections. With
+    ``OCR_PREWARM_MODELS`` the OCR models are loaded at startup, in every
+    pool worker or in this process if the pool is disabled.
+    """
+    if settings.PROCESS_POOL_ENABLED:
+        if settings.OCR_PREWARM_MODELS:
+            process_pool_backend.initializer = prewarm_surya_predictors
+        process_pool_backend.start()
+    elif settings.OCR_PREWARM_MODELS:
+        await asyncio.to_thread(prewarm_surya_predictors)
+    execution_persistence.start()
+    await workflow_execution_service.start()
+    try:
+        yield
+    finally:
+        await workflow_execution_service.stop()
+        await execution_persistence.stop()
+        await process_pool_backend.shutdown()
+        await llm_client_pool.aclose()
+        llm_response_cache.close()
+        await websocket_manager.close_all()
+
+
 def create_application() -> FastAPI:
     """
     Create and configure the FastAPI application.
@@ -33,6 +75,7 @@ def create_application() -> FastAPI:
         title=settings.PROJECT_NAME,
         description="Backend API supporting both REST and WebSocket connections",
         version="0.1.0",
+        lifespan=lifespan,
     )
 
     logger.info(f"CORS_ORIGINS: {settings.CORS_ORIGINS}")
@@ -0,0 +1,204 @@
+"""
+Execution history service for reading and writing WorkflowExecution records.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_
+
+from sqlalchemy.orm import Session
+
+from app.models.workflow_execution import WorkflowExecution
+
+
+class ExecutionHistoryService:
+    """Service for handling operations related to workflow executions."""
+
+    @staticmethod
+    def get_latest_execution(
+        db: Session, workflow_id: str, statuses: Optional[List[str]] = None
+    ) -> Optional[WorkflowExecution]:
+        """
+        Retrieve the most recent execution of a workflow.
+
+        Args:
+            db: SQLAlchemy database session
+            workflow_id: The unique identifier of the workflow
+            statuses: Optional list of statuses to restrict the lookup to
+
+        Returns:
+            The latest execution if one exists, None otherwise.
+        """
+        query = db.query(WorkflowExecution).filter(
+            WorkflowExecution.workflowId == workflow_id
+        )
+        if statuses:
+            query = query.filter(WorkflowExecution.status.in_(statuses))
+        return query.order_by(WorkflowExecution.createdAt.desc()).first()
+
+    @staticmethod
+    def create_execution(
+        db: Session,
+        workflow_id: str,
+        snapshot: Dict[str, Any],
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        execution_id: Optional[str] = None,
+        commit: bool = True,
+    ) -> WorkflowExecution:
+        """
+        Create an execution record.
+
+        Args:
+            db: SQLAlchemy database session
+            workflow_id: The unique identifier of the workflow
+            snapshot: The nodes and edges the execution ran with
+            status: Execution status
+            result: Optional execution result
+            execution_id: Optional ID to use instead of a generated one
+            commit: Whether to commit immediately or leave it to the caller
+
+        Returns:
+            The created execution.
+        """
+        execution = WorkflowExecution(
+            workflowId=workflow_id, snapshot=snapshot, status=status, result=result
+        )
+        if execution_id:
+            execution.id = execution_id
+        db.add(execution)
+        if commit:
+            db.commit()
+        return execution
+
+    @staticmethod
+    def get_execution(db: Session, execution_id: str) -> Optional[WorkflowExecution]:
+        """
+        Retrieve an execution by its ID.
+
+        Args:
+            db: SQLAlchemy database session
+            execution_id: The unique identifier of the execution
+
+        Returns:
+            The execution if found, None otherwise.
+        """
+        return (
+            db.query(WorkflowExecution)
+            .filter(WorkflowExecution.id == execution_id)
+            .first()
+        )
+
+    @staticmethod
+    def get_executions_by_ids(
+        db: Session, execution_ids: List[str]
+    ) -> List[WorkflowExecution]:
+        """
+        Retrieve multiple executions by their IDs.
+
+        Args:
+            db: SQLAlchemy database session
+            execution_ids: A list of execution IDs to retrieve.
+
+        Returns:
+            A list of found executions. Executions that couldn't be found will be omitted.
+        """
+        return (
+            db.query(WorkflowExecution)
+            .filter(WorkflowExecution.id.in_(execution_ids))
+            .all()
+        )
+
+    @staticmethod
+    def list_executions(
+        db: Session,
+        workflow_id: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[WorkflowExecution]:
+        """
+        List executions, newest first.
+
+        Args:
+            db: SQLAlchemy database session
+            workflow_id: Optional workflow to restrict the listing to
+            status: Optional status to restrict the listing to
+            limit: Maximum number of executions to return
+            offset: Number of executions to skip
+
+        Returns:
+            A list of executions.
+        """
+        query = db.query(WorkflowExecution)
+        if workflow_id:
+            query = query.filter(WorkflowExecution.workflowId == workflow_id)
+        if status:
+            query = query.filter(WorkflowExecution.status == status)
+        return (
+            query.order_by(WorkflowExecution.createdAt.desc())
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def claim_interrupted_executions(
+        db: Session, stale_before: datetime
+    ) -> List[WorkflowExecution]:
+        """
+        Claim executions that need to be resumed.
+
+        An execution is resumable if it was interrupted by a graceful shutdown,
+        or if it is still marked running but has not been updated since
+        ``stale_before`` (its worker crashed). Claimed executions are set back
+        to running in the same transaction; rows locked by another worker are
+        skipped, so each execution is claimed once.
+
+        Args:
+            db: SQLAlchemy database session
+            stale_before: Heartbeat cutoff for running executions
+
+        Returns:
+            The claimed executions.
+        """
+        executions = (
+            db.query(WorkflowExecution)
+            .filter(
+                or_(
+                    WorkflowExecution.status == "interrupted",
+                    and_(
+                        WorkflowExecution.status == "running",
+                        WorkflowExecution.updatedAt < stale_before,
+                    ),
+                )
+            )
+            .order_by(WorkflowExecution.createdAt)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for execution in executions:
+            execution.status = "running"
+            execution.updatedAt = datetime.now(stale_before.tzinfo)
+        db.commit()
+        return executions
+
+    @staticmethod
+    def get_execution_summary(execution: WorkflowExecution) -> Dict[str, Any]:
+        """
+        Get the metadata of an execution without its snapshot and results.
+
+        Args:
+            execution: The execution to summarize
+
+        Returns:
+            A dictionary with the execution's ID, workflow, status and timestamps.
+        """
+        return {
+            "id": execution.id,
+            "workflowId": execution.workflowId,
+            "status": execution.status,
+            "createdAt": execution.createdAt,
+            "updatedAt": execution.updatedAt,
+        }
@@ -0,0 +1,364 @@
+"""
+Write-behind persistence for workflow executions.
+
+The execution service records execution state through this queue instead of
+writing to Postgres directly. Calls only update an in-memory pending batch,
+so the event loop never waits on the database. A background flusher coalesces
+all pending updates per execution and writes them in a worker thread, either
+every ``flush_interval`` seconds or as soon as ``max_batch_size`` updates are
+pending. Node results recorded as checkpoints wake the flusher early, at most
+once every ``checkpoint_interval`` seconds, so execution records are rewritten
+at a bounded rate however many nodes complete; results that complete meanwhile
+are batched into the next flush.
+
+When a batch fails to write, its executions are written one by one, so one
+bad execution (e.g. of a deleted workflow) does not hold back the others.
+Executions that still fail are re-queued and retried with exponential backoff;
+their updates are dropped and logged after ``max_retries`` failed attempts.
+
+Node results are stored in the execution's ``result`` JSON, which each flush
+rewrites whole: an execution with N node results writes O(N²) bytes over its
+checkpoints, which ``checkpoint_interval`` keeps in check.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.services.execution_history import ExecutionHistoryService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingExecution:
+    """Coalesced, not yet persisted updates for one execution."""
+
+    workflow_id: Optional[str] = None
+    snapshot: Optional[Dict[str, Any]] = None
+    status: Optional[str] = None
+    node_results: Dict[str, Dict] = field(default_factory=dict)
+    node_statuses: Dict[str, str] = field(default_factory=dict)
+    extra: Dict[str, Any] = field(default_factory=dict)
+    updates: int = 0
+    attempts: int = 0
+
+    def merge(self, newer: "_PendingExecution") -> None:
+        """Apply updates that were queued after this batch."""
+        self.workflow_id = self.workflow_id or newer.workflow_id
+        self.snapshot = self.snapshot or newer.snapshot
+        self.status = newer.status or self.status
+        self.node_results.update(newer.node_results)
+        self.node_statuses.update(newer.node_statuses)
+        self.extra.update(newer.extra)
+        self.updates += newer.updates
+
+
+class ExecutionPersistence:
+    """Batched, non-blocking write-behind queue for WorkflowExecution records."""
+
+    def __init__(
+        self,
+        flush_interval: float = 0.5,
+        max_batch_size: int = 200,
+        checkpoint_interval: float = 0.2,
+        max_retries: int = 5,
+        max_backoff: float = 30.0,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            flush_interval: Seconds between background flushes
+            max_batch_size: Number of pending updates that triggers an early flush
+            checkpoint_interval: Minimum seconds between flushes triggered by
+                checkpoints
+            max_retries: Failed writes of an update before it is dropped
+            max_backoff: Upper bound in seconds of the delay between retries
+            session_factory: Factory for database sessions
+        """
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.checkpoint_interval = checkpoint_interval
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.session_factory = session_factory
+        self._pending: Dict[str, _PendingExecution] = {}
+        self._pending_updates = 0
+        self._last_flush = 0.0
+        self._failures = 0
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self._flusher is None or self._flusher.done():
+            self._flush_lock = asyncio.Lock()
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.create_task(self._run_flusher())
+
+    async def stop(self) -> None:
+        """Stop the background flusher and write everything still pending."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    def create_execution(
+        self,
+        execution_id: str,
+        workflow_id: str,
+        snapshot: Dict[str, Any],
+        status: str,
+    ) -> None:
+        """
+        Queue the creation of an execution record.
+
+        Args:
+            execution_id: ID of the new execution
+            workflow_id: The unique identifier of the workflow
+            snapshot: The nodes and edges the execution runs with
+            status: Initial execution status
+        """
+        pending = self._get_pending(execution_id)
+        pending.workflow_id = workflow_id
+        pending.snapshot = snapshot
+        pending.status = status
+
+    def record_node_result(
+        self,
+        execution_id: str,
+        node_id: str,
+        result: Dict,
+        node_status: str,
+        checkpoint: bool = False,
+    ) -> None:
+        """
+        Queue a node result for an execution.
+
+        Args:
+            execution_id: ID of the execution
+            node_id: ID of the node
+            result: The node's result dictionary
+            node_status: The node's final status
+            checkpoint: Flush as soon as possible so the result survives a
+                crash and the execution can resume after it
+        """
+        pending = self._get_pending(execution_id)
+        pending.node_results[node_id] = result
+        pending.node_statuses[node_id] = node_status
+        if checkpoint and self._wakeup is not None:
+            self._wakeup.set()
+
+    def record_node_hashes(
+        self, execution_id: str, node_hashes: Dict[str, str]
+    ) -> None:
+        """
+        Queue the content hashes an execution's nodes ran with, so incremental
+        runs can tell which nodes are unchanged.
+
+        Args:
+            execution_id: ID of the execution
+            node_hashes: Content hashes keyed by node ID
+        """
+        self._get_pending(execution_id).extra["node_hashes"] = node_hashes
+
+    def heartbeat(self, execution_id: str) -> None:
+        """
+        Queue a heartbeat that refreshes an execution's ``updatedAt``, so
+        other workers do not treat a long-running execution as abandoned.
+        """
+        self._get_pending(execution_id)
+
+    def update_status(
+        self,
+        execution_id: str,
+        status: str,
+        node_statuses: Optional[Dict[str, str]] = None,
+        **extra: Any,
+    ) -> None:
+        """
+        Queue a status change for an execution.
+
+        Args:
+            execution_id: ID of the execution
+            status: New execution status
+            node_statuses: Optional statuses of all nodes
+            **extra: Additional top-level fields stored in the result (e.g. error)
+        """
+        pending = self._get_pending(execution_id)
+        pending.status = status
+        if node_statuses:
+            pending.node_statuses.update(node_statuses)
+        pending.extra.update(extra)
+
+    async def flush(self) -> None:
+        """Write all pending updates in one batch without blocking the loop."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            self._pending_updates = 0
+            self._last_flush = time.monotonic()
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+                failed: Dict[str, Exception] = {}
+            except Exception as e:
+                # Write the executions one by one so a single bad execution
+                # does not hold back the others
+                if len(batch) > 1:
+                    failed = await asyncio.to_thread(self._write_each, batch)
+                else:
+                    failed = dict.fromkeys(batch, e)
+            if not failed:
+                self._failures = 0
+                return
+            self._failures += 1
+            # Re-queue failed executions underneath anything queued meanwhile
+            for execution_id, error in failed.items():
+                pending = batch[execution_id]
+                pending.attempts += 1
+                if pending.attempts >= self.max_retries:
+                    logger.error(
+                        f"Dropping {pending.updates} update(s) for execution "
+                        f"{execution_id} after {pending.attempts} failed writes: "
+                        f"{str(error)}"
+                    )
+                    continue
+                logger.error(
+                    f"Failed to persist execution {execution_id}, will retry: "
+                    f"{str(error)}"
+                )
+                newer = self._pending.get(execution_id)
+                if newer is not None:
+                    pending.merge(newer)
+                    self._pending_updates -= newer.updates
+                self._pending[execution_id] = pending
+                self._pending_updates += pending.updates
+
+    def _get_pending(self, execution_id: str) -> _PendingExecution:
+        pending = self._pending.get(execution_id)
+        if pending is None:
+            pending = self._pending[execution_id] = _PendingExecution()
+        pending.updates += 1
+        self._pending_updates += 1
+        if self._pending_updates >= self.max_batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return pending
+
+    def _retry_delay(self) -> float:
+        """Seconds to wait before retrying after consecutive failed writes."""
+        if not self._failures:
+            return 0.0
+        return min(self.flush_interval * 2**self._failures, self.max_backoff)
+
+    async def _run_flusher(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                woken = True
+            except asyncio.TimeoutError:
+                woken = False
+            self._wakeup.clear()
+            if woken and self._pending_updates < self.max_batch_size:
+                # Woken by a checkpoint: throttle to one flush per interval
+                delay = self._last_flush + self.checkpoint_interval - time.monotonic()
+            else:
+                delay = 0.0
+            delay = max(
+                delay, self._last_flush + self._retry_delay() - time.monotonic()
+            )
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.flush()
+
+    def _write_each(self, batch: Dict[str, _PendingExecution]) -> Dict[str, Exception]:
+        """
+        Write each execution of a batch in its own transaction.
+
+        Returns:
+            The errors of the executions that failed, keyed by execution ID
+        """
+        failed = {}
+        for execution_id, pending in batch.items():
+            try:
+                self._write_batch({execution_id: pending})
+            except Exception as e:
+                failed[execution_id] = e
+        return failed
+
+    def _write_batch(self, batch: Dict[str, _PendingExecution]) -> None:
+        """Apply a batch of coalesced updates in a single transaction."""
+        db = self.session_factory()
+        try:
+            existing = {
+                execution.id: execution
+                for execution in ExecutionHistoryService.get_executions_by_ids(
+                    db, list(batch.keys())
+                )
+            }
+            for execution_id, pending in batch.items():
+                execution = existing.get(execution_id)
+                if execution is None:
+                    if pending.workflow_id is None:
+                        logger.warning(
+                            f"Dropping updates for unknown execution {execution_id}"
+                        )
+                        continue
+                    execution = ExecutionHistoryService.create_execution(
+                        db,
+                        pending.workflow_id,
+                        snapshot=pending.snapshot or {},
+                        status=pending.status or "running",
+                        result={"results": {}, "node_statuses": {}},
+                        execution_id=execution_id,
+                        commit=False,
+                    )
+
+                result = dict(execution.result or {})
+                result["results"] = {
+                    **result.get("results", {}),
+                    **pending.node_results,
+                }
+                result["node_statuses"] = {
+                    **result.get("node_statuses", {}),
+                    **pending.node_statuses,
+                }
+                result.update(pending.extra)
+                # Reassign so SQLAlchemy detects the JSON change
+                execution.result = result
+                if pending.status:
+                    execution.status = pending.status
+                execution.updatedAt = func.now()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# Create a singleton instance
+execution_persistence = ExecutionPersistence(
+    flush_interval=settings.EXECUTION_PERSISTENCE_FLUSH_INTERVAL,
+    max_batch_size=settings.EXECUTION_PERSISTENCE_MAX_BATCH_SIZE,
+    checkpoint_interval=settings.EXECUTION_PERSISTENCE_CHECKPOINT_INTERVAL,
+    max_retries=settings.EXECUTION_PERSISTENCE_MAX_RETRIES,
+    max_backoff=settings.EXECUTION_PERSISTENCE_MAX_BACKOFF,
+)
@@ -0,0 +1,197 @@
+"""
+Concurrency limiting for workflow node execution.
+
+Limits are expressed as named keys (global, per node type, per provider/model).
+A node must hold a slot on every key it maps to before it runs. Waiting nodes
+are queued per workflow and granted round-robin, so one large fan-out cannot
+starve other workflows running in the same process.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_KEY = "global"
+
+
+def type_key(node_type: str) -> str:
+    """Limit key for a node type (e.g. ``llm``, ``ocr``, ``api_call``)."""
+    return f"type:{node_type}"
+
+
+def model_key(provider: str, model: str) -> str:
+    """Limit key for a provider/model pair (e.g. ``openai:gpt-4o``)."""
+    return f"model:{provider}:{model}"
+
+
+def node_limit_keys(node: Dict) -> List[str]:
+    """
+    Get the limit keys a node must acquire before executing.
+
+    Args:
+        node: Node object from the frontend
+
+    Returns:
+        The global key, the node type key and, for nodes that configure a
+        provider and model, the provider/model key
+    """
+    data = node.get("data", {})
+    config = data.get("config", {}) or {}
+    keys = [GLOBAL_KEY, type_key(data.get("type", ""))]
+    if config.get("provider") and config.get("model"):
+        keys.append(model_key(config["provider"], config["model"]))
+    return keys
+
+
+@dataclass(eq=False)
+class _Waiter:
+    keys: Sequence[str]
+    future: asyncio.Future
+
+
+class NodeConcurrencyLimiter:
+    """
+    Bounds concurrent node executions with fair queuing across workflows.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            limits: Mapping of limit key to maximum concurrent holders. Keys
+                without a positive limit are unbounded.
+        """
+        self.limits: Dict[str, int] = {
+            key: limit for key, limit in (limits or {}).items() if limit > 0
+        }
+        self._in_use: Dict[str, int] = defaultdict(int)
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+
+    def set_limit(self, key: str, limit: int) -> None:
+        """Set or remove (``limit <= 0``) the limit for a key."""
+        if limit > 0:
+            self.limits[key] = limit
+        else:
+            self.limits.pop(key, None)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, workflow_id: str, keys: Sequence[str]) -> AsyncIterator[None]:
+        """Hold a slot on every key for the duration of the context."""
+        await self.acquire(workflow_id, keys)
+        try:
+            yield
+        finally:
+            self.release(keys)
+
+    async def acquire(self, workflow_id: str, keys: Sequence[str]) -> None:
+        """
+        Wait until a slot is available on every key.
+
+        Args:
+            workflow_id: Workflow the request belongs to, used for fair queuing
+            keys: Limit keys to acquire
+        """
+        if not self._queues and self._fits(keys):
+            self._take(keys)
+            return
+
+        waiter = _Waiter(keys, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(workflow_id, deque()).append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted and cancelled in the same tick: hand the slot back
+                self.release(keys)
+            else:
+                self._discard(workflow_id, waiter)
+            raise
+
+    def release(self, keys: Sequence[str]) -> None:
+        """Release a slot on every key and wake the next eligible waiters."""
+        for key in keys:
+            self._in_use[key] -= 1
+            if self._in_use[key] <= 0:
+                del self._in_use[key]
+        self._dispatch()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get queue-depth and utilization metrics.
+
+        Returns:
+            Dictionary with configured limits, slots in use, and queue depth in
+            total, per workflow and per limit key
+        """
+        depth_by_workflow = {wf: len(queue) for wf, queue in self._queues.items()}
+        depth_by_key: Dict[str, int] = defaultdict(int)
+        for queue in self._queues.values():
+            for waiter in queue:
+                for key in waiter.keys:
+                    depth_by_key[key] += 1
+
+        return {
+            "limits": dict(self.limits),
+            "in_use": dict(self._in_use),
+            "queue_depth": sum(depth_by_workflow.values()),
+            "queue_depth_by_workflow": depth_by_workflow,
+            "queue_depth_by_key": dict(depth_by_key),
+        }
+
+    def _fits(self, keys: Sequence[str]) -> bool:
+        return all(
+            self._in_use[key] < self.limits[key] for key in keys if key in self.limits
+        )
+
+    def _take(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            self._in_use[key] += 1
+
+    def _discard(self, workflow_id: str, waiter: _Waiter) -> None:
+        queue = self._queues.get(workflow_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+        if not queue:
+            del self._queues[workflow_id]
+
+    def _dispatch(self) -> None:
+        """
+        Grant slots to queued waiters, one per workflow per round.
+
+        Within a workflow the first waiter that fits is granted, so a node
+        blocked on a saturated model key does not hold back other node types.
+        """
+        granted = True
+        while granted and self._queues:
+            granted = False
+            for workflow_id in list(self._queues):
+                queue = self._queues[workflow_id]
+                waiter = next(
+                    (w for w in queue if not w.future.done() and self._fits(w.keys)),
+                    None,
+                )
+                if waiter is None:
+                    continue
+
+                queue.remove(waiter)
+                self._take(waiter.keys)
+                waiter.future.set_result(None)
+                granted = True
+
+                if queue:
+                    self._queues.move_to_end(workflow_id)
+                else:
+                    del self._queues[workflow_id]
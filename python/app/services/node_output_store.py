@@ -0,0 +1,221 @@
+"""
+Server-side store for large node outputs sent to clients by reference.
+
+Execution events carry node results to every connected client. Results whose
+output serializes to at least ``NODE_OUTPUT_OFFLOAD_MIN_BYTES`` are sent with
+a preview in place of the output (long strings and lists truncated) and an
+``output_ref`` pointing to the REST endpoint serving the full output in pages.
+
+The store keeps outputs in memory, least recently used first out once
+``NODE_OUTPUT_STORE_MAX_BYTES`` is exceeded. Outputs evicted from it are
+still served from the persisted execution record. The endpoint reads the store
+from the threadpool while the event loop writes to it, so access is locked.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.websocket_encoding import dumps
+
+logger = logging.getLogger(__name__)
+
+# Items kept from lists in previews
+PREVIEW_LIST_ITEMS = 3
+# Outputs found too small to offload, remembered so results sent again in
+# later events are not serialized again
+SMALL_OUTPUTS_REMEMBERED = 1024
+
+
+def output_url(execution_id: str, node_id: str) -> str:
+    """Path of the endpoint serving a node's full output."""
+    return f"{settings.API_V1_STR}/executions/{execution_id}/nodes/{node_id}/output"
+
+
+def preview(value: Any, max_chars: int) -> Any:
+    """
+    Shrink a value for display, keeping its structure.
+
+    Strings longer than ``max_chars`` and lists longer than
+    ``PREVIEW_LIST_ITEMS`` are truncated; dicts are previewed recursively.
+    """
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars] + "…"
+    if isinstance(value, list):
+        return [preview(item, max_chars) for item in value[:PREVIEW_LIST_ITEMS]]
+    if isinstance(value, dict):
+        return {key: preview(item, max_chars) for key, item in value.items()}
+    return value
+
+
+def page(output: Any, path: Optional[str], offset: int, limit: int) -> Dict:
+    """
+    Select a page of an output.
+
+    Args:
+        output: The full output
+        path: Dotted path of the value to page through (dict keys or list
+            indices); the whole output if None
+        offset: Index of the first character or item
+        limit: Maximum number of characters or items
+
+    Returns:
+        The value, sliced if it is a string or a list, with its total length
+
+    Raises:
+        KeyError: If the path does not exist in the output
+    """
+    value = output
+    for segment in path.split(".") if path else []:
+        if isinstance(value, dict) and segment in value:
+            value = value[segment]
+        elif (
+            isinstance(value, list) and segment.isdigit() and int(segment) < len(value)
+        ):
+            value = value[int(segment)]
+        else:
+            raise KeyError(segment)
+
+    if isinstance(value, (str, list)):
+        return {
+            "path": path,
+            "total": len(value),
+            "offset": offset,
+            "limit": limit,
+            "value": value[offset : offset + limit],
+        }
+    return {"path": path, "value": value}
+
+
+class _Entry:
+    __slots__ = ("output", "size", "light_result")
+
+    def __init__(self, output: Any, size: int, light_result: Dict):
+        self.output = output
+        self.size = size
+        self.light_result = light_result
+
+
+class NodeOutputStore:
+    """In-memory LRU store of offloaded node outputs, bounded by size."""
+
+    def __init__(
+        self,
+        min_bytes: int = 32 * 1024,
+        preview_chars: int = 500,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            min_bytes: Outputs at least this large are offloaded (0 disables)
+            preview_chars: Length strings are truncated to in previews
+            max_bytes: Total size of the stored outputs
+        """
+        self.min_bytes = min_bytes
+        self.preview_chars = preview_chars
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._small: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.offloaded = 0
+
+    def offload(self, execution_id: str, result: Dict) -> Dict:
+        """
+        Get the result to send to clients in place of a node result.
+
+        Args:
+            execution_id: ID of the execution the result belongs to
+            result: The node result, which is not modified
+
+        Returns:
+            The result itself if its output is small, otherwise a copy whose
+            output is a preview and whose ``output_ref`` locates the output
+        """
+        output = result.get("output")
+        if self.min_bytes <= 0 or not output or "node_id" not in result:
+            return result
+        key = (execution_id, result["node_id"])
+        with self._lock:
+            if self._small.get(key) is output:
+                return result
+            entry = self._entries.get(key)
+            if entry is not None and entry.output is output:
+                self._entries.move_to_end(key)
+                return entry.light_result
+
+        size = len(dumps(output).encode())
+        if size < self.min_bytes:
+            with self._lock:
+                self._small[key] = output
+                self._small.move_to_end(key)
+                if len(self._small) > SMALL_OUTPUTS_REMEMBERED:
+                    self._small.popitem(last=False)
+            return result
+        light_result = {
+            **result,
+            "output": preview(output, self.preview_chars),
+            "output_ref": {
+                "execution_id": execution_id,
+                "node_id": result["node_id"],
+                "size": size,
+                "url": output_url(execution_id, result["node_id"]),
+            },
+        }
+        with self._lock:
+            self._store(key, _Entry(output, size, light_result))
+            self.offloaded += 1
+        return light_result
+
+    def offload_results(self, execution_id: str, results: Dict[str, Dict]) -> Dict:
+        """Offload every result of a ``results`` mapping keyed by node id."""
+        return {
+            node_id: self.offload(execution_id, result)
+            for node_id, result in results.items()
+        }
+
+    def get(self, execution_id: str, node_id: str) -> Optional[Any]:
+        """
+        Get an offloaded output.
+
+        Returns:
+            The full output, or None if it is not in the store
+        """
+        with self._lock:
+            entry = self._entries.get((execution_id, node_id))
+            if entry is None:
+                return None
+            self._entries.move_to_end((execution_id, node_id))
+            return entry.output
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number and total size of stored outputs."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "offloaded": self.offloaded,
+            }
+
+    def _store(self, key: Tuple[str, str], entry: _Entry) -> None:
+        """Add an entry and evict the least recently used; call with the lock."""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._total_bytes -= previous.size
+        self._entries[key] = entry
+        self._total_bytes += entry.size
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= evicted.size
+
+
+# Create a singleton instance
+node_output_store = NodeOutputStore(
+    min_bytes=settings.NODE_OUTPUT_OFFLOAD_MIN_BYTES,
+    preview_chars=settings.NODE_OUTPUT_PREVIEW_CHARS,
+    max_bytes=settings.NODE_OUTPUT_STORE_MAX_BYTES,
+)
@@ -0,0 +1,324 @@
+"""
+Content-addressed cache for deterministic node execution results.
+
+Results are keyed by a stable hash of the node type, its ``data.config`` and
+the hashes of its upstream nodes, so a cached entry is only reused when the
+node and everything it depends on are unchanged. Lookups go through an
+in-memory LRU tier first and fall back to a disk tier with TTL and size-based
+eviction.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.services.file_service import FileService
+
+logger = logging.getLogger(__name__)
+
+# Config keys that control execution behaviour but do not affect the output
+NON_SEMANTIC_CONFIG_KEYS = {"cache"}
+
+
+def input_file_fingerprint(node: Dict) -> Optional[List]:
+    """
+    Fingerprint the input files of a node that reads ``file_path`` or
+    ``file_ids``, so its hash changes when a file is replaced in place.
+
+    Blocking (file stats and a database lookup); run it in a worker thread.
+
+    Args:
+        node: Node object from the frontend
+
+    Returns:
+        Path, size and modification time of every input file (None for files
+        that do not exist), or None if the node reads no files
+    """
+    config = node.get("data", {}).get("config", {}) or {}
+    paths = [config["file_path"]] if config.get("file_path") else []
+    file_ids = config.get("file_ids") or []
+    if not paths and not file_ids:
+        return None
+
+    if file_ids:
+        db = SessionLocal()
+        try:
+            files = {
+                file.id: file.path
+                for file in FileService.get_files_by_ids(db, file_ids)
+            }
+        finally:
+            db.close()
+        paths.extend(files.get(file_id) for file_id in file_ids)
+
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError):
+            fingerprint.append([path, None])
+            continue
+        fingerprint.append([path, stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+def compute_node_hash(
+    node: Dict,
+    upstream_hashes: Sequence[str],
+    input_fingerprint: Optional[List] = None,
+) -> str:
+    """
+    Compute the content hash of a node.
+
+    Args:
+        node: Node object from the frontend
+        upstream_hashes: Hashes of the node's direct predecessors
+        input_fingerprint: Fingerprint of the node's input files, see
+            ``input_file_fingerprint``
+
+    Returns:
+        Hex digest identifying the node's type, config and upstream inputs
+    """
+    data = node.get("data", {})
+    config = {
+        key: value
+        for key, value in (data.get("config", {}) or {}).items()
+        if key not in NON_SEMANTIC_CONFIG_KEYS
+    }
+    content = {
+        "type": data.get("type"),
+        "config": config,
+        "upstream": sorted(upstream_hashes),
+    }
+    if input_fingerprint is not None:
+        content["inputs"] = input_fingerprint
+    payload = json.dumps(
+        content,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(node: Dict) -> bool:
+    """Whether the node opted in to result caching via ``data.config.cache``."""
+    config = node.get("data", {}).get("config", {}) or {}
+    return bool(config.get("cache", False))
+
+
+class MemoryCacheTier:
+    """In-memory LRU tier with per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.time() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def set(self, key: str, result: Dict, stored_at: Optional[float] = None) -> None:
+        self._entries[key] = (stored_at or time.time(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCacheTier:
+    """
+    Disk tier storing one JSON file per entry.
+
+    Entries older than the TTL are ignored and removed on access. When the
+    total size exceeds ``max_bytes`` the least recently written entries are
+    evicted. Methods are blocking and are meant to run in a worker thread.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float, max_bytes: int):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._total_bytes: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Tuple[float, Dict]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {str(e)}")
+            self._remove(path)
+            return None
+
+        if time.time() - entry["stored_at"] > self.ttl_seconds:
+            self._remove(path)
+            return None
+        return entry["stored_at"], entry["result"]
+
+    def set(self, key: str, result: Dict, stored_at: float) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({"stored_at": stored_at, "result": result}, default=str)
+
+        previous_size = path.stat().st_size if path.exists() else 0
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self._ensure_total()
+        self._total_bytes += len(data.encode("utf-8")) - previous_size
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def clear(self) -> None:
+        for path in self._entries():
+            self._remove(path)
+        self._total_bytes = 0
+
+    def _entries(self):
+        if not self.directory.exists():
+            return []
+        return list(self.directory.glob("*/*.json"))
+
+    def _ensure_total(self) -> None:
+        if self._total_bytes is None:
+            self._total_bytes = sum(p.stat().st_size for p in self._entries())
+
+    def _remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        if self._total_bytes is not None:
+            self._total_bytes -= size
+
+    def _evict(self) -> None:
+        """Remove expired entries, then the oldest ones until under the cap."""
+        now = time.time()
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path))
+        entries.sort()
+
+        for mtime, path in entries:
+            if now - mtime > self.ttl_seconds or self._total_bytes > self.max_bytes:
+                self._remove(path)
+
+
+class NodeResultCache:
+    """Two-tier node result cache (memory LRU in front of disk)."""
+
+    def __init__(
+        self,
+        max_memory_entries: int = 1024,
+        directory: Optional[str] = None,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_memory_entries: Maximum number of entries kept in memory
+            directory: Directory for the disk tier. If None, only memory is used.
+            ttl_seconds: Time-to-live for entries in both tiers
+            max_disk_bytes: Size cap for the disk tier
+        """
+        self.memory = MemoryCacheTier(max_memory_entries, ttl_seconds)
+        self.disk = (
+            DiskCacheTier(directory, ttl_seconds, max_disk_bytes) if directory else None
+        )
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached result.
+
+        Returns:
+            A copy of the cached result, or None on a miss
+        """
+        result = self.memory.get(key)
+        if result is None and self.disk is not None:
+            try:
+                entry = await asyncio.to_thread(self.disk.get, key)
+            except Exception as e:
+                logger.warning(f"Node result cache read failed: {str(e)}")
+                entry = None
+            if entry is not None:
+                stored_at, result = entry
+                self.memory.set(key, result, stored_at)
+
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy(result)
+
+    async def set(self, key: str, result: Dict) -> None:
+        """Store a result in both tiers."""
+        stored_at = time.time()
+        result = copy.deepcopy(result)
+        self.memory.set(key, result, stored_at)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, key, result, stored_at)
+            except Exception as e:
+                logger.warning(f"Node result cache write failed: {str(e)}")
+
+    async def clear(self) -> None:
+        """Remove all entries from both tiers."""
+        self.memory.clear()
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.clear)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the number of in-memory entries."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+        }
+
+
+# Create a singleton instance
+node_result_cache = NodeResultCache(
+    max_memory_entries=settings.NODE_RESULT_CACHE_MEMORY_ENTRIES,
+    directory=settings.NODE_RESULT_CACHE_DIR,
+    ttl_seconds=settings.NODE_RESULT_CACHE_TTL_SECONDS,
+    max_disk_bytes=settings.NODE_RESULT_CACHE_MAX_BYTES,
+)
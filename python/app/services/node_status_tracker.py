@@ -0,0 +1,56 @@
+"""
+Node statuses of a running execution, reported to clients as patches.
+
+Clients receive a full snapshot (``node-status-update``) when an execution
+starts, when they connect and when they ask for a resync. Every later change
+is sent as a ``node-status-patch`` holding only the nodes whose status changed
+since the previous patch. Patches carry consecutive sequence numbers and a
+snapshot carries the number of the last patch it includes, so a client that
+sees a gap requests a resync.
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+
+class NodeStatusTracker(dict):
+    """Statuses keyed by node id that record which nodes changed."""
+
+    def __init__(self, execution_id: str, node_ids: Iterable[str], status: str):
+        super().__init__((node_id, status) for node_id in node_ids)
+        self.execution_id = execution_id
+        self.seq = 0
+        self._changes: Dict[str, str] = {}
+
+    def __setitem__(self, node_id: str, status: str) -> None:
+        if self.get(node_id) != status:
+            self._changes[node_id] = status
+        super().__setitem__(node_id, status)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for node_id, status in dict(*args, **kwargs).items():
+            self[node_id] = status
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Event data of a full snapshot of all node statuses."""
+        return {
+            "execution_id": self.execution_id,
+            "seq": self.seq,
+            "node_statuses": dict(self),
+        }
+
+    def mark_reported(self) -> None:
+        """Forget the recorded changes, once every client got a snapshot."""
+        self._changes.clear()
+
+    def take_patch(self) -> Optional[Dict[str, Any]]:
+        """
+        Event data of a patch with the changes since the previous patch.
+
+        Returns:
+            The patch, or None if no status changed
+        """
+        if not self._changes:
+            return None
+        self.seq += 1
+        changes, self._changes = self._changes, {}
+        return {"execution_id": self.execution_id, "seq": self.seq, "changes": changes}
@@ -0,0 +1,113 @@
+"""
+Streams of partial node outputs within a workflow execution.
+
+Executors that declare ``streams_output = True`` publish partial outputs
+(e.g. OCR pages) to a stream while they run. Executors that iterate over such
+streams declare a ``consumes_stream(config)`` hook; nodes for which it returns
+True are started as soon as a streaming predecessor starts and consume its
+stream instead of waiting for the final result.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+
+class NodeOutputStream:
+    """
+    Append-only stream of a running node's partial outputs.
+
+    Every consumer iterates over all items from the start, so consumers that
+    attach late miss nothing. The stream is closed with the node's final
+    result; a node served from the result cache closes its stream without
+    publishing items, so consumers should fall back to the final result.
+    """
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self._updated = asyncio.Event()
+        self._closed = False
+        self._result: Optional[Dict] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def append(self, item: Any) -> None:
+        """
+        Publish a partial output.
+
+        Items published after the stream was closed are dropped: a node
+        shared with other executions keeps running after the execution that
+        started it was cancelled and its streams discarded.
+        """
+        if self._closed:
+            return
+        self.items.append(item)
+        self._notify()
+
+    def close(self, result: Optional[Dict] = None) -> None:
+        """Close the stream with the node's final result."""
+        if not self._closed:
+            self._closed = True
+            self._result = result
+            self._notify()
+
+    def fail(self, error: BaseException) -> None:
+        """Close the stream because the node failed."""
+        if not self._closed:
+            self._closed = True
+            self._error = error
+            self._notify()
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        index = 0
+        while True:
+            updated = self._updated
+            while index < len(self.items):
+                yield self.items[index]
+                index += 1
+            if self._closed:
+                if self._error is not None:
+                    raise self._error
+                return
+            await updated.wait()
+
+    async def result(self) -> Optional[Dict]:
+        """Wait for the stream to close and return the node's final result."""
+        while not self._closed:
+            await self._updated.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _notify(self) -> None:
+        # Wake current waiters and give later ones a fresh event
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+
+class NodeStreamRegistry:
+    """Output streams of the nodes of active workflow executions."""
+
+    def __init__(self):
+        self._streams: Dict[Tuple[str, str], NodeOutputStream] = {}
+
+    def open(self, workflow_id: str, node_id: str) -> NodeOutputStream:
+        """Create the output stream for a node that is about to run."""
+        stream = self._streams[(workflow_id, node_id)] = NodeOutputStream()
+        return stream
+
+    def get(self, workflow_id: str, node_id: str) -> Optional[NodeOutputStream]:
+        """Get a node's output stream, or None if the node does not stream."""
+        return self._streams.get((workflow_id, node_id))
+
+    def discard(self, workflow_id: str) -> None:
+        """Close and drop all streams of a workflow's execution."""
+        for key in [key for key in self._streams if key[0] == workflow_id]:
+            stream = self._streams.pop(key)
+            stream.fail(asyncio.CancelledError())
+
+
+# Create a singleton instance
+node_streams = NodeStreamRegistry()
@@ -0,0 +1,96 @@
+"""
+Single-flight coalescing of identical node executions.
+
+When copies of the same workflow run concurrently, their identical nodes have
+the same content hash (see ``compute_node_hash``). The first execution of a
+hash runs the node; executions of the same hash that start while it is in
+flight await its result instead of calling the provider or running OCR again.
+Calls are grouped (by workflow execution) and never coalesced within a group,
+so identical sibling nodes of one workflow each run.
+
+The shared execution runs in its own task, so it is not cancelled with the
+workflow that started it; it is only cancelled once every waiter is gone.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False)
+class _Call:
+    task: asyncio.Task
+    waiters: int = 0
+    groups: Set[Hashable] = field(default_factory=set)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def joinable(self, key: str, group: Optional[Hashable] = None) -> bool:
+        """Whether a call with ``key`` is in flight and a caller of ``group`` may join it."""
+        call = self._calls.get(key)
+        return call is not None and (group is None or group not in call.groups)
+
+    async def run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        group: Optional[Hashable] = None,
+    ) -> Any:
+        """
+        Run ``fn``, or wait for the in-flight call with the same key.
+
+        Args:
+            key: Identity of the call (the node's content hash)
+            fn: Starts the call; only invoked if no call is in flight
+            group: Calls of the same group are never coalesced with each other
+
+        Returns:
+            The result of the (possibly shared) call
+        """
+        call = self._calls.get(key)
+        if call is not None and group is not None and group in call.groups:
+            return await fn()
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.create_task(fn()))
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"Joining in-flight execution {key[:12]}")
+
+        if group is not None:
+            call.groups.add(group)
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every waiter was cancelled
+                call.task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of executions and of calls that joined one."""
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+# Create a singleton instance
+node_single_flight = SingleFlight()
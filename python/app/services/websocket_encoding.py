@@ -0,0 +1,147 @@
+"""
+Wire encodings of websocket messages.
+
+Messages are sent as JSON text frames by default, serialized with orjson when
+it is installed. Clients can opt in to MessagePack binary frames with the
+``encoding=msgpack`` query parameter (requires ormsgpack or msgpack), and to
+zstd compression of payloads of at least ``WEBSOCKET_COMPRESSION_MIN_BYTES``
+with ``compression=zstd`` (requires zstandard). Compressed payloads are sent
+as binary frames and start with the zstd frame magic number.
+
+Clients that ask for nothing still get large payloads compressed through
+permessage-deflate, which uvicorn negotiates with browsers when
+``WEBSOCKET_PER_MESSAGE_DEFLATE`` is set.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Union
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ormsgpack
+except ImportError:
+    ormsgpack = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+Payload = Union[str, bytes]
+
+_zstd_compressor = None
+
+
+def dumps(message: Any) -> str:
+    """Serialize a message to JSON text."""
+    if orjson is not None:
+        return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(message)
+
+
+def loads(data: Payload) -> Any:
+    """Parse JSON text received from a client."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _packb(message: Any) -> bytes:
+    if ormsgpack is not None:
+        return ormsgpack.packb(message, option=ormsgpack.OPT_NON_STR_KEYS)
+    return msgpack.packb(message, use_bin_type=True)
+
+
+def _compress(payload: Payload) -> bytes:
+    global _zstd_compressor
+    if _zstd_compressor is None:
+        _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return _zstd_compressor.compress(payload)
+
+
+@dataclass(frozen=True)
+class WireEncoding:
+    """Serialization format and compression of one client's frames."""
+
+    format: str = "json"
+    compression: Optional[str] = None
+
+    @classmethod
+    def negotiate(cls, params: Mapping[str, str]) -> "WireEncoding":
+        """
+        Pick the encoding a client asked for in its connection query.
+
+        Requested formats or compressions whose library is not installed
+        fall back to JSON and no compression.
+
+        Args:
+            params: Query parameters of the websocket connection
+
+        Returns:
+            The encoding to use for the client
+        """
+        format = params.get("encoding", "json")
+        if format == "msgpack" and ormsgpack is None and msgpack is None:
+            logger.warning("MessagePack requested but not installed, using JSON")
+            format = "json"
+        elif format not in ("json", "msgpack"):
+            logger.warning(f"Unknown websocket encoding {format}, using JSON")
+            format = "json"
+
+        compression = params.get("compression")
+        if compression == "zstd" and zstandard is None:
+            logger.warning("zstd compression requested but not installed")
+            compression = None
+        elif compression not in (None, "zstd"):
+            logger.warning(f"Unknown websocket compression {compression}")
+            compression = None
+        return cls(format, compression)
+
+    def encode(self, message: Any) -> Payload:
+        """
+        Serialize a message for this encoding.
+
+        Returns:
+            Text for JSON frames, bytes for binary frames
+        """
+        payload: Payload = dumps(message) if self.format == "json" else _packb(message)
+        if (
+            self.compression == "zstd"
+            and len(payload) >= settings.WEBSOCKET_COMPRESSION_MIN_BYTES
+        ):
+            return _compress(payload)
+        return payload
+
+
+JSON = WireEncoding()
+
+
+class EncodedMessage:
+    """A message serialized at most once per encoding, shared by recipients."""
+
+    def __init__(self, message: Any):
+        self.message = message
+        self._payloads: Dict[WireEncoding, Payload] = {}
+
+    def payload(self, encoding: WireEncoding) -> Payload:
+        payload = self._payloads.get(encoding)
+        if payload is None:
+            payload = self._payloads[encoding] = encoding.encode(self.message)
+        return payload
@@ -1,10 +1,194 @@
-import json
+import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+from collections import deque
+from typing import Callable, Deque, Dict, List, Any, Optional
 from fastapi import WebSocket, WebSocketDisconnect
 
+from app.core.config import settings
+from app.services.websocket_encoding import (
+    JSON,
+    EncodedMessage,
+    Payload,
+    WireEncoding,
+)
+
 logger = logging.getLogger(__name__)
 
+# Events whose latest message supersedes earlier ones still queued for a client
+COALESCED_EVENTS = {"node-status-update"}
+
+# Events collected per workflow and sent together in one "batch" frame every
+# WEBSOCKET_FLUSH_INTERVAL; any other event (e.g. workflow-execution-completed)
+# first flushes the pending batch, so clients see events in order
+BATCHED_EVENTS = {
+    "node-status-patch",
+    "workflow-execution-progress",
+    "node-output-partial",
+    "node-output-delta",
+}
+
+
+def _merge_status_patches(first: Dict, second: Dict) -> Optional[Dict]:
+    if first["execution_id"] != second["execution_id"]:
+        return None
+    return {
+        "execution_id": second["execution_id"],
+        "from_seq": first.get("from_seq", first["seq"]),
+        "seq": second["seq"],
+        "changes": {**first["changes"], **second["changes"]},
+    }
+
+
+def _merge_progress(first: Dict, second: Dict) -> Optional[Dict]:
+    # Clients group results by layer
+    if first["current_layer"] != second["current_layer"]:
+        return None
+    return {
+        "current_layer": second["current_layer"],
+        "nodes_completed": first["nodes_completed"] + second["nodes_completed"],
+        "results": {**first["results"], **second["results"]},
+    }
+
+
+# Batched events merged into the previous pending message of the same event
+EVENT_MERGERS: Dict[str, Callable[[Dict, Dict], Optional[Dict]]] = {
+    "node-status-patch": _merge_status_patches,
+    "workflow-execution-progress": _merge_progress,
+}
+
+
+class EventBatch:
+    """Events of one workflow waiting for the next flush."""
+
+    def __init__(self, handle: asyncio.TimerHandle):
+        self.handle = handle
+        self.messages: List[Dict] = []
+
+    def add(self, message: Dict) -> bool:
+        """
+        Add a message to the batch.
+
+        Messages of a mergeable event are merged into the last pending
+        message when it is of the same event, so the batch keeps the order
+        the events were sent in.
+
+        Returns:
+            True if the message was merged into a pending one
+        """
+        event = message["event"]
+        merge = EVENT_MERGERS.get(event)
+        if merge is None:
+            self.messages.append(message)
+            return False
+        if self.messages and self.messages[-1]["event"] == event:
+            merged = merge(self.messages[-1]["data"], message["data"])
+            if merged is not None:
+                self.messages[-1] = {"event": event, "data": merged}
+                return True
+        self.messages.append(message)
+        return False
+
+    def frame(self) -> Dict:
+        """The message sent for the batch."""
+        if len(self.messages) == 1:
+            return self.messages[0]
+        return {"event": "batch", "data": self.messages}
+
+
+class ConnectionSender:
+    """
+    Bounded outbound queue of one connection, drained by its own writer task.
+
+    Enqueueing never waits on client I/O. A queued message of a coalesced event
+    is replaced in place by a newer message of the same event. A client whose
+    queue overflows, or whose send fails or times out, is dropped.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        workflow_id: Optional[str],
+        manager: "WebsocketManager",
+        max_queue: int,
+        send_timeout: float,
+        encoding: WireEncoding = JSON,
+    ):
+        self.websocket = websocket
+        self.workflow_id = workflow_id
+        self.manager = manager
+        self.encoding = encoding
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        # Entries are [coalesce key, payload] so queued payloads can be replaced
+        self._queue: Deque[List[Any]] = deque()
+        self._by_key: Dict[str, List[Any]] = {}
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._run())
+
+    def enqueue(self, payload: Payload, coalesce_key: Optional[str] = None) -> None:
+        """Queue a message, coalescing it or dropping a client that fell behind."""
+        if self._closed:
+            return
+        if coalesce_key is not None and coalesce_key in self._by_key:
+            self._by_key[coalesce_key][1] = payload
+            self.manager.coalesced += 1
+            return
+        if len(self._queue) >= self.max_queue:
+            logger.warning(
+                f"Dropping slow client of workflow {self.workflow_id}: "
+                f"{len(self._queue)} messages queued"
+            )
+            self.manager.drop(self)
+            return
+        entry = [coalesce_key, payload]
+        self._queue.append(entry)
+        if coalesce_key is not None:
+            self._by_key[coalesce_key] = entry
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        """Discard queued messages and stop the writer."""
+        self._closed = True
+        self._queue.clear()
+        self._by_key.clear()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    async def close(self) -> None:
+        """Stop the writer and close the connection."""
+        self.stop()
+        try:
+            await self.websocket.close(code=1013)
+        except Exception:
+            pass
+
+    async def _run(self) -> None:
+        while not self._closed:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            key, payload = entry = self._queue.popleft()
+            if key is not None and self._by_key.get(key) is entry:
+                del self._by_key[key]
+            if isinstance(payload, str):
+                send = self.websocket.send_text(payload)
+            else:
+                send = self.websocket.send_bytes(payload)
+            try:
+                await asyncio.wait_for(send, timeout=self.send_timeout)
+            except Exception as e:
+                logger.warning(
+                    f"Dropping client of workflow {self.workflow_id} after failed "
+                    f"send: {type(e).__name__} {str(e)}"
+                )
+                self.manager.drop(self)
+                return
+
 
 class WebsocketManager:
     def __init__(self):
@@ -12,19 +196,44 @@ class WebsocketManager:
         self.workflow_connections: Dict[str, List[WebSocket]] = {}
         # Global connections (not associated with a specific workflow)
         self.global_connections: List[WebSocket] = []
+        # Outbound queue and writer task of every connection
+        self.senders: Dict[WebSocket, ConnectionSender] = {}
+        # Events waiting for the next flush by workflow ID
+        self.batches: Dict[str, EventBatch] = {}
+        self.flush_interval = settings.WEBSOCKET_FLUSH_INTERVAL
+        self.coalesced = 0
+        self.dropped = 0
+        self.merged = 0
 
-    async def connect(self, websocket: WebSocket, workflow_id: Optional[str] = None):
+    async def connect(
+        self,
+        websocket: WebSocket,
+        workflow_id: Optional[str] = None,
+        encoding: WireEncoding = JSON,
+    ):
         """
         Connect a client to the WebSocket server
 
         Args:
             websocket: The WebSocket connection
             workflow_id: Optional workflow ID to associate this connection with
+            encoding: Wire encoding of the messages sent to the client
         """
         logger.debug(f"Connecting to workflow {workflow_id}")
         await websocket.accept()
         logger.debug(f"Accepted connection to workflow {workflow_id}")
 
+        sender = ConnectionSender(
+            websocket,
+            workflow_id,
+            self,
+            max_queue=settings.WEBSOCKET_SEND_QUEUE_SIZE,
+            send_timeout=settings.WEBSOCKET_SEND_TIMEOUT_SECONDS,
+            encoding=encoding,
+        )
+        self.senders[websocket] = sender
+        sender.start()
+
         if workflow_id:
             if workflow_id not in self.workflow_connections:
                 self.workflow_connections[workflow_id] = []
@@ -46,6 +255,10 @@ class WebsocketManager:
             websocket: The WebSocket connection
             workflow_id: Optional workflow ID this connection was associated with
         """
+        sender = self.senders.pop(websocket, None)
+        if sender is not None:
+            sender.stop()
+
         if workflow_id and workflow_id in self.workflow_connections:
             if websocket in self.workflow_connections[workflow_id]:
                 self.workflow_connections[workflow_id].remove(websocket)
@@ -63,51 +276,124 @@ class WebsocketManager:
                     f"Client disconnected from global channel. Remaining connections: {len(self.global_connections)}"
                 )
 
+    def drop(self, sender: ConnectionSender) -> None:
+        """Disconnect a client that cannot keep up and close its socket."""
+        if self.senders.get(sender.websocket) is not sender:
+            return
+        self.dropped += 1
+        self.disconnect(sender.websocket, sender.workflow_id)
+        asyncio.create_task(sender.close())
+
+    def send_to_connection(self, websocket: WebSocket, message: Any) -> None:
+        """
+        Queue a message for a single client
+
+        Args:
+            websocket: The WebSocket connection
+            message: The message to send (encoded for the client)
+        """
+        sender = self.senders.get(websocket)
+        if sender is not None:
+            sender.enqueue(sender.encoding.encode(message))
+
     async def send_message_to_workflow(self, workflow_id: str, message: Any):
         """
         Send a message to all clients connected to a specific workflow
 
+        The message is queued on every connection and this returns without
+        waiting for any client. Messages of the events in ``BATCHED_EVENTS``
+        are held for up to the flush interval and sent in a single frame.
+
         Args:
             workflow_id: The workflow ID
-            message: The message to send (will be converted to JSON)
+            message: The message to send (encoded once per client encoding)
         """
-        if workflow_id in self.workflow_connections:
-            message_json = json.dumps(message)
-            for connection in self.workflow_connections[workflow_id]:
-                try:
-                    logger.info(
-                        f"Reporting execution status for workflow {workflow_id}: {message}"
-                    )
-                    await connection.send_text(message_json)
-                except Exception as e:
-                    logger.error(f"Error sending message to client: {str(e)}")
-                    # We'll handle disconnection elsewhere
+        if workflow_id not in self.workflow_connections:
+            return
+        if (
+            self.flush_interval > 0
+            and isinstance(message, dict)
+            and message.get("event") in BATCHED_EVENTS
+        ):
+            batch = self.batches.get(workflow_id)
+            if batch is None:
+                handle = asyncio.get_running_loop().call_later(
+                    self.flush_interval, self.flush, workflow_id
+                )
+                batch = self.batches[workflow_id] = EventBatch(handle)
+            if batch.add(message):
+                self.merged += 1
+            return
+
+        self.flush(workflow_id)
+        self._send_to_workflow(workflow_id, message)
+
+    def flush(self, workflow_id: str) -> None:
+        """
+        Send the pending batch of a workflow now
+
+        Args:
+            workflow_id: The workflow ID
+        """
+        batch = self.batches.pop(workflow_id, None)
+        if batch is not None:
+            batch.handle.cancel()
+            self._send_to_workflow(workflow_id, batch.frame())
+
+    def _send_to_workflow(self, workflow_id: str, message: Any) -> None:
+        if workflow_id not in self.workflow_connections:
+            return
+        encoded = EncodedMessage(message)
+        logger.debug(
+            f"Reporting execution status for workflow {workflow_id}: "
+            f"{message.get('event') if isinstance(message, dict) else message}"
+        )
+        coalesce_key = self._coalesce_key(message)
+        # Copy, since dropping a client modifies the list
+        for connection in list(self.workflow_connections[workflow_id]):
+            sender = self.senders.get(connection)
+            if sender is not None:
+                sender.enqueue(encoded.payload(sender.encoding), coalesce_key)
 
     async def broadcast_message(self, message: Any):
         """
         Broadcast a message to all connected clients
 
         Args:
-            message: The message to broadcast (will be converted to JSON)
+            message: The message to broadcast (encoded once per client encoding)
         """
-        message_json = json.dumps(message)
+        encoded = EncodedMessage(message)
+        coalesce_key = self._coalesce_key(message)
+        for sender in list(self.senders.values()):
+            sender.enqueue(encoded.payload(sender.encoding), coalesce_key)
 
-        # Send to global connections
-        for connection in self.global_connections:
-            try:
-                await connection.send_text(message_json)
-            except Exception as e:
-                logger.error(f"Error broadcasting to global client: {str(e)}")
-
-        # Send to all workflow connections
-        for workflow_id, connections in self.workflow_connections.items():
-            for connection in connections:
-                try:
-                    await connection.send_text(message_json)
-                except Exception as e:
-                    logger.error(
-                        f"Error broadcasting to workflow {workflow_id} client: {str(e)}"
-                    )
+    async def close_all(self) -> None:
+        """Stop every writer task and close all connections."""
+        for batch in self.batches.values():
+            batch.handle.cancel()
+        self.batches.clear()
+        senders = list(self.senders.values())
+        self.senders.clear()
+        self.workflow_connections.clear()
+        self.global_connections.clear()
+        await asyncio.gather(*(sender.close() for sender in senders))
+
+    def stats(self) -> Dict[str, int]:
+        """Get connection, queue depth, batching, coalescing and drop counters."""
+        return {
+            "connections": len(self.senders),
+            "queued": sum(len(sender._queue) for sender in self.senders.values()),
+            "batched": sum(len(batch.messages) for batch in self.batches.values()),
+            "merged": self.merged,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+        }
+
+    @staticmethod
+    def _coalesce_key(message: Any) -> Optional[str]:
+        if isinstance(message, dict) and message.get("event") in COALESCED_EVENTS:
+            return message["event"]
+        return None
 
 
 # Create a singleton instance
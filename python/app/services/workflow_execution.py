@@ -1,10 +1,43 @@
 import asyncio
+import copy
+import functools
 import logging
-from typing import Dict, List, Any, Callable
-
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Callable, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.services.execution_history import ExecutionHistoryService
+from app.services.execution_persistence import execution_persistence
 from app.services.websocket_manager import websocket_manager
+from app.services.node_output_store import node_output_store
+from app.services.node_streams import node_streams
+from app.services.node_status_tracker import NodeStatusTracker
+from app.services.single_flight import node_single_flight
+from app.services.node_result_cache import (
+    compute_node_hash,
+    input_file_fingerprint,
+    is_cacheable,
+    node_result_cache,
+)
+from app.services.node_concurrency import (
+    GLOBAL_KEY,
+    NodeConcurrencyLimiter,
+    model_key,
+    node_limit_keys,
+    type_key,
+)
 from app.executors.llm_executor import LLMExecutor
+from app.executors.ocr_executor import OCRExecutor
 from app.executors.base_executor import BaseExecutor
+from app.executors.execution_backend import process_pool_backend
+from app.executors.llm_batching import llm_batch_dispatcher
+from app.executors.llm_client_pool import llm_client_pool
+from app.executors.llm_rate_limiter import llm_rate_limiter
+from app.executors.llm_response_cache import llm_response_cache
+from app.executors.llm_usage import aggregate_usage
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +49,32 @@ class NodeStatus:
     RUNNING = "running"
     SUCCEEDED = "succeeded"
     FAILED = "failed"
+    CACHED = "cached"
 
 
 # Global registry for node executors
 NODE_EXECUTORS: Dict[str, BaseExecutor] = {
     "llm": LLMExecutor,
+    "ocr": OCRExecutor,
 }
 
+# Global limiter bounding concurrent node executions across all workflows.
+# Each node holds a global slot, a slot for its node type and, when it
+# configures a provider and model, a slot for that model.
+node_concurrency_limiter = NodeConcurrencyLimiter(
+    {
+        GLOBAL_KEY: settings.NODE_CONCURRENCY_GLOBAL,
+        **{
+            type_key(node_type): limit
+            for node_type, limit in settings.NODE_CONCURRENCY_BY_TYPE.items()
+        },
+        **{
+            model_key(*provider_model.split(":", 1)): limit
+            for provider_model, limit in settings.NODE_CONCURRENCY_BY_MODEL.items()
+        },
+    }
+)
+
 
 # Example node executor functions
 async def execute_data_processor(
@@ -90,7 +142,9 @@ async def execute_email_sender(
     }
 
 
-async def execute_file_processor(node: Dict) -> Dict:
+async def execute_file_processor(
+    node: Dict, previous_results: Dict, workflow_id: str
+) -> Dict:
     """Execute file processor node"""
     node_id = node["id"]
     file_config = node.get("data", {}).get("config", {})
@@ -156,16 +210,148 @@ def get_registered_node_types() -> List[str]:
     return list(NODE_EXECUTORS.keys())
 
 
+def streams_output(node: Dict) -> bool:
+    """Whether the node's executor publishes partial outputs while it runs"""
+    executor = NODE_EXECUTORS.get(node.get("data", {}).get("type"))
+    return bool(getattr(executor, "streams_output", False))
+
+
+def consumes_stream(node: Dict) -> bool:
+    """Whether the node consumes streamed upstream output while it is produced"""
+    data = node.get("data", {})
+    executor = NODE_EXECUTORS.get(data.get("type"))
+    accepts_stream = getattr(executor, "consumes_stream", None)
+    return accepts_stream is not None and accepts_stream(data.get("config", {}) or {})
+
+
+def referenced_nodes(node: Dict) -> Set[str]:
+    """Ids referenced by the node's templates, if its executor has any"""
+    data = node.get("data", {})
+    executor = NODE_EXECUTORS.get(data.get("type"))
+    references = getattr(executor, "referenced_nodes", None)
+    if references is None:
+        return set()
+    return set(references(data.get("config", {}) or {}))
+
+
+def set_node_concurrency_limit(node_type: str, limit: int) -> None:
+    """Set the concurrency limit for a node type (0 removes the limit)"""
+    node_concurrency_limiter.set_limit(type_key(node_type), limit)
+    logger.info(f"Set concurrency limit for node type {node_type}: {limit}")
+
+
+def set_model_concurrency_limit(provider: str, model: str, limit: int) -> None:
+    """Set the concurrency limit for a provider/model pair (0 removes the limit)"""
+    node_concurrency_limiter.set_limit(model_key(provider, model), limit)
+    logger.info(f"Set concurrency limit for model {provider}:{model}: {limit}")
+
+
 class WorkflowExecutionService:
     def __init__(self):
         # Store active workflow executions by workflow ID
         self.active_executions: Dict[str, asyncio.Task] = {}
+        # Execution record IDs of the active executions by workflow ID
+        self.active_execution_ids: Dict[str, str] = {}
+        # Node statuses of the active executions by workflow ID
+        self.node_status_trackers: Dict[str, NodeStatusTracker] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._shutting_down = False
+
+    async def start(self) -> None:
+        """
+        Start background work: resume executions interrupted by a crash or
+        redeploy, and keep the records of active executions heartbeating so
+        other workers do not consider them abandoned.
+        """
+        self._shutting_down = False
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        if settings.EXECUTION_RESUME_ON_STARTUP:
+            try:
+                await self.resume_interrupted_executions()
+            except Exception as e:
+                logger.error(f"Failed to resume interrupted executions: {str(e)}")
+
+    async def stop(self) -> None:
+        """
+        Interrupt active executions so they can be resumed after restart.
+        """
+        self._shutting_down = True
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        tasks = list(self.active_executions.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def resume_interrupted_executions(self) -> List[str]:
+        """
+        Claim executions left behind by a stopped or crashed worker and
+        resume each one from its first incomplete node.
+
+        Returns:
+            IDs of the resumed executions
+        """
+        await execution_persistence.flush()
+        claimed = await asyncio.to_thread(self._claim_interrupted_executions)
+
+        resumed = []
+        for execution_id, workflow_id, snapshot, result in claimed:
+            if workflow_id in self.active_executions:
+                logger.info(
+                    f"Not resuming execution {execution_id}: workflow "
+                    f"{workflow_id} is already running"
+                )
+                execution_persistence.update_status(execution_id, "cancelled")
+                continue
+
+            logger.info(f"Resuming execution {execution_id} of workflow {workflow_id}")
+            self.active_execution_ids[workflow_id] = execution_id
+            self.active_executions[workflow_id] = asyncio.create_task(
+                self._execute_workflow_process(
+                    workflow_id,
+                    snapshot.get("nodes", []),
+                    snapshot.get("edges", []),
+                    execution_id=execution_id,
+                    checkpoint_results=(result or {}).get("results", {}),
+                )
+            )
+            resumed.append(execution_id)
+        return resumed
+
+    def _claim_interrupted_executions(self) -> List[Tuple[str, str, Dict, Dict]]:
+        """Claim resumable executions for this worker in one transaction."""
+        db = SessionLocal()
+        try:
+            executions = ExecutionHistoryService.claim_interrupted_executions(
+                db,
+                stale_before=datetime.now(timezone.utc)
+                - timedelta(seconds=settings.EXECUTION_STALE_AFTER_SECONDS),
+            )
+            return [
+                (
+                    execution.id,
+                    execution.workflowId,
+                    execution.snapshot,
+                    execution.result,
+                )
+                for execution in executions
+            ]
+        finally:
+            db.close()
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.EXECUTION_HEARTBEAT_INTERVAL)
+            for execution_id in list(self.active_execution_ids.values()):
+                execution_persistence.heartbeat(execution_id)
 
     async def execute_workflow(
         self,
         workflow_id: str,
         nodes: List[Dict],
         edges: List[Dict],
+        incremental: bool = False,
     ):
         """
         Execute a workflow by its ID using the provided nodes and edges.
@@ -174,142 +360,258 @@ class WorkflowExecutionService:
             workflow_id: The unique identifier of the workflow
             nodes: List of node objects from the frontend
             edges: List of edge objects from the frontend
-            reporter: Optional function to report execution status updates
+            incremental: Reuse results of nodes unchanged since the last
+                execution and only run the changed nodes and their descendants
 
         Returns:
-            A dictionary containing execution results
+            A dictionary with the start status and the ID of the execution record
         """
         if workflow_id in self.active_executions:
             old_task = self.active_executions[workflow_id]
             old_task.cancel()
             del self.active_executions[workflow_id]
 
+        execution_id = str(uuid.uuid4())
+        self.active_execution_ids[workflow_id] = execution_id
         execution_task = asyncio.create_task(
-            self._execute_workflow_process(workflow_id, nodes, edges)
+            self._execute_workflow_process(
+                workflow_id, nodes, edges, incremental, execution_id
+            )
         )
         self.active_executions[workflow_id] = execution_task
 
-        return {"status": "started", "workflow_id": workflow_id}
+        return {
+            "status": "started",
+            "workflow_id": workflow_id,
+            "execution_id": execution_id,
+        }
 
     async def _execute_workflow_process(
         self,
         workflow_id: str,
         nodes: List[Dict],
         edges: List[Dict],
+        incremental: bool = False,
+        execution_id: Optional[str] = None,
+        checkpoint_results: Optional[Dict[str, Dict]] = None,
     ) -> Dict:
         """
         Internal method to run the workflow execution process.
 
-        Performs topological sort and executes the workflow DAG layer by layer.
+        Nodes are scheduled from a ready queue: each node starts as soon as all
+        of its own predecessors have finished, instead of waiting for the whole
+        topological layer ahead of it to complete. In incremental mode, nodes
+        whose content hash matches the last recorded execution reuse its
+        results and only the dirty subgraph is scheduled.
+
+        The execution record and every node result are persisted through the
+        write-behind queue, so the run never waits on the database. When
+        resuming an interrupted execution, ``checkpoint_results`` holds the
+        node results persisted before the interruption; those nodes are not
+        run again.
+
+        A node whose executor consumes streams (``consumes_stream(config)``,
+        e.g. map-reduce LLM nodes setting ``stream_input``) does not wait for
+        predecessors whose executor streams its output: it is started as soon
+        as they start running and consumes their partial outputs from
+        ``node_streams``. Other nodes always wait for their predecessors'
+        final results.
+
+        Nodes are passed the results of their predecessors only. A workflow
+        whose node templates reference the output of a node that is not a
+        predecessor is rejected before any node runs.
         """
+        started_at = time.monotonic()
+        running: Dict[asyncio.Task, str] = {}
+        execution_results: Dict[str, Dict] = {}
+        execution_id = execution_id or str(uuid.uuid4())
+        node_statuses = NodeStatusTracker(
+            execution_id, (node["id"] for node in nodes), NodeStatus.NOT_START
+        )
+        self.node_status_trackers[workflow_id] = node_statuses
+        execution_persistence.create_execution(
+            execution_id,
+            workflow_id,
+            snapshot={"nodes": nodes, "edges": edges},
+            status="running",
+        )
         try:
             # Convert nodes and edges to a format suitable for processing
             node_map = {node["id"]: node for node in nodes}
 
             # Build adjacency list for DAG
-            graph: Dict[str, List[str]] = {node["id"]: [] for node in nodes}
-            in_degree: Dict[str, int] = {node["id"]: 0 for node in nodes}
-
-            for edge in edges:
-                source = edge["source"]
-                target = edge["target"]
-                graph[source].append(target)
-                in_degree[target] += 1
-
-            # Initialize all nodes as NOT_START
-            node_statuses = {node["id"]: NodeStatus.NOT_START for node in nodes}
+            graph, predecessors, in_degree = self._build_graph(nodes, edges)
+
+            # Layers are only used to validate the DAG and to label progress
+            # events with the depth of the completed node.
+            execution_layers = self._topological_sort(graph, dict(in_degree))
+            self._validate_references(node_map, predecessors)
+            node_layers = {
+                node_id: layer_idx
+                for layer_idx, layer in enumerate(execution_layers)
+                for node_id in layer
+            }
+            node_hashes = self._compute_node_hashes(
+                execution_layers,
+                node_map,
+                predecessors,
+                await self._fingerprint_input_files(nodes),
+            )
+            # Stored so later incremental runs compare against the hashes
+            # (and input file fingerprints) this execution ran with
+            execution_persistence.record_node_hashes(execution_id, node_hashes)
+
+            remaining_in_degree = dict(in_degree)
+
+            if checkpoint_results is not None:
+                # Resume from the checkpointed results of this execution
+                seeded_results = self._collect_seed_results(
+                    checkpoint_results,
+                    execution_layers,
+                    predecessors,
+                    lambda node_id: True,
+                )
+                logger.info(
+                    f"Resuming execution {execution_id} of workflow {workflow_id}: "
+                    f"{len(seeded_results)} of {len(nodes)} nodes already completed"
+                )
+            elif incremental:
+                # Seed results of nodes that are unchanged since the last execution
+                seeded_results = await self._load_reusable_results(
+                    workflow_id, execution_layers, node_hashes, predecessors
+                )
+                for node_id, result in seeded_results.items():
+                    execution_persistence.record_node_result(
+                        execution_id, node_id, result, NodeStatus.CACHED
+                    )
+                logger.info(
+                    f"Incremental run of workflow {workflow_id}: reusing "
+                    f"{len(seeded_results)} of {len(nodes)} node results"
+                )
+            else:
+                seeded_results = {}
+
+            for node_id, result in seeded_results.items():
+                execution_results[node_id] = result
+                node_statuses[node_id] = (
+                    NodeStatus.CACHED
+                    if result.get("cached") or result.get("reused")
+                    else NodeStatus.SUCCEEDED
+                )
+                for successor in graph[node_id]:
+                    remaining_in_degree[successor] -= 1
 
-            # Report initial node statuses
+            # Report initial node statuses; later changes are sent as patches
             await self._report_execution_status(
-                workflow_id,
-                "node-status-update",
-                {"node_statuses": node_statuses},
+                workflow_id, "node-status-update", node_statuses.snapshot()
             )
-
-            execution_layers = self._topological_sort(graph, in_degree)
-
-            execution_results = {}
-            for layer_idx, layer in enumerate(execution_layers):
-                layer_results = {}
-                logger.info(f"Executing layer {layer_idx + 1} with nodes: {layer}")
-
-                # Mark nodes in this layer as WAITING
-                for node_id in layer:
-                    node_statuses[node_id] = NodeStatus.WAITING
-
-                # Report node status updates
-                await self._report_execution_status(
-                    workflow_id,
-                    "node-status-update",
-                    {"node_statuses": node_statuses},
+            node_statuses.mark_reported()
+
+            scheduled = set(execution_results)
+            # Edges whose target started on the source's streamed output
+            streamed_edges = set()
+
+            def start_stream_consumers(node_id: str) -> None:
+                # The node holds its concurrency slots and is producing output,
+                # so its stream consumers no longer wait for it to finish
+                for successor in graph[node_id]:
+                    if consumes_stream(node_map[successor]):
+                        streamed_edges.add((node_id, successor))
+                        remaining_in_degree[successor] -= 1
+                        if remaining_in_degree[successor] == 0:
+                            schedule(successor)
+
+            def schedule(node_id: str) -> None:
+                scheduled.add(node_id)
+                node_statuses[node_id] = NodeStatus.WAITING
+                on_start = None
+                if streams_output(node_map[node_id]):
+                    node_streams.open(workflow_id, node_id)
+                    on_start = functools.partial(start_stream_consumers, node_id)
+                # Nodes only see the results of their predecessors
+                upstream_results = {
+                    predecessor: execution_results[predecessor]
+                    for predecessor in predecessors[node_id]
+                    if predecessor in execution_results
+                }
+                task = asyncio.create_task(
+                    self._run_node(
+                        workflow_id,
+                        node_map[node_id],
+                        upstream_results,
+                        node_statuses,
+                        node_hashes[node_id],
+                        on_start,
+                    )
                 )
+                running[task] = node_id
 
-                # Simulate execution of each node in the layer
-                execution_tasks = []
+            for node_id, degree in list(remaining_in_degree.items()):
+                if degree == 0 and node_id not in scheduled:
+                    schedule(node_id)
 
-                # Mark nodes as RUNNING
-                for node_id in layer:
-                    node_statuses[node_id] = NodeStatus.RUNNING
-                    node = node_map[node_id]
-                    task = asyncio.create_task(
-                        self._execute_node(
-                            workflow_id, node, execution_results, node_statuses
-                        )
-                    )
-                    execution_tasks.append((node_id, task))
+            await self._report_node_status_changes(workflow_id, node_statuses)
 
-                # Report node status updates
-                await self._report_execution_status(
-                    workflow_id,
-                    "node-status-update",
-                    {"node_statuses": node_statuses},
+            while running:
+                done, _ = await asyncio.wait(
+                    running.keys(), return_when=asyncio.FIRST_COMPLETED
                 )
 
-                # Wait for all tasks in the layer to complete
-                layer_has_error = False
-                for node_id, task in execution_tasks:
-                    result = await task
-                    layer_results[node_id] = result
+                completed: Dict[str, Dict] = {}
+                failed_nodes: List[str] = []
+                ready: List[str] = []
+                for task in done:
+                    node_id = running.pop(task)
+                    result = task.result()
+                    completed[node_id] = result
                     execution_results[node_id] = result
+                    self._close_node_stream(workflow_id, node_id, result)
 
                     # Check if this node failed
                     if result["status"] in ["error", "failed"]:
                         node_statuses[node_id] = NodeStatus.FAILED
-                        layer_has_error = True
+                        failed_nodes.append(node_id)
+                        execution_persistence.record_node_result(
+                            execution_id, node_id, result, NodeStatus.FAILED
+                        )
                         logger.error(
                             f"Node {node_id} failed: {result.get('error', result.get('result'))}"
                         )
-                    else:
-                        node_statuses[node_id] = NodeStatus.SUCCEEDED
+                        continue
 
-                # Report node status updates
-                await self._report_execution_status(
-                    workflow_id,
-                    "node-status-update",
-                    {"node_statuses": node_statuses},
-                )
-
-                # If any node in this layer failed, stop the entire workflow
-                if layer_has_error:
-                    # Cancel any remaining tasks if they exist
-                    for remaining_node_id, remaining_task in execution_tasks:
-                        if not remaining_task.done():
-                            remaining_task.cancel()
-
-                    # Mark remaining nodes as failed
-                    for remaining_layer in execution_layers[layer_idx + 1 :]:
-                        for remaining_node_id in remaining_layer:
-                            node_statuses[remaining_node_id] = NodeStatus.FAILED
+                    node_statuses[node_id] = (
+                        NodeStatus.CACHED
+                        if result.get("cached")
+                        else NodeStatus.SUCCEEDED
+                    )
+                    execution_persistence.record_node_result(
+                        execution_id,
+                        node_id,
+                        result,
+                        node_statuses[node_id],
+                        checkpoint=True,
+                    )
+                    for successor in graph[node_id]:
+                        if (node_id, successor) in streamed_edges:
+                            continue
+                        remaining_in_degree[successor] -= 1
+                        if remaining_in_degree[successor] == 0:
+                            ready.append(successor)
+
+                # If any node failed, stop the entire workflow
+                if failed_nodes:
+                    await self._cancel_tasks(running)
+
+                    # Mark every node that did not succeed as failed
+                    for node_id, status in node_statuses.items():
+                        if status not in (NodeStatus.SUCCEEDED, NodeStatus.CACHED):
+                            node_statuses[node_id] = NodeStatus.FAILED
 
                     # Report final node status updates
-                    await self._report_execution_status(
-                        workflow_id,
-                        "node-status-update",
-                        {"node_statuses": node_statuses},
-                    )
+                    await self._report_node_status_changes(workflow_id, node_statuses)
 
                     # Report workflow error
-                    error_message = f"Workflow execution stopped due to node failure(s) in layer {layer_idx + 1}"
+                    error_message = f"Workflow execution stopped due to failure of node(s): {', '.join(failed_nodes)}"
                     logger.error(
                         f"Workflow {workflow_id} execution failed: {error_message}"
                     )
@@ -319,53 +621,114 @@ class WorkflowExecutionService:
                         "workflow-execution-error",
                         {
                             "status": "error",
+                            "execution_id": execution_id,
                             "error": error_message,
-                            "failed_layer": layer_idx,
-                            "results": execution_results,
+                            "failed_layer": min(
+                                node_layers[node_id] for node_id in failed_nodes
+                            ),
+                            "failed_nodes": failed_nodes,
+                            "results": node_output_store.offload_results(
+                                execution_id, execution_results
+                            ),
                             "node_statuses": node_statuses,
                         },
                     )
 
+                    execution_persistence.update_status(
+                        execution_id, "error", node_statuses, error=error_message
+                    )
+
                     return {
                         "status": "error",
                         "error": error_message,
                         "results": execution_results,
                     }
 
+                # Start every successor whose predecessors have all finished
+                for node_id in ready:
+                    if node_id not in scheduled:
+                        schedule(node_id)
+
+                # Report node status updates
+                await self._report_node_status_changes(workflow_id, node_statuses)
+
                 await self._report_execution_status(
                     workflow_id,
                     "workflow-execution-progress",
                     {
-                        "current_layer": layer_idx,
-                        "nodes_completed": list(layer_results.keys()),
-                        "results": layer_results,
+                        "current_layer": max(
+                            node_layers[node_id] for node_id in completed
+                        ),
+                        "nodes_completed": list(completed.keys()),
+                        "results": node_output_store.offload_results(
+                            execution_id, completed
+                        ),
                     },
                 )
 
             logger.info(f"Workflow {workflow_id} execution completed")
 
+            execution_persistence.update_status(
+                execution_id, "completed", node_statuses
+            )
+
             await self._report_execution_status(
                 workflow_id,
                 "workflow-execution-completed",
                 {
                     "status": "completed",
-                    "results": execution_results,
+                    "execution_id": execution_id,
+                    "results": node_output_store.offload_results(
+                        execution_id, execution_results
+                    ),
                     "node_statuses": node_statuses,
+                    "usage": aggregate_usage(
+                        execution_results.values(), time.monotonic() - started_at
+                    ),
                 },
             )
 
             return {"status": "completed", "results": execution_results}
 
         except asyncio.CancelledError:
+            await self._cancel_tasks(running)
+            if self._shutting_down:
+                # Leave the execution resumable by the next worker
+                logger.info(f"Workflow {workflow_id} execution interrupted by shutdown")
+                execution_persistence.update_status(
+                    execution_id, "interrupted", node_statuses
+                )
+                await self._report_execution_status(
+                    workflow_id,
+                    "workflow-execution-error",
+                    {
+                        "status": "interrupted",
+                        "execution_id": execution_id,
+                        "error": "Workflow execution was interrupted by a server restart and will resume",
+                    },
+                )
+                raise
+
             logger.info(f"Workflow {workflow_id} execution was cancelled")
+            execution_persistence.update_status(
+                execution_id, "cancelled", node_statuses
+            )
             await self._report_execution_status(
                 workflow_id,
                 "workflow-execution-error",
-                {"status": "cancelled", "error": "Workflow execution was cancelled"},
+                {
+                    "status": "cancelled",
+                    "execution_id": execution_id,
+                    "error": "Workflow execution was cancelled",
+                },
             )
             raise  # Re-raise to properly handle the cancellation
         except Exception as e:
             logger.error(f"Error executing workflow {workflow_id}: {str(e)}")
+            await self._cancel_tasks(running)
+            execution_persistence.update_status(
+                execution_id, "error", node_statuses, error=str(e)
+            )
             await self._report_execution_status(
                 workflow_id,
                 "workflow-execution-error",
@@ -373,9 +736,336 @@ class WorkflowExecutionService:
             )
             return {"status": "error", "error": str(e)}
         finally:
-            # Clean up the active execution
-            if workflow_id in self.active_executions:
+            # Clean up the active execution unless a newer run replaced it
+            active = self.active_executions.get(workflow_id)
+            if active is asyncio.current_task():
                 del self.active_executions[workflow_id]
+                self.active_execution_ids.pop(workflow_id, None)
+            if self.node_status_trackers.get(workflow_id) is node_statuses:
+                del self.node_status_trackers[workflow_id]
+            if active is None or active is asyncio.current_task():
+                node_streams.discard(workflow_id)
+
+    async def _run_node(
+        self,
+        workflow_id: str,
+        node: Dict,
+        previous_results: Dict,
+        node_statuses: NodeStatusTracker,
+        node_hash: str,
+        on_start: Optional[Callable[[], None]] = None,
+    ) -> Dict:
+        """
+        Serve the node from the result cache, or wait for a concurrency slot
+        and execute it.
+
+        The node stays WAITING while queued and is reported as RUNNING once it
+        holds a slot on every limit it maps to, at which point ``on_start`` is
+        called. Nodes that opt in with ``data.config.cache`` are looked up by
+        content hash first and their successful results are stored afterwards.
+
+        Cacheable nodes of the types in ``SINGLE_FLIGHT_NODE_TYPES`` are
+        coalesced by content hash: while an identical node of another
+        execution is running, the node waits for its result instead of running
+        again. Only cacheable nodes are coalesced, since their configuration
+        declares that identical inputs may share a result; identical nodes of
+        the same execution always run separately (e.g. sampling fan-outs).
+        """
+        cacheable = is_cacheable(node)
+        if cacheable:
+            cached_result = await node_result_cache.get(node_hash)
+            if cached_result is not None:
+                logger.info(f"Node {node['id']} served from result cache")
+                cached_result["node_id"] = node["id"]
+                cached_result["cached"] = True
+                return cached_result
+
+        async def execute() -> Dict:
+            async with node_concurrency_limiter.slot(
+                workflow_id, node_limit_keys(node)
+            ):
+                await self._mark_running(workflow_id, node, node_statuses, on_start)
+                return await self._execute_node(
+                    workflow_id, node, previous_results, node_statuses
+                )
+
+        execution_id = node_statuses.execution_id
+        if (
+            not cacheable
+            or node["data"]["type"] not in settings.SINGLE_FLIGHT_NODE_TYPES
+        ):
+            result = await execute()
+        elif node_single_flight.joinable(node_hash, execution_id):
+            logger.info(f"Node {node['id']} joins an identical in-flight execution")
+            await self._mark_running(workflow_id, node, node_statuses, on_start)
+            result = copy.deepcopy(
+                await node_single_flight.run(node_hash, execute, execution_id)
+            )
+            result["node_id"] = node["id"]
+            result["shared"] = True
+            return result
+        else:
+            result = await node_single_flight.run(node_hash, execute, execution_id)
+
+        if cacheable and result["status"] not in ["error", "failed"]:
+            await node_result_cache.set(node_hash, result)
+        return result
+
+    async def _mark_running(
+        self,
+        workflow_id: str,
+        node: Dict,
+        node_statuses: NodeStatusTracker,
+        on_start: Optional[Callable[[], None]],
+    ) -> None:
+        node_statuses[node["id"]] = NodeStatus.RUNNING
+        if on_start is not None:
+            on_start()
+        await self._report_node_status_changes(workflow_id, node_statuses)
+
+    @staticmethod
+    def _validate_references(
+        node_map: Dict[str, Dict], predecessors: Dict[str, List[str]]
+    ) -> None:
+        """
+        Check that nodes only reference the outputs of their predecessors.
+
+        Referenced ids that are not nodes of the workflow are literal text.
+
+        Raises:
+            ValueError: If a node references a node it is not connected to
+        """
+        for node_id, node in node_map.items():
+            invalid = sorted(
+                (referenced_nodes(node) & node_map.keys()) - set(predecessors[node_id])
+            )
+            if invalid:
+                raise ValueError(
+                    f"Node {node_id} references the output of "
+                    f"{', '.join(invalid)}, which must be connected to it "
+                    "by an edge"
+                )
+
+    def _build_graph(
+        self, nodes: List[Dict], edges: List[Dict]
+    ) -> Tuple[Dict[str, List[str]], Dict[str, List[str]], Dict[str, int]]:
+        """
+        Build the adjacency list, predecessor lists and in-degrees of the DAG.
+        """
+        graph: Dict[str, List[str]] = {node["id"]: [] for node in nodes}
+        predecessors: Dict[str, List[str]] = {node["id"]: [] for node in nodes}
+        in_degree: Dict[str, int] = {node["id"]: 0 for node in nodes}
+
+        for edge in edges:
+            source = edge["source"]
+            target = edge["target"]
+            graph[source].append(target)
+            predecessors[target].append(source)
+            in_degree[target] += 1
+
+        return graph, predecessors, in_degree
+
+    async def _load_reusable_results(
+        self,
+        workflow_id: str,
+        execution_layers: List[List[str]],
+        node_hashes: Dict[str, str],
+        predecessors: Dict[str, List[str]],
+    ) -> Dict[str, Dict]:
+        """
+        Diff the submitted graph against the last recorded execution and
+        return the persisted results of nodes that can be reused.
+
+        A node is reused when its content hash (which covers its config and
+        everything upstream of it) is unchanged, its previous result
+        succeeded and all of its predecessors are reused as well.
+        """
+        try:
+            # Make sure executions still in the write-behind queue are visible
+            await execution_persistence.flush()
+            previous = await asyncio.to_thread(
+                self._fetch_latest_execution, workflow_id
+            )
+        except Exception as e:
+            logger.warning(
+                f"Could not load previous execution of workflow {workflow_id}, "
+                f"running all nodes: {str(e)}"
+            )
+            return {}
+        if previous is None:
+            return {}
+
+        snapshot, result = previous
+        previous_results = (result or {}).get("results", {})
+        if (result or {}).get("node_hashes"):
+            previous_hashes = result["node_hashes"]
+        else:
+            previous_hashes = self._hash_snapshot(workflow_id, snapshot)
+            if previous_hashes is None:
+                return {}
+
+        reused = self._collect_seed_results(
+            previous_results,
+            execution_layers,
+            predecessors,
+            lambda node_id: previous_hashes.get(node_id) == node_hashes[node_id],
+        )
+        return {
+            node_id: {**result, "reused": True} for node_id, result in reused.items()
+        }
+
+    def _hash_snapshot(
+        self, workflow_id: str, snapshot: Dict
+    ) -> Optional[Dict[str, str]]:
+        """
+        Hash the nodes of an execution recorded without its node hashes.
+
+        Input files are not fingerprinted, so nodes reading files never match
+        the current hashes and run again.
+        """
+        try:
+            previous_nodes = snapshot.get("nodes", [])
+            previous_graph, previous_predecessors, previous_in_degree = (
+                self._build_graph(previous_nodes, snapshot.get("edges", []))
+            )
+            previous_hashes = self._compute_node_hashes(
+                self._topological_sort(previous_graph, previous_in_degree),
+                {node["id"]: node for node in previous_nodes},
+                previous_predecessors,
+            )
+        except (KeyError, ValueError) as e:
+            logger.warning(
+                f"Ignoring unreadable snapshot of workflow {workflow_id}: {str(e)}"
+            )
+            return None
+        return previous_hashes
+
+    def _collect_seed_results(
+        self,
+        previous_results: Dict[str, Dict],
+        execution_layers: List[List[str]],
+        predecessors: Dict[str, List[str]],
+        unchanged: Callable[[str], bool],
+    ) -> Dict[str, Dict]:
+        """
+        Select previous results that can stand in for running a node: the
+        result succeeded, the node is unchanged and all of its predecessors
+        are seeded as well.
+        """
+        seeded: Dict[str, Dict] = {}
+        for layer in execution_layers:
+            for node_id in layer:
+                previous_result = previous_results.get(node_id)
+                if (
+                    previous_result is not None
+                    and previous_result.get("status") not in ["error", "failed"]
+                    and unchanged(node_id)
+                    and all(source in seeded for source in predecessors[node_id])
+                ):
+                    seeded[node_id] = copy.deepcopy(previous_result)
+        return seeded
+
+    def _fetch_latest_execution(
+        self, workflow_id: str
+    ) -> Optional[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """Load the snapshot and result of the latest finished execution."""
+        db = SessionLocal()
+        try:
+            execution = ExecutionHistoryService.get_latest_execution(
+                db, workflow_id, statuses=["completed", "error", "cancelled"]
+            )
+            if execution is None:
+                return None
+            return execution.snapshot, execution.result
+        finally:
+            db.close()
+
+    def _compute_node_hashes(
+        self,
+        execution_layers: List[List[str]],
+        node_map: Dict[str, Dict],
+        predecessors: Dict[str, List[str]],
+        input_fingerprints: Optional[Dict[str, List]] = None,
+    ) -> Dict[str, str]:
+        """
+        Compute content hashes for every node in topological order, so each
+        hash covers the node's config, its input files and everything
+        upstream of it.
+        """
+        input_fingerprints = input_fingerprints or {}
+        node_hashes: Dict[str, str] = {}
+        for layer in execution_layers:
+            for node_id in layer:
+                node_hashes[node_id] = compute_node_hash(
+                    node_map[node_id],
+                    [node_hashes[source] for source in predecessors[node_id]],
+                    input_fingerprints.get(node_id),
+                )
+        return node_hashes
+
+    async def _fingerprint_input_files(self, nodes: List[Dict]) -> Dict[str, List]:
+        """Fingerprint the input files of every node that reads files."""
+
+        def fingerprint_all() -> Dict[str, List]:
+            fingerprints = {}
+            for node in nodes:
+                try:
+                    fingerprint = input_file_fingerprint(node)
+                except Exception as e:
+                    # Never match a previous hash when files cannot be checked
+                    logger.warning(
+                        f"Could not fingerprint input files of node {node['id']}: "
+                        f"{str(e)}"
+                    )
+                    fingerprint = [str(uuid.uuid4())]
+                if fingerprint is not None:
+                    fingerprints[node["id"]] = fingerprint
+            return fingerprints
+
+        return await asyncio.to_thread(fingerprint_all)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get execution metrics for monitoring.
+
+        Returns:
+            Dictionary with the number of active executions, the node
+            concurrency limiter's queue-depth metrics, result cache counters
+            process pool utilization, LLM client pool counters, LLM
+            request batching counters, LLM retry counters, LLM response
+            cache counters, single-flight coalescing counters, websocket
+            send queue counters and offloaded node output counters
+        """
+        return {
+            "active_executions": len(self.active_executions),
+            "concurrency": node_concurrency_limiter.metrics(),
+            "result_cache": node_result_cache.stats(),
+            "process_pool": process_pool_backend.metrics(),
+            "llm_clients": llm_client_pool.stats(),
+            "llm_batching": llm_batch_dispatcher.stats(),
+            "llm_retries": llm_rate_limiter.stats(),
+            "llm_response_cache": llm_response_cache.stats(),
+            "single_flight": node_single_flight.stats(),
+            "websocket": websocket_manager.stats(),
+            "node_outputs": node_output_store.stats(),
+        }
+
+    def _close_node_stream(self, workflow_id: str, node_id: str, result: Dict) -> None:
+        """End a finished node's output stream, if it has one, with its result."""
+        stream = node_streams.get(workflow_id, node_id)
+        if stream is None:
+            return
+        if result["status"] in ["error", "failed"]:
+            stream.fail(RuntimeError(result.get("error", result.get("result"))))
+        else:
+            stream.close(result)
+
+    async def _cancel_tasks(self, running: Dict[asyncio.Task, str]) -> None:
+        """Cancel in-flight node tasks and wait for them to unwind."""
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        running.clear()
 
     def _topological_sort(
         self, graph: Dict[str, List[str]], in_degree: Dict[str, int]
@@ -411,7 +1101,7 @@ class WorkflowExecutionService:
         workflow_id: str,
         node: Dict,
         previous_results: Dict,
-        node_statuses: Dict[str, str],
+        node_statuses: NodeStatusTracker,
     ) -> Dict:
         """
         Execute a single node in the workflow using the global executor registry.
@@ -428,11 +1118,15 @@ class WorkflowExecutionService:
                 f"Unknown node type: {node_type}. Available types: {list(NODE_EXECUTORS.keys())}"
             )
 
-        # Execute the node using the appropriate executor
-        executor = executor_class()
-        logger.info(f"Executor: {executor}")
+        # Execute the node using the appropriate executor; executor classes
+        # are instantiated per node, plain functions are called directly
+        if isinstance(executor_class, type):
+            execute = executor_class().execute
+        else:
+            execute = executor_class
+        logger.info(f"Executor: {executor_class}")
         try:
-            result = await executor.execute(node)
+            result = await execute(node, previous_results, workflow_id)
             # Ensure the result has a proper status
             if "status" not in result:
                 result["status"] = "succeeded"
@@ -449,6 +1143,28 @@ class WorkflowExecutionService:
                 "error": str(e),
             }
 
+    def node_status_snapshot(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a full snapshot of the node statuses of a workflow's execution.
+
+        Args:
+            workflow_id: ID of the workflow
+
+        Returns:
+            The data of a ``node-status-update`` event, or None if the
+            workflow has no running execution
+        """
+        tracker = self.node_status_trackers.get(workflow_id)
+        return tracker.snapshot() if tracker is not None else None
+
+    async def _report_node_status_changes(
+        self, workflow_id: str, node_statuses: NodeStatusTracker
+    ) -> None:
+        """Send the node statuses changed since the last report as a patch."""
+        patch = node_statuses.take_patch()
+        if patch is not None:
+            await self._report_execution_status(workflow_id, "node-status-patch", patch)
+
     async def _report_execution_status(
         self,
         workflow_id: str,
@@ -14,4 +14,5 @@ if __name__ == "__main__":
         port=settings.PORT,
         reload=True,
         log_level="info",
+        ws_per_message_deflate=settings.WEBSOCKET_PER_MESSAGE_DEFLATE,
     )
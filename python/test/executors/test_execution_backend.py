@@ -0,0 +1,78 @@
+"""
+Tests for executor execution backends.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from app.executors.base_executor import BaseExecutor
+from app.executors.execution_backend import (
+    ProcessPoolBackend,
+    ThreadBackend,
+    get_execution_backend,
+    process_pool_backend,
+    thread_backend,
+)
+
+
+class CPUBoundExecutor(BaseExecutor):
+    cpu_bound = True
+
+    def execute(self, node, previous_results, workflow_id):
+        pass
+
+
+@pytest.fixture
+async def backend():
+    backend = ProcessPoolBackend(max_workers=2, max_pending=2)
+    yield backend
+    await backend.shutdown()
+
+
+class TestProcessPoolBackend:
+    """Test cases for ProcessPoolBackend."""
+
+    async def test_runs_work_in_worker_processes(self, backend):
+        pids = await asyncio.gather(*(backend.run(os.getpid) for _ in range(4)))
+
+        assert os.getpid() not in pids
+
+    async def test_bounds_pending_jobs(self, backend):
+        jobs = [asyncio.create_task(backend.run(sum, range(n))) for n in range(6)]
+        await asyncio.sleep(0)
+
+        metrics = backend.metrics()
+        assert metrics["pending"] <= 2
+        assert metrics["pending"] + metrics["waiting"] == 6
+        assert await asyncio.gather(*jobs) == [sum(range(n)) for n in range(6)]
+        assert backend.metrics()["pending"] == 0
+
+    async def test_restarts_after_shutdown(self, backend):
+        await backend.run(os.getpid)
+        await backend.shutdown()
+
+        assert backend.metrics()["workers"] == 0
+        assert await backend.run(abs, -3) == 3
+
+
+class TestBackendSelection:
+    """Test cases for choosing a backend per executor."""
+
+    def test_cpu_bound_executors_use_process_pool(self):
+        assert get_execution_backend(True) is process_pool_backend
+        assert get_execution_backend(False) is thread_backend
+
+    def test_process_pool_can_be_disabled(self, mocker):
+        mocker.patch(
+            "app.executors.execution_backend.settings.PROCESS_POOL_ENABLED", False
+        )
+
+        assert isinstance(get_execution_backend(True), ThreadBackend)
+
+    async def test_executor_runs_blocking_work_on_its_backend(self, mocker):
+        run = mocker.patch.object(process_pool_backend, "run", return_value=42)
+
+        assert await CPUBoundExecutor().run_blocking(abs, -42) == 42
+        run.assert_called_once_with(abs, -42)
@@ -0,0 +1,104 @@
+"""
+Tests for LLM request batching.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.executors.llm_batching import LLMBatchDispatcher
+
+
+def make_llm():
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(side_effect=lambda messages: f"single:{messages}")
+
+    async def abatch(inputs, config=None, return_exceptions=False):
+        return [
+            ValueError("bad prompt") if messages == "bad" else f"batched:{messages}"
+            for messages in inputs
+        ]
+
+    llm.abatch = AsyncMock(side_effect=abatch)
+    return llm
+
+
+class TestLLMBatchDispatcher:
+    """Test cases for LLMBatchDispatcher."""
+
+    async def test_concurrent_requests_are_sent_as_one_batch(self):
+        dispatcher = LLMBatchDispatcher(window_seconds=0.01)
+        llm = make_llm()
+
+        results = await asyncio.gather(
+            *(dispatcher.invoke("key", llm, prompt) for prompt in ["a", "b", "c"])
+        )
+
+        assert results == ["batched:a", "batched:b", "batched:c"]
+        llm.abatch.assert_awaited_once()
+        llm.ainvoke.assert_not_awaited()
+        assert dispatcher.stats()["batched_requests"] == 3
+
+    async def test_requests_for_different_keys_are_not_batched_together(self):
+        dispatcher = LLMBatchDispatcher(window_seconds=0.01)
+        llm_a, llm_b = make_llm(), make_llm()
+
+        results = await asyncio.gather(
+            dispatcher.invoke("a", llm_a, "x"), dispatcher.invoke("b", llm_b, "y")
+        )
+
+        assert results == ["single:x", "single:y"]
+        assert dispatcher.stats()["batches"] == 0
+
+    async def test_errors_are_routed_to_their_request_only(self):
+        dispatcher = LLMBatchDispatcher(window_seconds=0.01)
+        llm = make_llm()
+
+        results = await asyncio.gather(
+            dispatcher.invoke("key", llm, "ok"),
+            dispatcher.invoke("key", llm, "bad"),
+            return_exceptions=True,
+        )
+
+        assert results[0] == "batched:ok"
+        assert isinstance(results[1], ValueError)
+
+    async def test_full_batch_is_dispatched_without_waiting_for_window(self):
+        dispatcher = LLMBatchDispatcher(window_seconds=10, max_batch_size=2)
+        llm = make_llm()
+
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                dispatcher.invoke("key", llm, "a"), dispatcher.invoke("key", llm, "b")
+            ),
+            timeout=1,
+        )
+
+        assert results == ["batched:a", "batched:b"]
+
+    async def test_disabled_dispatcher_invokes_directly(self):
+        dispatcher = LLMBatchDispatcher(window_seconds=0)
+        llm = make_llm()
+
+        assert await dispatcher.invoke("key", llm, "a") == "single:a"
+        assert LLMBatchDispatcher().window_seconds == 0
+
+    async def test_in_flight_sends_are_referenced_until_done(self):
+        dispatcher = LLMBatchDispatcher(window_seconds=0.01)
+        release = asyncio.Event()
+
+        async def ainvoke(messages):
+            await release.wait()
+            return f"single:{messages}"
+
+        llm = MagicMock(ainvoke=ainvoke)
+
+        request = asyncio.ensure_future(dispatcher.invoke("key", llm, "a"))
+        await asyncio.sleep(0.05)
+        assert len(dispatcher._sending) == 1
+
+        release.set()
+        assert await request == "single:a"
+        await asyncio.sleep(0)
+        assert dispatcher._sending == set()
@@ -2,10 +2,15 @@
 Tests for LLMExecutor service.
 """
 
+import asyncio
+import time
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from app.executors.llm_client_pool import LLMClientPool
 from app.executors.llm_executor import LLMExecutor
+from app.executors.llm_response_cache import LLMResponseCache
 
 
 class TestLLMExecutor:
@@ -13,7 +18,7 @@ class TestLLMExecutor:
 
     def setup_method(self):
         """Set up test fixtures."""
-        self.executor = LLMExecutor()
+        self.executor = LLMExecutor(client_pool=LLMClientPool())
 
     def _create_mock_response(self, content: str):
         """Create a mock response object."""
@@ -353,9 +358,9 @@ class TestLLMExecutor:
         assert result1["status"] == "success"
         assert result2["status"] == "success"
 
-        # Check that cache contains the instance
-        cache_key = "openai:gpt-3.5-turbo"
-        assert cache_key in self.executor.llm_instances
+        # Both nodes share one pooled client
+        mock_openai.assert_called_once()
+        assert len(self.executor.client_pool) == 1
 
     @pytest.mark.asyncio
     @patch("app.executors.llm_executor.ChatOpenAI")
@@ -383,13 +388,13 @@ class TestLLMExecutor:
         await self.executor.execute(node)
 
         # Verify cache has content
-        assert len(self.executor.llm_instances) > 0
+        assert len(self.executor.client_pool) > 0
 
         # Clear cache
         self.executor.clear_cache()
 
         # Verify cache is empty
-        assert len(self.executor.llm_instances) == 0
+        assert len(self.executor.client_pool) == 0
 
     def test_get_supported_providers(self):
         """Test getting list of supported LLM providers."""
@@ -402,6 +407,201 @@ class TestLLMExecutor:
         for provider in expected_providers:
             assert provider in providers
 
+    @pytest.mark.asyncio
+    @patch("app.executors.llm_executor.settings.LLM_STREAM_FLUSH_INTERVAL", 0.02)
+    @patch(
+        "app.executors.llm_executor.websocket_manager.send_message_to_workflow",
+        new_callable=AsyncMock,
+    )
+    @patch("app.executors.llm_executor.ChatOpenAI")
+    async def test_execute_streaming_coalesces_deltas(self, mock_openai, mock_send):
+        """Test streamed tokens are sent as coalesced node-output-delta frames."""
+
+        async def astream(messages):
+            for token in ["Once", " upon", " a", " time", "."]:
+                await asyncio.sleep(0.005)
+                yield self._create_mock_response(token)
+
+        mock_llm = MagicMock()
+        mock_llm.astream = astream
+        mock_openai.return_value = mock_llm
+
+        node = {
+            "id": "test_llm_node_10",
+            "data": {
+                "type": "llm",
+                "config": {
+                    "provider": "openai",
+                    "model": "gpt-3.5-turbo",
+                    "stream": True,
+                    "messages": [{"role": "user", "content": "Tell a story"}],
+                },
+            },
+        }
+
+        result = await self.executor.execute(node, {}, "wf")
+
+        assert result["status"] == "success"
+        assert result["output"]["response"] == "Once upon a time."
+
+        frames = [call.args[1] for call in mock_send.await_args_list]
+        assert all(frame["event"] == "node-output-delta" for frame in frames)
+        assert "".join(f["data"]["delta"] for f in frames) == "Once upon a time."
+        assert [f["data"]["index"] for f in frames] == list(range(len(frames)))
+        assert len(frames) < 5
+
+    @pytest.mark.asyncio
+    @patch("app.executors.llm_executor.ChatOpenAI")
+    async def test_clients_are_shared_across_executors(self, mock_openai):
+        """Test executors created per node reuse one pooled client."""
+        mock_llm = AsyncMock()
+        mock_llm.ainvoke.return_value = self._create_mock_response("Hi")
+        mock_openai.return_value = mock_llm
+        pool = LLMClientPool()
+
+        node = {
+            "id": "test_llm_node_11",
+            "data": {
+                "type": "llm",
+                "config": {
+                    "provider": "openai",
+                    "model": "gpt-4o",
+                    "api_key": "sk-test",
+                    "messages": [{"role": "user", "content": "Hi"}],
+                },
+            },
+        }
+        await LLMExecutor(client_pool=pool).execute(node)
+        await LLMExecutor(client_pool=pool).execute(node)
+
+        mock_openai.assert_called_once()
+        http_client = mock_openai.call_args.kwargs["http_async_client"]
+        assert http_client is pool.http_client("openai", None)
+        assert "sk-test" not in next(iter(pool._clients))
+        await pool.aclose()
+
+    def test_idle_clients_are_evicted(self):
+        """Test clients unused for longer than the TTL are dropped."""
+        pool = LLMClientPool(idle_ttl_seconds=60)
+        pool.get("key", object)
+
+        with patch(
+            "app.executors.llm_client_pool.time.monotonic",
+            return_value=time.monotonic() + 61,
+        ):
+            pool.evict_idle()
+
+        assert "key" not in pool
+
+    @pytest.mark.asyncio
+    @patch("app.executors.llm_executor.ChatOpenAI")
+    async def test_differing_sampling_parameters_get_separate_clients(
+        self, mock_openai
+    ):
+        """Test nodes with different temperature/max_tokens/api_key don't collide."""
+        mock_openai.side_effect = lambda **kwargs: AsyncMock(
+            ainvoke=AsyncMock(return_value=self._create_mock_response("ok"))
+        )
+
+        def node(node_id, **config):
+            return {
+                "id": node_id,
+                "data": {
+                    "type": "llm",
+                    "config": {
+                        "provider": "openai",
+                        "model": "gpt-4o",
+                        "messages": [{"role": "user", "content": "Hi"}],
+                        **config,
+                    },
+                },
+            }
+
+        await self.executor.execute(node("a", temperature=0.0))
+        await self.executor.execute(node("b", temperature=1.0))
+        await self.executor.execute(node("c", temperature=1.0, max_tokens=10))
+        await self.executor.execute(node("d", temperature=1.0, api_key="sk-other"))
+        await self.executor.execute(node("e", temperature=0.0))
+
+        temperatures = [c.kwargs["temperature"] for c in mock_openai.call_args_list]
+        assert temperatures == [0.0, 1.0, 1.0, 1.0]
+        stats = self.executor.client_pool.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 4)
+
+    def test_pool_evicts_least_recently_used_client(self):
+        """Test the pool stays bounded by evicting the least recently used client."""
+        pool = LLMClientPool(max_entries=2)
+        pool.get("a", object)
+        pool.get("b", object)
+        pool.get("a", object)
+        pool.get("c", object)
+
+        assert "a" in pool and "c" in pool and "b" not in pool
+        assert pool.stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    @patch("app.executors.llm_executor.ChatOpenAI")
+    async def test_prompt_cache_hits_are_flagged(self, mock_openai):
+        """Test repeated prompts are served from the response cache."""
+        mock_llm = AsyncMock()
+        mock_llm.ainvoke.return_value = self._create_mock_response("Paris")
+        mock_openai.return_value = mock_llm
+
+        def node(content):
+            return {
+                "id": "test_llm_node_12",
+                "data": {
+                    "type": "llm",
+                    "config": {
+                        "provider": "openai",
+                        "model": "gpt-4o",
+                        "prompt_cache": True,
+                        "messages": [{"role": "user", "content": content}],
+                    },
+                },
+            }
+
+        cache = LLMResponseCache(":memory:")
+        with patch("app.executors.llm_executor.llm_response_cache", cache):
+            first = await self.executor.execute(node("Capital of France?"))
+            second = await self.executor.execute(node("  Capital of France?\n"))
+
+        assert first["output"]["metadata"]["cache_hit"] is False
+        assert second["output"]["metadata"]["cache_hit"] is True
+        assert second["output"]["metadata"]["cache_match"] == "exact"
+        assert second["output"]["response"] == "Paris"
+        mock_llm.ainvoke.assert_awaited_once()
+        assert "prompt_cache" not in mock_openai.call_args.kwargs
+        cache.close()
+
+    @pytest.mark.asyncio
+    @patch("app.executors.llm_executor.ChatOpenAI")
+    async def test_messages_reference_upstream_outputs(self, mock_openai):
+        """Test message templates are rendered with upstream node outputs."""
+        mock_llm = AsyncMock()
+        mock_llm.ainvoke.return_value = self._create_mock_response("A receipt")
+        mock_openai.return_value = mock_llm
+
+        node = {
+            "id": "test_llm_node_13",
+            "data": {
+                "type": "llm",
+                "config": {
+                    "provider": "openai",
+                    "model": "gpt-4o",
+                    "messages": [
+                        {"role": "user", "content": "Classify: {{ ocr.text }}"}
+                    ],
+                },
+            },
+        }
+        previous_results = {"ocr": {"output": {"text": "Total due: $12"}}}
+
+        await self.executor.execute(node, previous_results, "wf")
+
+        messages = mock_llm.ainvoke.call_args.args[0]
+        assert messages[0].content == "Classify: Total due: $12"
+
     def teardown_method(self):
         """Clean up after each test."""
         # Clear cache after each test
@@ -0,0 +1,298 @@
+"""
+Tests for chunking and the map-reduce mode of LLM nodes.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.executors.llm_chunking import _encoding, count_tokens, split_text
+from app.executors.llm_client_pool import LLMClientPool
+from app.executors.llm_executor import LLMExecutor
+from app.services.node_streams import node_streams
+
+
+@pytest.fixture
+def without_tiktoken():
+    with patch("app.executors.llm_chunking._encoding", return_value=None):
+        yield
+
+
+class TestChunking:
+    """Test cases for token counting and splitting."""
+
+    def test_split_overlaps_consecutive_chunks(self, without_tiktoken):
+        text = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+        chunks = split_text(text, chunk_tokens=4, overlap=1, model="any")
+
+        assert chunks[0] == text[:16]
+        assert chunks[1] == text[12:28]
+        assert chunks[-1].endswith("9")
+        assert all(len(chunk) <= 16 for chunk in chunks)
+
+    def test_short_text_is_one_chunk(self, without_tiktoken):
+        assert split_text("short", 100, 10, "any") == ["short"]
+        assert count_tokens("12345", "any") == 2
+
+    def test_overlap_must_be_smaller_than_chunk(self):
+        with pytest.raises(ValueError):
+            split_text("text", chunk_tokens=10, overlap=10, model="gpt-4o")
+
+    def test_token_chunks_round_trip(self):
+        if _encoding("gpt-4o") is None:
+            pytest.skip("tiktoken encoding not available")
+        text = " ".join(f"word{i}" for i in range(500))
+
+        chunks = split_text(text, chunk_tokens=100, overlap=0, model="gpt-4o")
+
+        assert len(chunks) > 1
+        assert "".join(chunks) == text
+        assert all(count_tokens(c, "gpt-4o") <= 100 for c in chunks)
+
+
+class TestMapReduce:
+    """Test cases for the map_reduce mode of LLMExecutor."""
+
+    @patch(
+        "app.executors.llm_executor.websocket_manager.send_message_to_workflow",
+        new_callable=AsyncMock,
+    )
+    @patch("app.executors.llm_executor.ChatOpenAI")
+    async def test_chunks_are_mapped_and_combined(
+        self, mock_openai, mock_send, without_tiktoken
+    ):
+        async def ainvoke(messages):
+            content = messages[-1].content
+            response = MagicMock()
+            response.usage_metadata = {
+                "input_tokens": 1,
+                "output_tokens": 1,
+                "total_tokens": 2,
+            }
+            if content.startswith("Combine"):
+                response.content = "combined(" + content.split(":", 1)[1] + ")"
+            else:
+                response.content = content.split(":", 1)[1][:3]
+            return response
+
+        async def abatch(inputs, config=None, return_exceptions=False):
+            return [await ainvoke(messages) for messages in inputs]
+
+        mock_llm = MagicMock(ainvoke=ainvoke, abatch=abatch)
+        mock_openai.return_value = mock_llm
+
+        node = {
+            "id": "summarize",
+            "data": {
+                "type": "llm",
+                "config": {
+                    "model": "gpt-4o",
+                    "mode": "map_reduce",
+                    "messages": [{"role": "user", "content": "Map:{{ chunk }}"}],
+                    "map_reduce": {
+                        "input": "{{ ocr.text }}",
+                        "chunk_tokens": 3,
+                        "chunk_overlap": 0,
+                        "combine_messages": [
+                            {"role": "user", "content": "Combine:{{ summaries }}"}
+                        ],
+                    },
+                },
+            },
+        }
+        previous_results = {"ocr": {"output": {"text": "AAAAAAAAAAAABBBBBBBBBBBB"}}}
+
+        result = await LLMExecutor(client_pool=LLMClientPool()).execute(
+            node, previous_results, "wf"
+        )
+
+        output = result["output"]
+        assert output["response"] == "combined(AAA\n\n---\n\nBBB)"
+        assert output["metadata"]["map_reduce"] == {"chunks": 2, "reduce_calls": 1}
+        assert output["metadata"]["usage"]["calls"] == 3
+        assert "map_reduce" not in mock_openai.call_args.kwargs
+
+        frames = [call.args[1] for call in mock_send.await_args_list]
+        assert [f["event"] for f in frames] == ["node-output-partial"] * 2
+        assert sorted(f["data"]["chunks_completed"] for f in frames) == [1, 2]
+        assert {f["data"]["output"]["chunk"] for f in frames} == {0, 1}
+
+    @pytest.mark.parametrize(
+        "options, expected",
+        [
+            ({"chunk_tokens": None, "chunk_overlap": None}, None),
+            ({"chunk_tokens": -5}, "chunk_tokens"),
+            ({"chunk_tokens": "100"}, "chunk_tokens"),
+            ({"chunk_overlap": -1}, "chunk_overlap"),
+            ({"chunk_tokens": 100, "chunk_overlap": 100}, "smaller than"),
+        ],
+    )
+    @patch("app.executors.llm_executor.ChatOpenAI")
+    async def test_chunk_options_are_validated(self, mock_openai, options, expected):
+        mock_llm = AsyncMock()
+        mock_llm.ainvoke.return_value = MagicMock(content="Summary")
+        mock_openai.return_value = mock_llm
+        node = {
+            "id": "summarize",
+            "data": {
+                "type": "llm",
+                "config": {
+                    "model": "gpt-4o",
+                    "mode": "map_reduce",
+                    "messages": [{"role": "user", "content": "Sum up {{ chunk }}"}],
+                    "map_reduce": {"input": "A short document", **options},
+                },
+            },
+        }
+        executor = LLMExecutor(client_pool=LLMClientPool())
+
+        if expected is None:
+            result = await executor.execute(node)
+            assert result["output"]["response"] == "Summary"
+        else:
+            with pytest.raises(ValueError, match=expected):
+                await executor.execute(node)
+
+    @patch("app.executors.llm_executor.ChatOpenAI")
+    async def test_input_that_fits_one_chunk_is_not_reduced(self, mock_openai):
+        mock_llm = AsyncMock()
+        mock_llm.ainvoke.return_value = MagicMock(content="Summary")
+        mock_openai.return_value = mock_llm
+        node = {
+            "id": "summarize",
+            "data": {
+                "type": "llm",
+                "config": {
+                    "model": "gpt-4o",
+                    "mode": "map_reduce",
+                    "messages": [{"role": "user", "content": "Sum up {{ chunk }}"}],
+                    "map_reduce": {"input": "A short document"},
+                },
+            },
+        }
+
+        result = await LLMExecutor(client_pool=LLMClientPool()).execute(node)
+
+        assert result["output"]["response"] == "Summary"
+        assert result["output"]["metadata"]["map_reduce"]["reduce_calls"] == 0
+        mock_llm.ainvoke.assert_awaited_once()
+
+    @patch(
+        "app.executors.llm_executor.websocket_manager.send_message_to_workflow",
+        new_callable=AsyncMock,
+    )
+    @patch("app.executors.llm_executor.ChatOpenAI")
+    async def test_streamed_input_is_mapped_as_items_arrive(
+        self, mock_openai, mock_send, without_tiktoken
+    ):
+        mapped = []
+
+        async def ainvoke(messages):
+            content = messages[-1].content
+            if content.startswith("Map:"):
+                mapped.append(content[4:])
+            return MagicMock(content=content[:8])
+
+        mock_openai.return_value = MagicMock(ainvoke=ainvoke)
+        node = {
+            "id": "summarize",
+            "data": {
+                "type": "llm",
+                "config": {
+                    "model": "gpt-4o",
+                    "mode": "map_reduce",
+                    "stream_input": True,
+                    "messages": [{"role": "user", "content": "Map:{{ chunk }}"}],
+                    "map_reduce": {
+                        "input": "{{ ocr.text }}",
+                        "chunk_tokens": 3,
+                        "chunk_overlap": 0,
+                    },
+                },
+            },
+        }
+        stream = node_streams.open("wf", "ocr")
+        try:
+            task = asyncio.create_task(
+                LLMExecutor(client_pool=LLMClientPool()).execute(node, {}, "wf")
+            )
+            stream.append({"text": "AAAAAAAAAA"})
+            stream.append({"text": "BBBB"})
+            await asyncio.sleep(0.1)
+            # The first chunk is mapped before the producer finishes
+            assert mapped == ["AAAAAAAAAA\n\n"]
+
+            stream.append({"text": "CCCC"})
+            stream.close({"output": {"text": "unused"}})
+            result = await task
+        finally:
+            node_streams.discard("wf")
+
+        assert mapped == ["AAAAAAAAAA\n\n", "BBBB\n\nCCCC"]
+        assert result["output"]["metadata"]["map_reduce"]["chunks"] == 2
+
+    def test_partials_over_half_the_budget_are_truncated(self, without_tiktoken):
+        partials = ["A" * 60, "B" * 60, "C" * 60]
+
+        groups = LLMExecutor._group_partials(partials, 20, "any")
+
+        assert [len(group) for group in groups] == [2, 1]
+        assert groups[0] == ["A" * 32, "B" * 32]
+        for group in groups:
+            assert count_tokens("\n\n---\n\n".join(group) + "\n\n---\n\n", "any") <= 20
+
+    @patch("app.executors.llm_executor.ChatOpenAI")
+    async def test_chunks_shrunk_to_the_budget_keep_a_smaller_overlap(
+        self, mock_openai, without_tiktoken
+    ):
+        mock_llm = AsyncMock()
+        mock_llm.ainvoke.return_value = MagicMock(content="Summary")
+        mock_openai.return_value = mock_llm
+        node = {
+            "id": "summarize",
+            "data": {
+                "type": "llm",
+                "config": {
+                    "model": "gpt-4o",
+                    "mode": "map_reduce",
+                    # Leaves about 100 tokens for each chunk, less than the
+                    # default overlap
+                    "max_tokens": 127890,
+                    "messages": [{"role": "user", "content": "Sum up {{ chunk }}"}],
+                    "map_reduce": {"input": "word " * 200},
+                },
+            },
+        }
+
+        result = await LLMExecutor(client_pool=LLMClientPool()).execute(node)
+
+        assert result["output"]["response"] == "Summary"
+        assert result["output"]["metadata"]["map_reduce"]["chunks"] > 1
+
+    @patch("app.executors.llm_executor.ChatOpenAI")
+    async def test_combine_messages_over_the_window_are_rejected(
+        self, mock_openai, without_tiktoken
+    ):
+        mock_openai.return_value = AsyncMock()
+        node = {
+            "id": "summarize",
+            "data": {
+                "type": "llm",
+                "config": {
+                    "model": "gpt-4o",
+                    "mode": "map_reduce",
+                    "messages": [{"role": "user", "content": "Sum up {{ chunk }}"}],
+                    "map_reduce": {
+                        "input": "A short document",
+                        "combine_messages": [
+                            {"role": "user", "content": "x" * 4 * 130000}
+                        ],
+                    },
+                },
+            },
+        }
+
+        with pytest.raises(ValueError, match="Combine messages"):
+            await LLMExecutor(client_pool=LLMClientPool()).execute(node)
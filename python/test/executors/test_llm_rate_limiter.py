@@ -0,0 +1,155 @@
+"""
+Tests for LLM provider rate limiting and retries.
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from app.executors.llm_rate_limiter import (
+    LLMRateLimiter,
+    ProviderRateLimiter,
+    RetryBudget,
+    classify_error,
+    parse_reset,
+)
+
+
+class StatusError(Exception):
+    """Provider error carrying an HTTP response, like the OpenAI SDK errors."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = httpx.Response(status_code, headers=headers or {})
+
+
+@pytest.fixture
+def limiter():
+    return LLMRateLimiter(max_attempts=3, base_delay=0, max_delay=0)
+
+
+class TestLLMRateLimiter:
+    """Test cases for LLMRateLimiter."""
+
+    async def test_retries_rate_limited_calls(self, limiter):
+        call = AsyncMock(side_effect=[StatusError(429), StatusError(503), "ok"])
+
+        assert await limiter.run("openai", 10, call) == "ok"
+        assert call.await_count == 3
+        assert limiter.stats()["retries"] == 2
+
+    async def test_failed_attempts_return_their_tokens(self):
+        limiter = LLMRateLimiter(
+            limits={"openai": {"tpm": 1000}}, max_attempts=3, base_delay=0, max_delay=0
+        )
+        call = AsyncMock(side_effect=[StatusError(503), StatusError(503), "ok"])
+
+        assert await limiter.run("openai", 100, call) == "ok"
+        # Only the successful attempt's reservation remains
+        assert limiter.provider("openai").tokens.tokens == pytest.approx(900, abs=1)
+
+    async def test_does_not_retry_client_errors(self, limiter):
+        call = AsyncMock(side_effect=StatusError(400))
+
+        with pytest.raises(StatusError):
+            await limiter.run("openai", 10, call)
+        assert call.await_count == 1
+
+    async def test_gives_up_after_max_attempts(self, limiter):
+        call = AsyncMock(side_effect=StatusError(500))
+
+        with pytest.raises(StatusError):
+            await limiter.run("openai", 10, call)
+        assert call.await_count == 3
+
+    async def test_retry_budget_limits_retries(self):
+        limiter = LLMRateLimiter(
+            max_attempts=5,
+            base_delay=0,
+            max_delay=0,
+            retry_budget=RetryBudget(ratio=0, min_balance=1),
+        )
+        call = AsyncMock(side_effect=StatusError(500))
+
+        with pytest.raises(StatusError):
+            await limiter.run("openai", 10, call)
+        assert call.await_count == 2
+
+    async def test_can_retry_check_prevents_retry(self, limiter):
+        call = AsyncMock(side_effect=StatusError(500))
+
+        with pytest.raises(StatusError):
+            await limiter.run("openai", 10, call, can_retry=lambda: False)
+        assert call.await_count == 1
+
+    async def test_adapts_to_response_headers(self, limiter):
+        response = MagicMock()
+        response.response_metadata = {
+            "headers": {
+                "x-ratelimit-limit-requests": "100",
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": "2s",
+                "x-ratelimit-limit-tokens": "5000",
+                "x-ratelimit-remaining-tokens": "4000",
+            }
+        }
+
+        await limiter.run("openai", 10, AsyncMock(return_value=response))
+
+        provider = limiter.provider("openai")
+        assert provider.requests.capacity == 100
+        assert provider.tokens.capacity == 5000
+        assert provider.tokens.tokens <= 4000
+        assert provider._paused_until > 0
+
+    async def test_no_limits_until_reported(self, limiter):
+        provider = limiter.provider("anthropic")
+        assert provider.requests is None and provider.tokens is None
+
+        chunk = MagicMock()
+        chunk.response_metadata = {
+            "headers": {"anthropic-ratelimit-tokens-limit": "400000"}
+        }
+        limiter.observe("anthropic", chunk)
+
+        assert provider.tokens.capacity == 400000
+
+
+class TestProviderRateLimiter:
+    """Test cases for the per-provider token buckets."""
+
+    def test_settle_charges_actual_usage(self):
+        limiter = ProviderRateLimiter(tpm=1000)
+        limiter.tokens.reserve(100)
+
+        limiter.settle(100, 400)
+        assert limiter.tokens.tokens == pytest.approx(600, abs=1)
+        limiter.settle(400, 0)
+        assert limiter.tokens.tokens == pytest.approx(1000, abs=1)
+
+    def test_reservation_beyond_capacity_waits(self):
+        limiter = ProviderRateLimiter(rpm=60, tpm=0)
+        assert limiter.requests.reserve(60) == 0
+        # One request per second refills
+        assert limiter.requests.reserve(1) == pytest.approx(1, abs=0.05)
+
+
+class TestHelpers:
+    """Test cases for header parsing and error classification."""
+
+    def test_parse_reset(self):
+        assert parse_reset("3") == 3
+        assert parse_reset("6m0s") == 360
+        assert parse_reset("1m30.5s") == 90.5
+        assert parse_reset("20ms") == pytest.approx(0.02)
+        assert parse_reset("2000-01-01T00:00:00Z") == 0
+        assert parse_reset("soon") is None
+
+    def test_classify_error(self):
+        assert classify_error(StatusError(429, {"retry-after": "7"})) == (True, 7)
+        assert classify_error(StatusError(502)) == (True, None)
+        assert classify_error(StatusError(401)) == (False, None)
+        assert classify_error(httpx.ConnectError("refused")) == (True, None)
+        assert classify_error(ValueError("bad")) == (False, None)
@@ -0,0 +1,131 @@
+"""
+Tests for the LLM response cache.
+"""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.executors.llm_response_cache import (
+    LLMResponseCache,
+    cache_keys,
+    client_identity,
+    semantic_prompt,
+)
+
+MESSAGES = [{"role": "user", "content": "Summarize the report"}]
+
+
+@pytest.fixture
+def cache():
+    cache = LLMResponseCache(":memory:", ttl_seconds=60, max_entries=2)
+    yield cache
+    cache.close()
+
+
+class TestLLMResponseCache:
+    """Test cases for LLMResponseCache."""
+
+    def test_keys_depend_on_parameters_and_messages(self):
+        key, scope = cache_keys("openai", "gpt-4o", {"temperature": 0}, MESSAGES)
+        other_key, other_scope = cache_keys(
+            "openai", "gpt-4o", {"temperature": 1}, MESSAGES
+        )
+        reworded_key, same_scope = cache_keys(
+            "openai", "gpt-4o", {"temperature": 0}, [{"content": "Something else"}]
+        )
+
+        assert key != other_key and scope != other_scope
+        assert key != reworded_key and scope == same_scope
+
+    def test_scope_depends_on_credentials_and_endpoint(self):
+        def scope_for(**client_config):
+            identity = client_identity(client_config)
+            return cache_keys("openai", "gpt-4o", {}, MESSAGES, identity)[1]
+
+        assert scope_for(api_key="a") == scope_for(api_key="a")
+        assert scope_for(api_key="a") != scope_for(api_key="b")
+        assert scope_for(api_key="a") != scope_for(api_key="a", base_url="http://x")
+
+    def test_only_openai_prompts_are_embedded(self):
+        assert semantic_prompt({"provider": "openai"}, MESSAGES) == (
+            "user: Summarize the report"
+        )
+        assert semantic_prompt({"provider": "anthropic"}, MESSAGES) is None
+        assert semantic_prompt({"provider": "azure_openai"}, MESSAGES) is None
+        assert (
+            semantic_prompt(
+                {"provider": "openai", "base_url": "http://localhost"}, MESSAGES
+            )
+            is None
+        )
+
+    async def test_exact_match(self, cache):
+        key, scope = cache_keys("openai", "gpt-4o", {}, MESSAGES)
+        assert (await cache.get(key, scope))[0] is None
+
+        await cache.set(key, scope, "The report says...")
+
+        assert await cache.get(key, scope) == ("The report says...", None, False)
+        assert cache.stats() == {"hits": 1, "semantic_hits": 0, "misses": 1}
+
+    async def test_expired_entries_miss(self, cache):
+        await cache.set("key", "scope", "old")
+
+        with patch(
+            "app.executors.llm_response_cache.time.time",
+            return_value=time.time() + 61,
+        ):
+            assert (await cache.get("key", "scope"))[0] is None
+
+    async def test_least_recently_used_entries_are_evicted(self, cache):
+        await cache.set("a", "scope", "A")
+        await cache.set("b", "scope", "B")
+        await cache.get("a", "scope")
+        await cache.set("c", "scope", "C")
+
+        assert (await cache.get("a", "scope"))[0] == "A"
+        assert (await cache.get("b", "scope"))[0] is None
+        assert (await cache.get("c", "scope"))[0] == "C"
+
+    async def test_near_duplicate_lookup(self):
+        vectors = {
+            "how many days are in a week": [1.0, 0.0, 0.1],
+            "how many days does a week have": [1.0, 0.0, 0.12],
+            "what is the capital of peru": [0.0, 1.0, 0.0],
+        }
+
+        async def embed(text):
+            return vectors[text]
+
+        cache = LLMResponseCache(":memory:", embedder=embed)
+        _, embedding, _ = await cache.get("k1", "scope", "how many days are in a week")
+        await cache.set("k1", "scope", "Seven", embedding)
+
+        response, _, semantic = await cache.get(
+            "k2", "scope", "how many days does a week have"
+        )
+        assert (response, semantic) == ("Seven", True)
+        assert (await cache.get("k3", "scope", "what is the capital of peru"))[
+            0
+        ] is None
+        assert (await cache.get("k4", "other", "how many days are in a week"))[
+            0
+        ] is None
+        cache.close()
+
+    async def test_semantic_index_is_bounded(self):
+        async def embed(text):
+            return [1.0, float(text)]
+
+        cache = LLMResponseCache(":memory:", embedder=embed, max_index_entries=2)
+        for i in range(3):
+            _, embedding, _ = await cache.get(f"k{i}", "scope", str(i))
+            await cache.set(f"k{i}", "scope", f"R{i}", embedding)
+
+        assert list(cache._index["scope"]) == ["k1", "k2"]
+        cache._index.clear()
+        await cache.get("k9", "scope", "9")
+        assert list(cache._index["scope"]) == ["k1", "k2"]
+        cache.close()
@@ -0,0 +1,120 @@
+"""
+Tests for LLM token usage and cost accounting.
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from app.executors.llm_client_pool import LLMClientPool
+from app.executors.llm_executor import LLMExecutor
+from app.executors.llm_usage import (
+    TokenUsage,
+    aggregate_usage,
+    calculate_cost,
+    usage_from_response,
+)
+
+
+def llm_result(model, usage, cost, **extra):
+    return {
+        "output": {
+            "provider": "openai",
+            "model": model,
+            "metadata": {"usage": usage, "cost": cost},
+        },
+        **extra,
+    }
+
+
+class TestUsageAccounting:
+    """Test cases for usage extraction, pricing and aggregation."""
+
+    def test_usage_from_usage_metadata(self):
+        response = AIMessage(
+            content="ok",
+            usage_metadata={
+                "input_tokens": 12,
+                "output_tokens": 30,
+                "total_tokens": 42,
+                "output_token_details": {"reasoning": 20},
+            },
+        )
+
+        assert usage_from_response(response) == TokenUsage(12, 30, 42, 20)
+
+    def test_usage_from_provider_metadata(self):
+        response = AIMessage(
+            content="ok",
+            response_metadata={"usage": {"input_tokens": 5, "output_tokens": 7}},
+        )
+
+        assert usage_from_response(response) == TokenUsage(5, 7, 12)
+        assert usage_from_response("plain text") is None
+
+    def test_calculate_cost(self):
+        usage = TokenUsage(1_000_000, 500_000, 1_500_000)
+
+        assert calculate_cost(usage, "gpt-4o") == pytest.approx(25.0)
+        assert calculate_cost(usage, "unpriced-model") is None
+
+    def test_aggregate_usage_skips_cached_results(self):
+        usage = {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30}
+        results = [
+            llm_result("gpt-4o", usage, 0.5),
+            llm_result("o1", {**usage, "reasoning_tokens": 15}, 1.0),
+            llm_result("o1", usage, 1.0, cached=True),
+            {"output": {"result": "not an llm node"}},
+        ]
+
+        totals = aggregate_usage(results, elapsed=2.0)
+
+        assert totals["llm_calls"] == 2
+        assert totals["total_tokens"] == 60
+        assert totals["reasoning_tokens"] == 15
+        assert totals["cost"] == pytest.approx(1.5)
+        assert totals["tokens_per_second"] == 30
+        assert totals["by_model"]["openai:o1"]["llm_calls"] == 1
+
+    def test_aggregate_usage_counts_every_call_of_a_node(self):
+        usage = {"total_tokens": 30, "calls": 5}
+
+        totals = aggregate_usage([llm_result("gpt-4o", usage, 0.5)], elapsed=1.0)
+
+        assert totals["llm_calls"] == 5
+
+    @patch("app.executors.llm_executor.ChatOpenAI")
+    async def test_executor_reports_usage_and_cost(self, mock_openai):
+        mock_llm = AsyncMock()
+        mock_llm.ainvoke.return_value = AIMessage(
+            content="Hi",
+            usage_metadata={
+                "input_tokens": 1000,
+                "output_tokens": 100,
+                "total_tokens": 1100,
+            },
+        )
+        mock_openai.return_value = mock_llm
+        node = {
+            "id": "llm",
+            "data": {
+                "type": "llm",
+                "config": {
+                    "model": "gpt-4o",
+                    "messages": [{"role": "user", "content": "Hi"}],
+                },
+            },
+        }
+
+        result = await LLMExecutor(client_pool=LLMClientPool()).execute(node)
+
+        metadata = result["output"]["metadata"]
+        assert metadata["usage"] == {
+            "prompt_tokens": 1000,
+            "completion_tokens": 100,
+            "total_tokens": 1100,
+            "reasoning_tokens": None,
+            "calls": 1,
+        }
+        assert metadata["cost"] == pytest.approx(0.013)
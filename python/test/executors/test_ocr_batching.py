@@ -0,0 +1,130 @@
+"""
+Tests for batched, page-streaming OCR in OCRExecutor.
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.executors import ocr_executor
+from app.executors.ocr_executor import OCRExecutor, run_surya_ocr_batch
+from app.services.node_streams import node_streams
+
+FIXTURES = Path(__file__).parent.parent / "__fixtures__" / "image"
+IMAGES = [str(FIXTURES / name) for name in ("easy_clear.png", "hw_clear.png")]
+
+
+def fake_ocr_batch(pages, languages, dpi):
+    return [
+        {
+            "file": path,
+            "page": index,
+            "text": f"{Path(path).stem}:{index}",
+            "blocks": [],
+        }
+        for path, index in pages
+    ]
+
+
+@pytest.fixture(autouse=True)
+def in_process(mocker):
+    mocker.patch("app.executors.execution_backend.settings.PROCESS_POOL_ENABLED", False)
+
+
+@pytest.fixture
+def ocr_batch(mocker):
+    return mocker.patch(
+        "app.executors.ocr_executor.run_surya_ocr_batch", side_effect=fake_ocr_batch
+    )
+
+
+class TestOCRBatching:
+    """Test cases for micro-batched OCR."""
+
+    async def test_batches_pages_across_files(self, ocr_batch):
+        executor = OCRExecutor(file_path=IMAGES[0], batch_size=2)
+        executor.file_ids = ["file-2", "file-3"]
+        executor._get_dataset_file_paths = lambda: [IMAGES[1], IMAGES[0]]
+
+        pages = [page async for page in executor.iter_pages()]
+
+        assert [len(call.args[0]) for call in ocr_batch.call_args_list] == [2, 1]
+        assert [page["text"] for page in pages] == [
+            "easy_clear:0",
+            "hw_clear:0",
+            "easy_clear:0",
+        ]
+
+    async def test_node_result_combines_pages(self, ocr_batch):
+        node = {
+            "id": "ocr_1",
+            "data": {"type": "ocr", "config": {"file_path": IMAGES[1]}},
+        }
+
+        result = await OCRExecutor().execute(node)
+
+        assert result["status"] == "success"
+        assert result["output"]["text"] == "hw_clear:0"
+        assert len(result["output"]["pages"]) == 1
+
+    async def test_missing_dataset_files(self, mocker):
+        mocker.patch("app.executors.ocr_executor.SessionLocal")
+        mocker.patch(
+            "app.executors.ocr_executor.FileService.get_files_by_ids",
+            return_value=[SimpleNamespace(id="a", path=IMAGES[0])],
+        )
+        executor = OCRExecutor(file_ids=["a", "b"])
+
+        with pytest.raises(FileNotFoundError, match="b"):
+            await executor.resolve_sources()
+
+    def test_runs_predictors_once_per_batch(self, mocker):
+        recognition = MagicMock(
+            side_effect=lambda images, langs, det: [
+                SimpleNamespace(text=f"page {i}", blocks=[]) for i in range(len(images))
+            ]
+        )
+
+        @contextmanager
+        def use(name):
+            yield recognition if name == "recognition" else MagicMock()
+
+        mocker.patch.object(ocr_executor.surya_predictors, "use", use)
+
+        results = run_surya_ocr_batch([(IMAGES[0], 0), (IMAGES[1], 0)], ["en"], 96)
+
+        recognition.assert_called_once()
+        images, languages, _ = recognition.call_args.args
+        assert len(images) == 2
+        assert languages == [["en"], ["en"]]
+        assert [r["text"] for r in results] == ["page 0", "page 1"]
+        assert results[1]["file"] == IMAGES[1]
+
+    async def test_node_streams_pages_and_reports_progress(self, ocr_batch, mocker):
+        send = mocker.patch(
+            "app.executors.ocr_executor.websocket_manager.send_message_to_workflow"
+        )
+        stream = node_streams.open("wf", "ocr_1")
+        node = {
+            "id": "ocr_1",
+            "data": {"type": "ocr", "config": {"file_path": IMAGES[0]}},
+        }
+        executor = OCRExecutor()
+        mocker.patch.object(
+            OCRExecutor, "_get_dataset_file_paths", return_value=[IMAGES[1]]
+        )
+        node["data"]["config"]["file_ids"] = ["b"]
+
+        await executor.execute(node, {}, "wf")
+        node_streams.discard("wf")
+
+        assert [page["text"] for page in stream.items] == [
+            "easy_clear:0",
+            "hw_clear:0",
+        ]
+        events = [call.args[1] for call in send.await_args_list]
+        assert [event["event"] for event in events] == ["node-output-partial"] * 2
+        assert [event["data"]["progress"] for event in events] == [50.0, 100.0]
@@ -0,0 +1,64 @@
+"""
+Tests for prompt templates referencing upstream node outputs.
+"""
+
+import pytest
+
+from app.executors.prompt_templates import TemplateError, compile_template
+
+RESULTS = {
+    "ocr_1": {"output": {"text": "Invoice #42", "pages": [{"page": 0}]}},
+    "llm-2": {"output": {"response": "Total: $10", "metadata": {"cost": None}}},
+}
+
+
+class TestPromptTemplates:
+    """Test cases for compiling and rendering templates."""
+
+    def test_renders_references_to_outputs(self):
+        template = compile_template(
+            "Document: {{ ocr_1.text }}\nSummary: {{llm-2.response}}"
+        )
+
+        assert template.references == {"ocr_1", "llm-2"}
+        assert template.render(RESULTS) == (
+            "Document: Invoice #42\nSummary: Total: $10"
+        )
+
+    def test_non_string_values_render_as_json(self):
+        template = compile_template("{{ ocr_1.pages.0 }} {{ llm-2.metadata.cost }}")
+
+        assert template.render(RESULTS) == '{"page": 0} '
+
+    def test_static_templates_have_no_references(self):
+        template = compile_template("Plain {text} with { braces }")
+
+        assert template.is_static
+        assert template.render({}) == "Plain {text} with { braces }"
+
+    def test_templates_are_compiled_once(self):
+        assert compile_template("{{ ocr_1.text }}") is compile_template(
+            "{{ ocr_1.text }}"
+        )
+
+    @pytest.mark.parametrize(
+        "source", ["{{ missing.text }}", "{{ ocr_1.title }}", "{{ ocr_1.pages.5 }}"]
+    )
+    def test_unavailable_references_raise(self, source):
+        with pytest.raises(TemplateError):
+            compile_template(source).render(RESULTS)
+
+    def test_escaped_placeholders_are_literal(self):
+        template = compile_template("Use \\{{ name }} for {{ ocr_1.text }}")
+
+        assert template.references == {"ocr_1"}
+        assert template.render(RESULTS) == "Use {{ name }} for Invoice #42"
+
+    def test_unknown_nodes_can_be_kept_as_written(self):
+        template = compile_template("Hello {{ user_name }}: {{ ocr_1.text }}")
+
+        assert template.render(RESULTS, keep_unknown=True) == (
+            "Hello {{ user_name }}: Invoice #42"
+        )
+        with pytest.raises(TemplateError):
+            compile_template("{{ ocr_1.title }}").render(RESULTS, keep_unknown=True)
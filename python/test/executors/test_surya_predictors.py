@@ -0,0 +1,105 @@
+"""
+Tests for the Surya predictor registry.
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.executors.surya_predictors import PredictorRegistry
+
+
+def make_predictor(size_bytes):
+    parameter = MagicMock()
+    parameter.numel.return_value = size_bytes
+    parameter.element_size.return_value = 1
+    predictor = MagicMock()
+    predictor.model.parameters.return_value = [parameter]
+    return predictor
+
+
+class TestPredictorRegistry:
+    """Test cases for PredictorRegistry."""
+
+    def test_loads_each_predictor_once(self):
+        loader = MagicMock(side_effect=lambda: make_predictor(10))
+        registry = PredictorRegistry({"recognition": loader})
+
+        with registry.use("recognition") as first:
+            pass
+        with registry.use("recognition") as second:
+            pass
+
+        assert first is second
+        loader.assert_called_once()
+
+    def test_concurrent_first_use_loads_once(self):
+        def slow_loader():
+            time.sleep(0.05)
+            return make_predictor(10)
+
+        loader = MagicMock(side_effect=slow_loader)
+        registry = PredictorRegistry({"detection": loader})
+
+        def borrow():
+            with registry.use("detection"):
+                pass
+
+        threads = [threading.Thread(target=borrow) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        loader.assert_called_once()
+
+    def test_memory_cap_evicts_least_recently_used_idle_predictor(self):
+        registry = PredictorRegistry(
+            {
+                "a": lambda: make_predictor(60),
+                "b": lambda: make_predictor(60),
+            },
+            max_memory_bytes=100,
+        )
+
+        with registry.use("a"):
+            pass
+        with registry.use("b"):
+            pass
+
+        stats = registry.stats()
+        assert list(stats["loaded"]) == ["b"]
+        assert stats["evictions"] == 1
+
+    def test_memory_cap_keeps_predictors_in_use(self):
+        registry = PredictorRegistry(
+            {
+                "a": lambda: make_predictor(60),
+                "b": lambda: make_predictor(60),
+            },
+            max_memory_bytes=100,
+        )
+
+        with registry.use("a"):
+            with registry.use("b"):
+                assert set(registry.stats()["loaded"]) == {"a", "b"}
+
+    def test_evicts_idle_predictors_after_ttl(self):
+        registry = PredictorRegistry(
+            {"a": lambda: make_predictor(10)}, idle_ttl_seconds=0.01
+        )
+        registry.prewarm()
+        time.sleep(0.02)
+
+        registry.evict_idle()
+
+        assert registry.stats()["loaded"] == {}
+
+    def test_unknown_predictor(self):
+        registry = PredictorRegistry({})
+
+        with pytest.raises(ValueError):
+            with registry.use("layout"):
+                pass
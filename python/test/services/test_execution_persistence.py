@@ -0,0 +1,188 @@
+"""
+Tests for the write-behind execution persistence queue.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.db import Base
+from app.models import WorkflowExecution
+from app.services.execution_history import ExecutionHistoryService
+from app.services.execution_persistence import ExecutionPersistence
+
+
+@pytest.fixture
+def session_factory():
+    """In-memory SQLite database with the application schema."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _load(session_factory, execution_id):
+    db = session_factory()
+    try:
+        return ExecutionHistoryService.get_execution(db, execution_id)
+    finally:
+        db.close()
+
+
+class TestExecutionPersistence:
+    """Test cases for ExecutionPersistence class."""
+
+    async def test_updates_are_coalesced_into_one_record(self, session_factory):
+        persistence = ExecutionPersistence(session_factory=session_factory)
+        persistence.create_execution("e1", "wf", {"nodes": [], "edges": []}, "running")
+        persistence.record_node_result("e1", "a", {"status": "success"}, "succeeded")
+
+        # Nothing is written until the queue is flushed
+        assert _load(session_factory, "e1") is None
+
+        await persistence.flush()
+        persistence.record_node_result("e1", "b", {"status": "success"}, "cached")
+        persistence.update_status("e1", "completed")
+        await persistence.flush()
+
+        execution = _load(session_factory, "e1")
+        assert execution.status == "completed"
+        assert execution.workflowId == "wf"
+        assert set(execution.result["results"]) == {"a", "b"}
+        assert execution.result["node_statuses"] == {"a": "succeeded", "b": "cached"}
+
+    async def test_failed_batches_are_requeued(self, session_factory):
+        calls = 0
+
+        def flaky_factory():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise RuntimeError("database unavailable")
+            return session_factory()
+
+        persistence = ExecutionPersistence(session_factory=flaky_factory)
+        persistence.create_execution("e1", "wf", {}, "running")
+        await persistence.flush()
+        persistence.update_status("e1", "error", error="boom")
+        await persistence.flush()
+
+        execution = _load(session_factory, "e1")
+        assert execution.status == "error"
+        assert execution.result["error"] == "boom"
+
+    async def test_background_flusher_and_stop(self, session_factory):
+        persistence = ExecutionPersistence(
+            flush_interval=0.01, session_factory=session_factory
+        )
+        persistence.start()
+        persistence.create_execution("e1", "wf", {}, "running")
+        await asyncio.sleep(0.1)
+        assert _load(session_factory, "e1") is not None
+
+        persistence.update_status("e1", "completed")
+        await persistence.stop()
+        assert _load(session_factory, "e1").status == "completed"
+
+    async def test_history_queries(self, session_factory):
+        persistence = ExecutionPersistence(session_factory=session_factory)
+        persistence.create_execution("e1", "wf", {}, "completed")
+        persistence.create_execution("e2", "other", {}, "running")
+        await persistence.flush()
+
+        db = session_factory()
+        try:
+            executions = ExecutionHistoryService.list_executions(db, workflow_id="wf")
+            assert [e.id for e in executions] == ["e1"]
+            latest = ExecutionHistoryService.get_latest_execution(
+                db, "other", statuses=["completed"]
+            )
+            assert latest is None
+            assert db.query(WorkflowExecution).count() == 2
+        finally:
+            db.close()
+
+    async def test_interrupted_executions_are_claimed_once(self, session_factory):
+        persistence = ExecutionPersistence(session_factory=session_factory)
+        persistence.create_execution("e1", "wf", {}, "interrupted")
+        persistence.create_execution("e2", "wf", {}, "completed")
+        await persistence.flush()
+
+        db = session_factory()
+        try:
+            stale_before = datetime.now(timezone.utc) - timedelta(minutes=1)
+            claimed = ExecutionHistoryService.claim_interrupted_executions(
+                db, stale_before
+            )
+            assert [e.id for e in claimed] == ["e1"]
+            assert claimed[0].status == "running"
+            assert (
+                ExecutionHistoryService.claim_interrupted_executions(db, stale_before)
+                == []
+            )
+        finally:
+            db.close()
+
+    async def test_updates_are_dropped_after_max_retries(self, session_factory):
+        def broken_factory():
+            raise RuntimeError("database unavailable")
+
+        persistence = ExecutionPersistence(
+            max_retries=2, session_factory=broken_factory
+        )
+        persistence.create_execution("e1", "wf", {}, "running")
+        await persistence.flush()
+        assert "e1" in persistence._pending
+        assert persistence._retry_delay() > 0
+
+        await persistence.flush()
+        assert persistence._pending == {}
+
+    async def test_checkpoints_are_throttled(self, session_factory):
+        writes = 0
+
+        def counting_factory():
+            nonlocal writes
+            writes += 1
+            return session_factory()
+
+        persistence = ExecutionPersistence(
+            flush_interval=10,
+            checkpoint_interval=0.05,
+            session_factory=counting_factory,
+        )
+        persistence.start()
+        persistence.create_execution("e1", "wf", {}, "running")
+        for node_id in ["a", "b", "c", "d", "e"]:
+            persistence.record_node_result(
+                "e1", node_id, {"status": "success"}, "succeeded", checkpoint=True
+            )
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.1)
+
+        # The first checkpoint flushes at once, the others share one flush
+        assert writes == 2
+        assert set(_load(session_factory, "e1").result["results"]) == set("abcde")
+        await persistence.stop()
+
+    async def test_failing_execution_does_not_hold_back_others(self, session_factory):
+        persistence = ExecutionPersistence(
+            max_retries=1, session_factory=session_factory
+        )
+        persistence.create_execution("e1", "wf", {}, "running")
+        persistence.create_execution("e2", "wf", {}, "running")
+        # Not JSON serializable, so writing e2 fails
+        persistence.record_node_result("e2", "a", {"output": object()}, "succeeded")
+        persistence.update_status("e1", "completed")
+        await persistence.flush()
+
+        assert _load(session_factory, "e1").status == "completed"
+        assert _load(session_factory, "e2") is None
+        assert persistence._pending == {}
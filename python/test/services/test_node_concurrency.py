@@ -0,0 +1,108 @@
+"""
+Tests for NodeConcurrencyLimiter.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.node_concurrency import (
+    GLOBAL_KEY,
+    NodeConcurrencyLimiter,
+    model_key,
+    node_limit_keys,
+    type_key,
+)
+
+
+class TestNodeConcurrencyLimiter:
+    """Test cases for NodeConcurrencyLimiter class."""
+
+    def test_node_limit_keys(self):
+        """Model-backed nodes map to global, type and model keys."""
+        node = {
+            "id": "n1",
+            "data": {
+                "type": "llm",
+                "config": {"provider": "openai", "model": "gpt-4o"},
+            },
+        }
+        assert node_limit_keys(node) == [
+            GLOBAL_KEY,
+            type_key("llm"),
+            model_key("openai", "gpt-4o"),
+        ]
+        assert node_limit_keys({"id": "n2", "data": {"type": "api_call"}}) == [
+            GLOBAL_KEY,
+            type_key("api_call"),
+        ]
+
+    async def test_limit_is_respected(self):
+        """No more than the configured number of holders run at once."""
+        limiter = NodeConcurrencyLimiter({type_key("llm"): 2})
+        active = 0
+        peak = 0
+
+        async def work():
+            nonlocal active, peak
+            async with limiter.slot("wf", [GLOBAL_KEY, type_key("llm")]):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(work() for _ in range(10)))
+
+        assert peak == 2
+        assert limiter.metrics()["in_use"] == {}
+
+    async def test_round_robin_across_workflows(self):
+        """Queued slots alternate between workflows instead of FIFO order."""
+        limiter = NodeConcurrencyLimiter({GLOBAL_KEY: 1})
+        order = []
+
+        await limiter.acquire("holder", [GLOBAL_KEY])
+
+        async def work(workflow_id, index):
+            async with limiter.slot(workflow_id, [GLOBAL_KEY]):
+                order.append((workflow_id, index))
+
+        tasks = [asyncio.create_task(work("big", i)) for i in range(3)]
+        tasks.append(asyncio.create_task(work("small", 0)))
+        await asyncio.sleep(0)
+
+        metrics = limiter.metrics()
+        assert metrics["queue_depth"] == 4
+        assert metrics["queue_depth_by_workflow"] == {"big": 3, "small": 1}
+
+        limiter.release([GLOBAL_KEY])
+        await asyncio.gather(*tasks)
+
+        assert order[:2] == [("big", 0), ("small", 0)]
+
+    async def test_other_keys_are_not_blocked_by_saturated_key(self):
+        """A waiter blocked on one type does not hold back other types."""
+        limiter = NodeConcurrencyLimiter({type_key("ocr"): 1})
+        await limiter.acquire("wf", [type_key("ocr")])
+
+        blocked = asyncio.create_task(limiter.acquire("wf", [type_key("ocr")]))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(limiter.acquire("wf", [type_key("llm")]), 1)
+
+        assert not blocked.done()
+        blocked.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await blocked
+        assert limiter.metrics()["queue_depth"] == 0
+
+    async def test_set_limit_wakes_waiters(self):
+        """Raising a limit grants queued waiters immediately."""
+        limiter = NodeConcurrencyLimiter({GLOBAL_KEY: 1})
+        await limiter.acquire("wf", [GLOBAL_KEY])
+        waiter = asyncio.create_task(limiter.acquire("wf", [GLOBAL_KEY]))
+        await asyncio.sleep(0)
+
+        limiter.set_limit(GLOBAL_KEY, 2)
+
+        await asyncio.wait_for(waiter, 1)
+        assert limiter.metrics()["in_use"] == {GLOBAL_KEY: 2}
@@ -0,0 +1,82 @@
+"""
+Tests for offloading large node outputs.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.services.node_output_store import NodeOutputStore, page
+
+
+def _result(node_id, text):
+    return {"node_id": node_id, "status": "succeeded", "output": {"text": text}}
+
+
+class TestNodeOutputStore:
+    """Test cases for NodeOutputStore."""
+
+    def test_small_outputs_are_inlined(self):
+        store = NodeOutputStore(min_bytes=100)
+        result = _result("a", "short")
+
+        assert store.offload("x", result) is result
+        assert store.get("x", "a") is None
+
+    def test_small_outputs_are_measured_once(self):
+        store = NodeOutputStore(min_bytes=100)
+        result = _result("a", "short")
+
+        with patch(
+            "app.services.node_output_store.dumps", return_value="{}"
+        ) as mock_dumps:
+            store.offload("x", result)
+            store.offload("x", result)
+            store.offload("x", _result("a", "changed"))
+
+        assert mock_dumps.call_count == 2
+
+    def test_large_outputs_are_replaced_by_preview_and_reference(self):
+        store = NodeOutputStore(min_bytes=100, preview_chars=10)
+        result = _result("a", "y" * 500)
+
+        light = store.offload("x", result)
+
+        assert light["output"] == {"text": "y" * 10 + "…"}
+        assert light["output_ref"]["url"] == "/api/v1/executions/x/nodes/a/output"
+        assert light["output_ref"]["size"] > 500
+        assert result["output"]["text"] == "y" * 500
+        assert store.get("x", "a") is result["output"]
+        # Re-sending the same result reuses the offloaded copy
+        assert store.offload("x", result) is light
+        assert store.stats()["offloaded"] == 1
+
+    def test_least_recently_used_outputs_are_evicted(self):
+        store = NodeOutputStore(min_bytes=100, max_bytes=1500)
+        for node_id in ["a", "b", "c"]:
+            store.offload("x", _result(node_id, "z" * 600))
+
+        assert store.get("x", "a") is None
+        assert store.get("x", "c") is not None
+        assert store.stats()["entries"] == 2
+
+
+class TestPage:
+    """Test cases for paging through outputs."""
+
+    def test_pages_strings_and_lists_by_path(self):
+        output = {"text": "abcdef", "pages": [{"n": 1}, {"n": 2}, {"n": 3}]}
+
+        assert page(output, "text", 2, 3)["value"] == "cde"
+        assert page(output, "pages", 1, 5) == {
+            "path": "pages",
+            "total": 3,
+            "offset": 1,
+            "limit": 5,
+            "value": [{"n": 2}, {"n": 3}],
+        }
+        assert page(output, "pages.0.n", 0, 10) == {"path": "pages.0.n", "value": 1}
+
+    def test_missing_path_raises_key_error(self):
+        with pytest.raises(KeyError):
+            page({"text": "abc"}, "pages.0", 0, 10)
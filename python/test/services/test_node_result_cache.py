@@ -0,0 +1,121 @@
+"""
+Tests for the node result cache.
+"""
+
+import os
+import time
+
+from app.services.node_result_cache import (
+    DiskCacheTier,
+    MemoryCacheTier,
+    NodeResultCache,
+    compute_node_hash,
+    input_file_fingerprint,
+    is_cacheable,
+)
+
+
+def _node(config, node_type="llm"):
+    return {"id": "n1", "data": {"type": node_type, "config": config}}
+
+
+class TestComputeNodeHash:
+    """Test cases for compute_node_hash."""
+
+    def test_hash_is_stable_across_key_order(self):
+        a = _node({"model": "gpt-4o", "temperature": 0})
+        b = _node({"temperature": 0, "model": "gpt-4o"})
+        assert compute_node_hash(a, []) == compute_node_hash(b, [])
+
+    def test_cache_flag_does_not_change_hash(self):
+        a = _node({"model": "gpt-4o"})
+        b = _node({"model": "gpt-4o", "cache": True})
+        assert compute_node_hash(a, []) == compute_node_hash(b, [])
+        assert is_cacheable(b) and not is_cacheable(a)
+
+    def test_config_type_and_upstream_change_hash(self):
+        base = compute_node_hash(_node({"model": "gpt-4o"}), ["u1"])
+        assert base != compute_node_hash(_node({"model": "gpt-4"}), ["u1"])
+        assert base != compute_node_hash(_node({"model": "gpt-4o"}, "ocr"), ["u1"])
+        assert base != compute_node_hash(_node({"model": "gpt-4o"}), ["u2"])
+        assert compute_node_hash(_node({}), ["a", "b"]) == compute_node_hash(
+            _node({}), ["b", "a"]
+        )
+
+    def test_replaced_input_file_changes_hash(self, tmp_path):
+        path = tmp_path / "scan.png"
+        path.write_bytes(b"first")
+        node = _node({"file_path": str(path)}, "ocr")
+        before = compute_node_hash(node, [], input_file_fingerprint(node))
+
+        path.write_bytes(b"second scan")
+        after = compute_node_hash(node, [], input_file_fingerprint(node))
+
+        assert before != after
+        assert input_file_fingerprint(_node({"model": "gpt-4o"})) is None
+
+
+class TestCacheTiers:
+    """Test cases for the memory and disk tiers."""
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        tier = MemoryCacheTier(max_entries=2, ttl_seconds=60)
+        tier.set("a", {"v": 1})
+        tier.set("b", {"v": 2})
+        tier.get("a")
+        tier.set("c", {"v": 3})
+
+        assert tier.get("b") is None
+        assert tier.get("a") == {"v": 1}
+        assert tier.get("c") == {"v": 3}
+
+    def test_memory_tier_expires_entries(self):
+        tier = MemoryCacheTier(max_entries=2, ttl_seconds=60)
+        tier.set("a", {"v": 1}, stored_at=time.time() - 120)
+        assert tier.get("a") is None
+
+    def test_disk_tier_round_trip_and_ttl(self, tmp_path):
+        tier = DiskCacheTier(str(tmp_path), ttl_seconds=60, max_bytes=10_000)
+        tier.set("ab" * 32, {"v": 1}, time.time())
+        assert tier.get("ab" * 32)[1] == {"v": 1}
+
+        tier.set("cd" * 32, {"v": 2}, time.time() - 120)
+        assert tier.get("cd" * 32) is None
+        assert not (tmp_path / "cd" / f"{'cd' * 32}.json").exists()
+
+    def test_disk_tier_evicts_oldest_over_size_cap(self, tmp_path):
+        tier = DiskCacheTier(str(tmp_path), ttl_seconds=60, max_bytes=250)
+        keys = [f"{i:02d}" * 32 for i in range(4)]
+        for i, key in enumerate(keys):
+            tier.set(key, {"payload": "x" * 50}, time.time())
+            path = tmp_path / key[:2] / f"{key}.json"
+            os.utime(path, (time.time() - 10 + i, time.time() - 10 + i))
+
+        tier.set("ff" * 32, {"payload": "x" * 50}, time.time())
+
+        assert tier.get(keys[0]) is None
+        assert tier.get("ff" * 32) is not None
+        assert tier._total_bytes <= 250
+
+
+class TestNodeResultCache:
+    """Test cases for NodeResultCache."""
+
+    async def test_disk_hit_is_promoted_to_memory(self, tmp_path):
+        cache = NodeResultCache(max_memory_entries=4, directory=str(tmp_path))
+        await cache.set("ab" * 32, {"status": "success"})
+        cache.memory.clear()
+
+        assert await cache.get("ab" * 32) == {"status": "success"}
+        assert len(cache.memory) == 1
+        assert cache.stats()["hits"] == 1
+
+    async def test_returned_results_are_copies(self):
+        cache = NodeResultCache()
+        await cache.set("k", {"output": {"text": "a"}})
+        result = await cache.get("k")
+        result["output"]["text"] = "mutated"
+
+        assert (await cache.get("k"))["output"]["text"] == "a"
+        assert await cache.get("missing") is None
+        assert cache.stats()["misses"] == 1
@@ -0,0 +1,67 @@
+"""
+Tests for websocket wire encodings.
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.services import websocket_encoding
+from app.services.websocket_encoding import JSON, EncodedMessage, WireEncoding
+
+MESSAGE = {"event": "workflow-execution-completed", "data": {"text": "x" * 64}}
+
+
+class TestWireEncoding:
+    """Test cases for WireEncoding."""
+
+    def test_json_is_sent_as_text(self):
+        assert json.loads(JSON.encode(MESSAGE)) == MESSAGE
+
+    def test_negotiate_falls_back_for_unknown_or_missing_libraries(self):
+        assert WireEncoding.negotiate({}) == JSON
+        assert WireEncoding.negotiate({"encoding": "xml"}) == JSON
+        with patch.object(websocket_encoding, "zstandard", None):
+            assert WireEncoding.negotiate({"compression": "zstd"}) == JSON
+
+    def test_msgpack_frames_are_binary(self):
+        encoding = WireEncoding.negotiate({"encoding": "msgpack"})
+        if encoding.format != "msgpack":
+            pytest.skip("No MessagePack library installed")
+        payload = encoding.encode(MESSAGE)
+
+        assert isinstance(payload, bytes)
+        unpack = getattr(websocket_encoding.ormsgpack, "unpackb", None)
+        if unpack is not None:
+            assert unpack(payload) == MESSAGE
+
+    def test_zstd_compresses_large_payloads_only(self):
+        encoding = WireEncoding.negotiate({"compression": "zstd"})
+        if encoding.compression != "zstd":
+            pytest.skip("zstandard is not installed")
+        with patch.object(
+            websocket_encoding.settings, "WEBSOCKET_COMPRESSION_MIN_BYTES", 1024
+        ):
+            small = encoding.encode(MESSAGE)
+            large = encoding.encode({"data": "y" * 4096})
+
+        assert isinstance(small, str)
+        assert isinstance(large, bytes)
+        decompressed = websocket_encoding.zstandard.ZstdDecompressor().decompress(large)
+        assert json.loads(decompressed) == {"data": "y" * 4096}
+
+
+class TestEncodedMessage:
+    """Test cases for EncodedMessage."""
+
+    def test_serializes_once_per_encoding(self):
+        encoded = EncodedMessage(MESSAGE)
+        with patch.object(
+            websocket_encoding, "dumps", wraps=websocket_encoding.dumps
+        ) as dumps:
+            first = encoded.payload(JSON)
+            second = encoded.payload(WireEncoding())
+
+        assert first is second
+        assert dumps.call_count == 1
@@ -0,0 +1,230 @@
+"""
+Tests for the per-connection websocket send queues.
+"""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.services.websocket_manager import WebsocketManager
+
+
+class FakeWebSocket:
+    """Records sent messages; sends block while ``gate`` is cleared."""
+
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.closed = False
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed = True
+
+
+async def _settle():
+    await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+class TestWebsocketManager:
+    """Test cases for WebsocketManager fan-out."""
+
+    async def test_slow_client_does_not_block_others(self):
+        manager = WebsocketManager()
+        slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+        await manager.connect(slow, "wf")
+        await manager.connect(fast, "wf")
+
+        for i in range(3):
+            await asyncio.wait_for(
+                manager.send_message_to_workflow("wf", {"event": "e", "data": i}),
+                timeout=0.1,
+            )
+        await _settle()
+
+        assert [m["data"] for m in fast.sent] == [0, 1, 2]
+        assert slow.sent == []
+
+        slow.gate.set()
+        await _settle()
+        assert [m["data"] for m in slow.sent] == [0, 1, 2]
+        await manager.close_all()
+
+    async def test_status_updates_coalesce_while_queued(self):
+        manager = WebsocketManager()
+        client = FakeWebSocket(blocked=True)
+        await manager.connect(client, "wf")
+
+        await manager.send_message_to_workflow("wf", {"event": "first"})
+        await _settle()
+        for i in range(5):
+            await manager.send_message_to_workflow(
+                "wf", {"event": "node-status-update", "data": i}
+            )
+        await manager.send_message_to_workflow("wf", {"event": "last"})
+
+        client.gate.set()
+        await _settle()
+        assert client.sent == [
+            {"event": "first"},
+            {"event": "node-status-update", "data": 4},
+            {"event": "last"},
+        ]
+        assert manager.stats()["coalesced"] == 4
+        await manager.close_all()
+
+    async def test_overflowing_client_is_dropped(self):
+        manager = WebsocketManager()
+        slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+        with patch("app.services.websocket_manager.settings") as settings:
+            settings.WEBSOCKET_SEND_QUEUE_SIZE = 2
+            settings.WEBSOCKET_SEND_TIMEOUT_SECONDS = 10.0
+            await manager.connect(slow, "wf")
+            await manager.connect(fast, "wf")
+
+        for i in range(4):
+            await manager.send_message_to_workflow("wf", {"event": "e", "data": i})
+            await _settle()
+
+        assert slow.closed
+        assert manager.workflow_connections["wf"] == [fast]
+        assert [m["data"] for m in fast.sent] == [0, 1, 2, 3]
+        assert manager.stats()["dropped"] == 1
+        await manager.close_all()
+
+    async def test_client_exceeding_send_timeout_is_dropped(self):
+        manager = WebsocketManager()
+        client = FakeWebSocket(blocked=True)
+        with patch("app.services.websocket_manager.settings") as settings:
+            settings.WEBSOCKET_SEND_QUEUE_SIZE = 8
+            settings.WEBSOCKET_SEND_TIMEOUT_SECONDS = 0.01
+            await manager.connect(client, "wf")
+
+        await manager.send_message_to_workflow("wf", {"event": "e"})
+        await asyncio.sleep(0.05)
+
+        assert client.closed
+        assert "wf" not in manager.workflow_connections
+
+    async def test_batched_events_are_merged_into_one_frame(self):
+        manager = WebsocketManager()
+        manager.flush_interval = 0.02
+        client = FakeWebSocket()
+        await manager.connect(client, "wf")
+
+        for seq, node_id in enumerate(["a", "b", "a"], start=1):
+            await manager.send_message_to_workflow(
+                "wf",
+                {
+                    "event": "node-status-patch",
+                    "data": {
+                        "execution_id": "x",
+                        "seq": seq,
+                        "changes": {node_id: f"status-{seq}"},
+                    },
+                },
+            )
+        for seq, node_id in enumerate(["a", "b", "a"], start=1):
+            await manager.send_message_to_workflow(
+                "wf",
+                {
+                    "event": "workflow-execution-progress",
+                    "data": {
+                        "current_layer": 0,
+                        "nodes_completed": [node_id],
+                        "results": {node_id: seq},
+                    },
+                },
+            )
+        await _settle()
+        assert client.sent == []
+
+        await asyncio.sleep(0.03)
+        assert client.sent == [
+            {
+                "event": "batch",
+                "data": [
+                    {
+                        "event": "node-status-patch",
+                        "data": {
+                            "execution_id": "x",
+                            "from_seq": 1,
+                            "seq": 3,
+                            "changes": {"a": "status-3", "b": "status-2"},
+                        },
+                    },
+                    {
+                        "event": "workflow-execution-progress",
+                        "data": {
+                            "current_layer": 0,
+                            "nodes_completed": ["a", "b", "a"],
+                            "results": {"a": 3, "b": 2},
+                        },
+                    },
+                ],
+            }
+        ]
+        assert manager.stats()["merged"] == 4
+        await manager.close_all()
+
+    async def test_batched_events_keep_their_order(self):
+        manager = WebsocketManager()
+        manager.flush_interval = 10.0
+        client = FakeWebSocket()
+        await manager.connect(client, "wf")
+
+        def patch(seq):
+            return {
+                "event": "node-status-patch",
+                "data": {"execution_id": "x", "seq": seq, "changes": {"a": seq}},
+            }
+
+        await manager.send_message_to_workflow("wf", patch(1))
+        await manager.send_message_to_workflow(
+            "wf", {"event": "node-output-partial", "data": {"node_id": "a"}}
+        )
+        await manager.send_message_to_workflow("wf", patch(2))
+        await manager.send_message_to_workflow(
+            "wf", {"event": "workflow-execution-completed", "data": {}}
+        )
+        await _settle()
+
+        assert client.sent[0]["data"] == [
+            patch(1),
+            {"event": "node-output-partial", "data": {"node_id": "a"}},
+            patch(2),
+        ]
+        assert manager.stats()["merged"] == 0
+        await manager.close_all()
+
+    async def test_terminal_event_flushes_pending_batch_first(self):
+        manager = WebsocketManager()
+        manager.flush_interval = 10.0
+        client = FakeWebSocket()
+        await manager.connect(client, "wf")
+
+        await manager.send_message_to_workflow(
+            "wf", {"event": "node-output-delta", "data": {"delta": "hi"}}
+        )
+        await manager.send_message_to_workflow(
+            "wf", {"event": "workflow-execution-completed", "data": {}}
+        )
+        await _settle()
+
+        assert [m["event"] for m in client.sent] == [
+            "node-output-delta",
+            "workflow-execution-completed",
+        ]
+        assert manager.batches == {}
+        await manager.close_all()
@@ -0,0 +1,636 @@
+"""
+Tests for WorkflowExecutionService scheduling.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.node_result_cache import NodeResultCache
+from app.services.node_streams import node_streams
+from app.services.single_flight import SingleFlight
+from app.services.workflow_execution import (
+    NODE_EXECUTORS,
+    NodeStatus,
+    WorkflowExecutionService,
+)
+
+
+class DelayExecutor:
+    """Test executor that sleeps for ``data.config.delay`` and records timings."""
+
+    events = []
+
+    async def execute(self, node, previous_results=None, workflow_id=None):
+        config = node["data"]["config"]
+        loop = asyncio.get_event_loop()
+        DelayExecutor.events.append(("start", node["id"], loop.time()))
+        await asyncio.sleep(config.get("delay", 0))
+        DelayExecutor.events.append(("end", node["id"], loop.time()))
+        if config.get("fail"):
+            return {"node_id": node["id"], "status": "error", "error": "boom"}
+        return {"node_id": node["id"], "type": "delay", "status": "success"}
+
+
+def _node(node_id, delay=0.0, fail=False, cache=False):
+    return {
+        "id": node_id,
+        "data": {
+            "type": "delay",
+            "config": {"delay": delay, "fail": fail, "cache": cache},
+        },
+    }
+
+
+def _edge(source, target):
+    return {"source": source, "target": target}
+
+
+@pytest.fixture(autouse=True)
+def delay_executor():
+    DelayExecutor.events = []
+    NODE_EXECUTORS["delay"] = DelayExecutor
+    yield
+    NODE_EXECUTORS.pop("delay", None)
+
+
+@pytest.fixture(autouse=True)
+def persisted():
+    with patch(
+        "app.services.workflow_execution.execution_persistence"
+    ) as mock_persistence:
+        mock_persistence.flush = AsyncMock()
+        yield mock_persistence
+
+
+@pytest.fixture
+def reported():
+    with patch(
+        "app.services.workflow_execution.websocket_manager.send_message_to_workflow",
+        new_callable=AsyncMock,
+    ) as mock_send:
+        yield mock_send
+
+
+def _event_times(event, node_id):
+    return next(t for e, n, t in DelayExecutor.events if e == event and n == node_id)
+
+
+class TestReadyQueueScheduler:
+    """Test cases for dependency-driven node scheduling."""
+
+    async def test_successor_starts_before_unrelated_slow_node_finishes(self, reported):
+        """A fast branch must not wait for a slow node in the same layer."""
+        service = WorkflowExecutionService()
+        nodes = [_node("slow", 0.3), _node("fast", 0.0), _node("after_fast", 0.0)]
+        edges = [_edge("fast", "after_fast")]
+
+        result = await service._execute_workflow_process("wf", nodes, edges)
+
+        assert result["status"] == "completed"
+        assert _event_times("start", "after_fast") < _event_times("end", "slow")
+
+    async def test_node_waits_for_all_predecessors(self, reported):
+        """A join node starts only after every predecessor finishes."""
+        service = WorkflowExecutionService()
+        nodes = [_node("a", 0.05), _node("b", 0.15), _node("join")]
+        edges = [_edge("a", "join"), _edge("b", "join")]
+
+        result = await service._execute_workflow_process("wf", nodes, edges)
+
+        assert result["status"] == "completed"
+        assert set(result["results"]) == {"a", "b", "join"}
+        assert _event_times("start", "join") >= _event_times("end", "b")
+
+    async def test_failure_stops_workflow_and_cancels_running_nodes(self, reported):
+        """A failed node cancels in-flight work and fails unfinished nodes."""
+        service = WorkflowExecutionService()
+        nodes = [
+            _node("bad", 0.0, fail=True),
+            _node("slow", 1.0),
+            _node("after_bad"),
+        ]
+        edges = [_edge("bad", "after_bad")]
+
+        result = await service._execute_workflow_process("wf", nodes, edges)
+
+        assert result["status"] == "error"
+        assert "after_bad" not in result["results"]
+        assert not any(e == "end" and n == "slow" for e, n, _ in DelayExecutor.events)
+
+        error_event = reported.await_args_list[-1].args[1]
+        assert error_event["event"] == "workflow-execution-error"
+        assert error_event["data"]["failed_nodes"] == ["bad"]
+        assert set(error_event["data"]["node_statuses"].values()) == {NodeStatus.FAILED}
+
+    async def test_cancellation_is_reported_with_execution_id(self, reported):
+        """A cancelled run reports its execution like the other final events."""
+        service = WorkflowExecutionService()
+        task = asyncio.create_task(
+            service._execute_workflow_process("wf", [_node("slow", 1.0)], [])
+        )
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        error_event = reported.await_args_list[-1].args[1]
+        assert error_event["event"] == "workflow-execution-error"
+        assert error_event["data"]["status"] == "cancelled"
+        assert error_event["data"]["execution_id"]
+
+    async def test_cycle_is_reported_as_error(self, reported):
+        """Cyclic graphs are rejected before any node runs."""
+        service = WorkflowExecutionService()
+        nodes = [_node("a"), _node("b")]
+        edges = [_edge("a", "b"), _edge("b", "a")]
+
+        result = await service._execute_workflow_process("wf", nodes, edges)
+
+        assert result["status"] == "error"
+        assert "cycle" in result["error"]
+        assert DelayExecutor.events == []
+
+    async def test_references_to_unconnected_nodes_are_rejected(self, reported):
+        """Templates may only reference the outputs of predecessors."""
+        service = WorkflowExecutionService()
+
+        def llm(node_id, content):
+            return {
+                "id": node_id,
+                "data": {
+                    "type": "llm",
+                    "config": {"messages": [{"role": "user", "content": content}]},
+                },
+            }
+
+        nodes = [_node("a"), _node("b"), llm("summary", "{{ a.x }} {{ b.y }}")]
+
+        result = await service._execute_workflow_process(
+            "wf", nodes, [_edge("a", "summary")]
+        )
+
+        assert result["status"] == "error"
+        assert "summary references the output of b" in result["error"]
+        assert DelayExecutor.events == []
+
+    async def test_nodes_only_see_predecessor_results(self, reported):
+        seen = {}
+
+        class RecordingExecutor:
+            async def execute(self, node, previous_results=None, workflow_id=None):
+                seen[node["id"]] = set(previous_results)
+                return {"node_id": node["id"], "status": "success"}
+
+        NODE_EXECUTORS["record"] = RecordingExecutor
+        try:
+            service = WorkflowExecutionService()
+            nodes = [
+                _node("a"),
+                _node("b", 0.05),
+                {"id": "c", "data": {"type": "record", "config": {}}},
+            ]
+
+            result = await service._execute_workflow_process(
+                "wf", nodes, [_edge("a", "b"), _edge("b", "c")]
+            )
+        finally:
+            NODE_EXECUTORS.pop("record", None)
+
+        assert result["status"] == "completed"
+        assert seen == {"c": {"b"}}
+
+
+class TestExecutionPersistence:
+    """Test cases for recording executions through the write-behind queue."""
+
+    async def test_execution_and_node_results_are_queued(self, reported, persisted):
+        service = WorkflowExecutionService()
+        nodes = [_node("a"), _node("b")]
+        edges = [_edge("a", "b")]
+
+        await service._execute_workflow_process(
+            "wf", nodes, edges, execution_id="exec-1"
+        )
+
+        persisted.create_execution.assert_called_once_with(
+            "exec-1",
+            "wf",
+            snapshot={"nodes": nodes, "edges": edges},
+            status="running",
+        )
+        recorded_nodes = [
+            call.args[1] for call in persisted.record_node_result.call_args_list
+        ]
+        assert recorded_nodes == ["a", "b"]
+        persisted.update_status.assert_called_once_with(
+            "exec-1",
+            "completed",
+            {"a": NodeStatus.SUCCEEDED, "b": NodeStatus.SUCCEEDED},
+        )
+
+    async def test_failed_execution_records_error(self, reported, persisted):
+        service = WorkflowExecutionService()
+
+        await service._execute_workflow_process(
+            "wf", [_node("a", fail=True)], [], execution_id="exec-2"
+        )
+
+        args, kwargs = persisted.update_status.call_args
+        assert args[:2] == ("exec-2", "error")
+        assert "a" in kwargs["error"]
+
+
+class TestResumableExecutions:
+    """Test cases for resuming interrupted executions from checkpoints."""
+
+    async def test_resume_skips_checkpointed_nodes(self, reported, persisted):
+        service = WorkflowExecutionService()
+        nodes = [_node("a"), _node("b"), _node("c")]
+        edges = [_edge("a", "b"), _edge("b", "c")]
+        snapshot = {"nodes": nodes, "edges": edges}
+        checkpoint = {"results": {"a": {"node_id": "a", "status": "success"}}}
+
+        with patch.object(
+            WorkflowExecutionService,
+            "_claim_interrupted_executions",
+            return_value=[("exec-1", "wf", snapshot, checkpoint)],
+        ):
+            assert await service.resume_interrupted_executions() == ["exec-1"]
+
+        result = await service.active_executions["wf"]
+
+        started = [n for e, n, _ in DelayExecutor.events if e == "start"]
+        assert started == ["b", "c"]
+        assert result["status"] == "completed"
+        assert set(result["results"]) == {"a", "b", "c"}
+        persisted.update_status.assert_called_with(
+            "exec-1",
+            "completed",
+            {n: NodeStatus.SUCCEEDED for n in ["a", "b", "c"]},
+        )
+        assert "wf" not in service.active_executions
+
+    async def test_stop_marks_active_executions_interrupted(self, reported, persisted):
+        service = WorkflowExecutionService()
+        await service.execute_workflow("wf", [_node("slow", 1.0)], [])
+        execution_id = service.active_execution_ids["wf"]
+        await asyncio.sleep(0.01)
+
+        await service.stop()
+
+        args = persisted.update_status.call_args.args
+        assert args[:2] == (execution_id, "interrupted")
+        persisted.record_node_result.assert_not_called()
+        assert service.active_executions == {}
+
+
+class TestNodeResultCaching:
+    """Test cases for opt-in node result caching."""
+
+    async def test_cached_nodes_skip_execution_on_rerun(self, reported):
+        service = WorkflowExecutionService()
+        nodes = [_node("a", cache=True), _node("b", cache=True), _node("c")]
+        edges = [_edge("a", "b"), _edge("b", "c")]
+
+        with patch(
+            "app.services.workflow_execution.node_result_cache", NodeResultCache()
+        ):
+            await service._execute_workflow_process("wf", nodes, edges)
+            DelayExecutor.events = []
+            result = await service._execute_workflow_process("wf", nodes, edges)
+
+        started = {n for e, n, _ in DelayExecutor.events if e == "start"}
+        assert started == {"c"}
+        assert result["results"]["a"]["cached"] is True
+        assert result["results"]["b"]["cached"] is True
+
+        completed_event = reported.await_args_list[-1].args[1]
+        assert completed_event["data"]["node_statuses"] == {
+            "a": NodeStatus.CACHED,
+            "b": NodeStatus.CACHED,
+            "c": NodeStatus.SUCCEEDED,
+        }
+
+    async def test_upstream_change_invalidates_downstream_entries(self, reported):
+        service = WorkflowExecutionService()
+        edges = [_edge("a", "b")]
+
+        with patch(
+            "app.services.workflow_execution.node_result_cache", NodeResultCache()
+        ):
+            await service._execute_workflow_process(
+                "wf", [_node("a", cache=True), _node("b", cache=True)], edges
+            )
+            DelayExecutor.events = []
+            await service._execute_workflow_process(
+                "wf", [_node("a", 0.01, cache=True), _node("b", cache=True)], edges
+            )
+
+        started = {n for e, n, _ in DelayExecutor.events if e == "start"}
+        assert started == {"a", "b"}
+
+
+class TestIncrementalExecution:
+    """Test cases for incremental re-execution against the last snapshot."""
+
+    async def _run(self, service, nodes, edges, incremental=False):
+        return await service._execute_workflow_process("wf", nodes, edges, incremental)
+
+    async def test_only_dirty_subgraph_is_rerun(self, reported):
+        service = WorkflowExecutionService()
+        edges = [_edge("a", "b"), _edge("b", "c"), _edge("a", "d")]
+        nodes = [_node("a"), _node("b"), _node("c"), _node("d")]
+        first = await self._run(service, nodes, edges)
+        previous = ({"nodes": nodes, "edges": edges}, {"results": first["results"]})
+
+        edited = [_node("a"), _node("b", 0.01), _node("c"), _node("d")]
+        DelayExecutor.events = []
+        with patch.object(
+            WorkflowExecutionService, "_fetch_latest_execution", return_value=previous
+        ):
+            result = await self._run(service, edited, edges, incremental=True)
+
+        started = {n for e, n, _ in DelayExecutor.events if e == "start"}
+        assert started == {"b", "c"}
+        assert result["status"] == "completed"
+        assert result["results"]["a"]["reused"] is True
+        assert result["results"]["d"]["reused"] is True
+
+        completed_event = reported.await_args_list[-1].args[1]
+        assert completed_event["data"]["node_statuses"]["a"] == NodeStatus.CACHED
+        assert completed_event["data"]["node_statuses"]["b"] == NodeStatus.SUCCEEDED
+
+    async def test_failed_nodes_are_not_reused(self, reported):
+        service = WorkflowExecutionService()
+        nodes = [_node("a"), _node("b")]
+        edges = [_edge("a", "b")]
+        previous = (
+            {"nodes": nodes, "edges": edges},
+            {
+                "results": {
+                    "a": {"node_id": "a", "status": "success"},
+                    "b": {"node_id": "b", "status": "error"},
+                }
+            },
+        )
+
+        with patch.object(
+            WorkflowExecutionService, "_fetch_latest_execution", return_value=previous
+        ):
+            await self._run(service, nodes, edges, incremental=True)
+
+        started = {n for e, n, _ in DelayExecutor.events if e == "start"}
+        assert started == {"b"}
+
+    async def test_missing_history_runs_everything(self, reported):
+        service = WorkflowExecutionService()
+        nodes = [_node("a"), _node("b")]
+
+        with patch.object(
+            WorkflowExecutionService,
+            "_fetch_latest_execution",
+            side_effect=RuntimeError("database unavailable"),
+        ):
+            result = await self._run(service, nodes, [], incremental=True)
+
+        assert result["status"] == "completed"
+        started = {n for e, n, _ in DelayExecutor.events if e == "start"}
+        assert started == {"a", "b"}
+
+
+class PageExecutor:
+    """Test executor publishing ``data.config.pages`` items to its stream."""
+
+    streams_output = True
+
+    async def execute(self, node, previous_results=None, workflow_id=None):
+        stream = node_streams.get(workflow_id, node["id"])
+        loop = asyncio.get_event_loop()
+        for page in node["data"]["config"]["pages"]:
+            await asyncio.sleep(0.05)
+            stream.append(page)
+        DelayExecutor.events.append(("end", node["id"], loop.time()))
+        return {"node_id": node["id"], "status": "success"}
+
+
+class CollectExecutor:
+    """Test executor collecting the stream of its upstream node."""
+
+    @staticmethod
+    def consumes_stream(config):
+        return bool(config.get("stream_input"))
+
+    async def execute(self, node, previous_results=None, workflow_id=None):
+        loop = asyncio.get_event_loop()
+        DelayExecutor.events.append(("start", node["id"], loop.time()))
+        upstream = node["data"]["config"]["upstream"]
+        stream = node_streams.get(workflow_id, upstream)
+        items = [item async for item in stream] if stream else []
+        return {"node_id": node["id"], "status": "success", "output": items}
+
+
+def _stream_node(node_id, node_type, **config):
+    return {"id": node_id, "data": {"type": node_type, "config": config}}
+
+
+class ResultExecutor:
+    """Test executor reading the final result of its upstream node."""
+
+    async def execute(self, node, previous_results=None, workflow_id=None):
+        loop = asyncio.get_event_loop()
+        DelayExecutor.events.append(("start", node["id"], loop.time()))
+        upstream = node["data"]["config"]["upstream"]
+        return {
+            "node_id": node["id"],
+            "status": "success",
+            "output": previous_results[upstream]["status"],
+        }
+
+
+@pytest.fixture
+def stream_executors():
+    NODE_EXECUTORS["pages"] = PageExecutor
+    NODE_EXECUTORS["collect"] = CollectExecutor
+    NODE_EXECUTORS["result"] = ResultExecutor
+    yield
+    NODE_EXECUTORS.pop("pages", None)
+    NODE_EXECUTORS.pop("collect", None)
+    NODE_EXECUTORS.pop("result", None)
+
+
+class TestStreamingNodes:
+    """Test cases for consumers starting on streamed upstream output."""
+
+    async def test_stream_consumer_starts_before_producer_finishes(
+        self, reported, stream_executors
+    ):
+        service = WorkflowExecutionService()
+        nodes = [
+            _stream_node("ocr", "pages", pages=[1, 2, 3]),
+            _stream_node("sum", "collect", upstream="ocr", stream_input=True),
+        ]
+
+        result = await service._execute_workflow_process(
+            "wf", nodes, [_edge("ocr", "sum")]
+        )
+
+        assert result["status"] == "completed"
+        assert result["results"]["sum"]["output"] == [1, 2, 3]
+        assert _event_times("start", "sum") < _event_times("end", "ocr")
+
+    async def test_consumer_without_stream_input_waits(
+        self, reported, stream_executors
+    ):
+        service = WorkflowExecutionService()
+        nodes = [
+            _stream_node("ocr", "pages", pages=[1, 2]),
+            _stream_node("sum", "collect", upstream="ocr"),
+        ]
+
+        result = await service._execute_workflow_process(
+            "wf", nodes, [_edge("ocr", "sum")]
+        )
+
+        assert result["status"] == "completed"
+        assert _event_times("start", "sum") >= _event_times("end", "ocr")
+        assert node_streams.get("wf", "ocr") is None
+
+    async def test_executor_not_consuming_streams_ignores_stream_input(
+        self, reported, stream_executors
+    ):
+        service = WorkflowExecutionService()
+        nodes = [
+            _stream_node("ocr", "pages", pages=[1, 2]),
+            _stream_node("read", "result", upstream="ocr", stream_input=True),
+        ]
+
+        result = await service._execute_workflow_process(
+            "wf", nodes, [_edge("ocr", "read")]
+        )
+
+        assert result["status"] == "completed"
+        assert result["results"]["read"]["output"] == "success"
+        assert _event_times("start", "read") >= _event_times("end", "ocr")
+
+
+class TestSingleFlight:
+    """Test cases for coalescing identical in-flight nodes across executions."""
+
+    async def test_identical_nodes_of_concurrent_runs_execute_once(self, reported):
+        service = WorkflowExecutionService()
+        nodes = [_node("a", delay=0.1, cache=True)]
+
+        with (
+            patch(
+                "app.services.workflow_execution.settings.SINGLE_FLIGHT_NODE_TYPES",
+                ["delay"],
+            ),
+            patch(
+                "app.services.workflow_execution.node_result_cache", NodeResultCache()
+            ),
+        ):
+            first, second = await asyncio.gather(
+                service._execute_workflow_process("wf-1", nodes, []),
+                service._execute_workflow_process("wf-2", nodes, []),
+            )
+
+        assert first["status"] == second["status"] == "completed"
+        assert [e for e, n, _ in DelayExecutor.events if e == "start"] == ["start"]
+        assert second["results"]["a"]["shared"] is True
+        assert second["results"]["a"]["node_id"] == "a"
+        assert "shared" not in first["results"]["a"]
+
+    async def test_uncacheable_and_same_execution_nodes_are_not_coalesced(
+        self, reported
+    ):
+        service = WorkflowExecutionService()
+        # Identical siblings of one run, e.g. samples of the same prompt
+        siblings = [_node("a", delay=0.1, cache=True), _node("b", delay=0.1)]
+        siblings[1]["data"] = siblings[0]["data"]
+
+        with (
+            patch(
+                "app.services.workflow_execution.settings.SINGLE_FLIGHT_NODE_TYPES",
+                ["delay"],
+            ),
+            patch(
+                "app.services.workflow_execution.node_result_cache.get",
+                new=AsyncMock(return_value=None),
+            ),
+            patch(
+                "app.services.workflow_execution.node_result_cache.set", new=AsyncMock()
+            ),
+        ):
+            result = await service._execute_workflow_process("wf", siblings, [])
+            uncacheable = [_node("c", delay=0.1)]
+            await asyncio.gather(
+                service._execute_workflow_process("wf-1", uncacheable, []),
+                service._execute_workflow_process("wf-2", uncacheable, []),
+            )
+
+        assert result["status"] == "completed"
+        starts = [n for e, n, _ in DelayExecutor.events if e == "start"]
+        assert sorted(starts) == ["a", "b", "c", "c"]
+
+    async def test_shared_execution_survives_cancelled_starter(self):
+        single_flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.create_task(single_flight.run("key", work))
+        await started.wait()
+        follower = asyncio.create_task(single_flight.run("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == "done"
+        assert single_flight.stats() == {
+            "in_flight": 0,
+            "executions": 1,
+            "coalesced": 1,
+        }
+
+
+class TestNodeStatusPatches:
+    """Test cases for sequenced node status patches."""
+
+    async def test_patches_apply_to_initial_snapshot(self, reported):
+        service = WorkflowExecutionService()
+        nodes = [_node("a"), _node("b"), _node("c")]
+        edges = [_edge("a", "b"), _edge("b", "c")]
+
+        result = await service._execute_workflow_process("wf", nodes, edges)
+
+        events = [call.args[1] for call in reported.await_args_list]
+        snapshots = [e for e in events if e["event"] == "node-status-update"]
+        patches = [e["data"] for e in events if e["event"] == "node-status-patch"]
+        assert len(snapshots) == 1
+        assert snapshots[0]["data"]["seq"] == 0
+        assert [p["seq"] for p in patches] == list(range(1, len(patches) + 1))
+
+        statuses = dict(snapshots[0]["data"]["node_statuses"])
+        for p in patches:
+            assert p["changes"]
+            assert all(statuses[n] != s for n, s in p["changes"].items())
+            statuses.update(p["changes"])
+        assert statuses == events[-1]["data"]["node_statuses"]
+        assert result["status"] == "completed"
+        assert service.node_status_snapshot("wf") is None
+
+    async def test_snapshot_of_running_execution(self, reported):
+        service = WorkflowExecutionService()
+        run = asyncio.create_task(
+            service._execute_workflow_process("wf", [_node("a", 0.1)], [])
+        )
+        await asyncio.sleep(0.05)
+
+        snapshot = service.node_status_snapshot("wf")
+        assert snapshot["node_statuses"] == {"a": NodeStatus.RUNNING}
+        assert snapshot["seq"] >= 1
+        await run